@@ -0,0 +1,252 @@
+import itertools
+import os
+import threading
+import time
+import pandas as pd
+from api_client import match_prefix
+from data_fetcher import FetchResult, fetch_all
+from dataset_store import get_dataset_store, user_key
+from metrics import timed
+from ranking import TOP_N, VERSION_ATTR
+
+
+RAW_ENDPOINTS = [
+    "/api/empresas/",
+    "/api/faturamento/",
+    "/api/produtos_vendidos/",
+    "/api/detalhes_produtos/",
+    "/api/avaliacoes/",
+]
+
+# Endpoints do servidor que o motor local substitui.
+LOCAL_ENDPOINTS = [
+    "/api/insights/",
+    "/api/media_notas_diretor/",
+    "/api/insights/maior_lucro/",
+]
+
+# Depois desse tempo o motor é reconstruído a partir dos dados brutos, para reconciliar com o servidor.
+REBUILD_INTERVAL = 300
+
+STAT_COLUMNS = ["faturamento_anual", "nota_geral_soma", "nota_diretor_soma", "avaliacoes"]
+
+# Versões únicas entre todos os motores: um motor descartado não deixa chaves reaproveitáveis.
+VERSIONS = itertools.count(1)
+
+
+def _indexed(df, index, columns):
+    df = df.reindex(columns=[index] + columns)
+    return df.dropna(subset=[index]).set_index(index)
+
+
+class InsightsEngine:
+    def __init__(self, top_n=TOP_N, rebuild_interval=REBUILD_INTERVAL):
+        self.top_n = top_n
+        self.rebuild_interval = rebuild_interval
+        self.built_at = None
+        # Muda a cada build/escrita; identifica a versão dos frames derivados para os rankings.
+        self.version = next(VERSIONS)
+        self.lock = threading.RLock()
+
+    def needs_build(self):
+        return self.built_at is None or time.monotonic() - self.built_at > self.rebuild_interval
+
+    def invalidate(self):
+        self.built_at = None
+
+    def build(self, empresas, faturamento, produtos_vendidos, detalhes_produtos, avaliacoes):
+        empresas = _indexed(empresas, "id_empresa", ["nome_empresa", "diretor_empresa"])
+        faturamento = _indexed(faturamento, "id_faturamento", ["id_empresa", "faturamento_anual"])
+        vendas = _indexed(produtos_vendidos, "id_venda", ["id_faturamento", "nome_produto", "produtos_vendidos"])
+        detalhes = _indexed(detalhes_produtos, "id_produto", ["id_empresa", "nome_produto", "preco_unitario"])
+        avaliacoes = _indexed(avaliacoes, "id_avaliacao", ["id_empresa", "nota_diretor", "nota_geral_empresa"])
+
+        stats = pd.DataFrame(0.0, index=empresas.index, columns=STAT_COLUMNS)
+        stats["faturamento_anual"] = stats["faturamento_anual"].add(
+            faturamento.groupby("id_empresa")["faturamento_anual"].sum(), fill_value=0)
+        notas = avaliacoes.groupby("id_empresa").agg(
+            nota_geral_soma=("nota_geral_empresa", "sum"),
+            nota_diretor_soma=("nota_diretor", "sum"),
+            avaliacoes=("id_empresa", "size"),
+        )
+        stats[notas.columns] = stats[notas.columns].add(notas.astype("float64"), fill_value=0)
+
+        vendas = vendas.assign(nome_produto=vendas["nome_produto"].astype("string"))
+        vendas_empresa = vendas.join(faturamento["id_empresa"], on="id_faturamento")
+        quantidades = vendas_empresa.groupby(["id_empresa", "nome_produto"])["produtos_vendidos"].sum().astype("float64")
+        detalhes = detalhes.assign(nome_produto=detalhes["nome_produto"].astype("string"))
+        precos = detalhes.groupby(["id_empresa", "nome_produto"])["preco_unitario"].last()
+
+        with self.lock:
+            self.empresas = empresas.copy()
+            self.faturamento = faturamento.copy()
+            self.vendas = vendas.copy()
+            self.detalhes = detalhes.copy()
+            self.avaliacoes = avaliacoes.copy()
+            self.stats = stats
+            self.quantidades = quantidades
+            self.precos = precos
+            self.built_at = time.monotonic()
+            self.version = next(VERSIONS)
+
+    # --- Atualização incremental -------------------------------------------------
+
+    def apply_write(self, path, record, record_id=None):
+        # Aplica uma escrita bem-sucedida às agregações. Se faltar informação (ex.: id do
+        # registro criado), o motor é marcado para reconstrução em vez de ficar inconsistente.
+        handlers = {
+            "/api/empresas/": self._write_empresa,
+            "/api/faturamento/": self._write_faturamento,
+            "/api/produtos_vendidos/": self._write_venda,
+            "/api/detalhes_produtos/": self._write_detalhes,
+            "/api/avaliacoes/": self._write_avaliacao,
+        }
+        handler = match_prefix(handlers, path)
+        if handler is None or self.built_at is None:
+            return
+        with self.lock:
+            try:
+                handler(record, record_id)
+            except (KeyError, TypeError, ValueError):
+                self.invalidate()
+            self.version = next(VERSIONS)
+
+    def _merge(self, table, record_id, record):
+        if record_id is None:
+            raise KeyError("id do registro ausente")
+        old = table.loc[record_id].to_dict() if record_id in table.index else None
+        new = dict(old or {}, **{k: v for k, v in record.items() if k in table.columns})
+        table.loc[record_id, list(new)] = list(new.values())
+        return old, new
+
+    def _add_stat(self, id_empresa, column, value):
+        if id_empresa not in self.stats.index:
+            self.stats.loc[id_empresa] = 0.0
+        self.stats.loc[id_empresa, column] += value
+
+    def _write_empresa(self, record, record_id):
+        record_id = record.get("id_empresa", record_id)
+        self._merge(self.empresas, record_id, record)
+        if record_id not in self.stats.index:
+            self.stats.loc[record_id] = 0.0
+
+    def _write_faturamento(self, record, record_id):
+        old, new = self._merge(self.faturamento, record.get("id_faturamento", record_id), record)
+        if old is not None:
+            self._add_stat(old["id_empresa"], "faturamento_anual", -old["faturamento_anual"])
+        self._add_stat(new["id_empresa"], "faturamento_anual", new["faturamento_anual"])
+
+    def _write_avaliacao(self, record, record_id):
+        old, new = self._merge(self.avaliacoes, record.get("id_avaliacao", record_id), record)
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None:
+                continue
+            self._add_stat(row["id_empresa"], "nota_geral_soma", sign * row["nota_geral_empresa"])
+            self._add_stat(row["id_empresa"], "nota_diretor_soma", sign * row["nota_diretor"])
+            self._add_stat(row["id_empresa"], "avaliacoes", sign)
+
+    def _write_venda(self, record, record_id):
+        old, new = self._merge(self.vendas, record.get("id_venda", record_id), record)
+        for row, sign in ((old, -1), (new, 1)):
+            if row is None:
+                continue
+            key = (self.faturamento.at[row["id_faturamento"], "id_empresa"], row["nome_produto"])
+            self.quantidades.loc[key] = self.quantidades.get(key, 0.0) + sign * row["produtos_vendidos"]
+
+    def _write_detalhes(self, record, record_id):
+        old, new = self._merge(self.detalhes, record.get("id_produto", record_id), record)
+        if old is not None and (old["id_empresa"], old["nome_produto"]) != (new["id_empresa"], new["nome_produto"]):
+            self.precos = self.precos.drop((old["id_empresa"], old["nome_produto"]), errors="ignore")
+        self.precos.loc[(new["id_empresa"], new["nome_produto"])] = new["preco_unitario"]
+
+    # --- Consultas -----------------------------------------------------------------
+
+    def _diretores(self):
+        stats = self.stats.join(self.empresas["diretor_empresa"]).dropna(subset=["diretor_empresa"])
+        return stats.groupby("diretor_empresa")[STAT_COLUMNS].sum()
+
+    def insights(self):
+        with self.lock:
+            stats = self.stats.join(self.empresas["nome_empresa"]).dropna(subset=["nome_empresa"])
+            media = stats["nota_geral_soma"] / stats["avaliacoes"].where(stats["avaliacoes"] > 0)
+            return pd.DataFrame({
+                "nome_empresa": stats["nome_empresa"].astype("string"),
+                "faturamento_total_anual": stats["faturamento_anual"],
+                "media_nota_empresa": media.astype("float32"),
+            }).reset_index(drop=True)
+
+    def media_notas_diretor(self):
+        with self.lock:
+            diretores = self._diretores()
+            diretores = diretores[diretores["avaliacoes"] > 0]
+            return pd.DataFrame({
+                "diretor_empresa": diretores.index.astype("string"),
+                "media_nota": (diretores["nota_diretor_soma"] / diretores["avaliacoes"]).astype("float32").values,
+            })
+
+    def maior_lucro(self):
+        with self.lock:
+            total = (self.quantidades * self.precos).dropna().nlargest(self.top_n)
+            ids = total.index.get_level_values(0)
+            return pd.DataFrame({
+                "nome_produto": total.index.get_level_values(1).astype("string"),
+                "nome_empresa": self.empresas["nome_empresa"].reindex(ids).astype("string").values,
+                "faturamento_total": total.values,
+            })
+
+    def frames(self):
+        with self.lock:
+            frames = {
+                "/api/insights/": self.insights(),
+                "/api/media_notas_diretor/": self.media_notas_diretor(),
+                "/api/insights/maior_lucro/": self.maior_lucro(),
+            }
+            for path, frame in frames.items():
+                frame.attrs[VERSION_ATTR] = ("engine", self.version, path)
+            return frames
+
+
+def get_insights_engine(store, user):
+    # Um motor por escopo, guardado no store: limitado e descartado no logout (drop_user).
+    return store.resource("insights_engine", user, lambda: InsightsEngine(
+        top_n=int(os.getenv("INSIGHTS_TOP_N", TOP_N)),
+        rebuild_interval=float(os.getenv("INSIGHTS_REBUILD_INTERVAL", REBUILD_INTERVAL)),
+    ))
+
+
+def local_aggregation_default():
+    return os.getenv("LOCAL_AGGREGATION", "0") == "1"
+
+
+def engine_for(headers):
+    return get_insights_engine(get_dataset_store(), user_key(headers))
+
+
+def local_insights(client, headers):
+    # Resultados no mesmo formato de fetch_all, calculados a partir dos dados brutos.
+    engine = engine_for(headers)
+    if engine.needs_build():
+        raw = fetch_all(client, RAW_ENDPOINTS, headers)
+        failed = [result for result in raw.values() if not result.ok]
+        if failed:
+            error = "; ".join(f"{result.path}: {result.error}" for result in failed)
+            return {path: FetchResult(path, status_code=failed[0].status_code, error=error) for path in LOCAL_ENDPOINTS}
+        with timed("aggregation", "insights_engine"):
+            engine.build(*(raw[path].data for path in RAW_ENDPOINTS))
+    return {path: FetchResult(path, data=frame, status_code=200, from_cache=True) for path, frame in engine.frames().items()}
+
+
+def apply_local_write(headers, path, payload, response):
+    # Chamado após um POST/PUT bem-sucedido; usa o corpo da resposta para obter o id criado.
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    record = dict(payload, **body) if isinstance(body, dict) else dict(payload)
+    tail = path.rstrip("/").rsplit("/", 1)[-1]
+    record_id = int(tail) if tail.isdigit() else None
+    engine_for(headers).apply_write(path, record, record_id)
+    from review_analytics import REVIEWS_PATH, analytics_for
+
+    if path.startswith(REVIEWS_PATH):
+        analytics_for(headers).apply_write(record, record_id)
@@ -0,0 +1,122 @@
+import os
+import time
+import streamlit as st
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+from metrics import metric_path, record
+from resilience import Resilience
+from state_backend import get_state_backend
+
+
+DEFAULT_TIMEOUT = (3.05, 15)
+
+# (connect, read) em segundos, pelo prefixo do caminho (vale o prefixo mais longo).
+ENDPOINT_TIMEOUTS = {
+    "/auth/": (3.05, 10),
+    "/api/insights/": (3.05, 30),
+    "/api/faturamento_mensal_por_empresa/": (3.05, 30),
+    "/api/produtos_vendidos/": (3.05, 30),
+}
+
+RETRY_STATUS = (502, 503, 504)
+# POST não é idempotente: repetir poderia duplicar registros.
+RETRY_METHODS = frozenset(["GET", "PUT"])
+
+
+def auth_headers(access_token):
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def match_prefix(mapping, path, default=None):
+    matches = [prefix for prefix in mapping if path.startswith(prefix)]
+    if not matches:
+        return default
+    return mapping[max(matches, key=len)]
+
+
+class ApiClient:
+    def __init__(self, base_url, pool_size=10, max_retries=3, backoff_factor=0.3, timeouts=None, default_timeout=DEFAULT_TIMEOUT, resilience=None):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeouts = dict(ENDPOINT_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=RETRY_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        # gzip/deflate sempre; br (e zstd) quando o decodificador estiver instalado.
+        self.session.headers.update(make_headers(keep_alive=True, accept_encoding=True))
+        # Renovação de token (ver auth.AuthManager): recebe o Authorization recusado com 401 e
+        # devolve um novo, ou None. A requisição é repetida uma única vez.
+        self.reauthenticate = None
+        # Authorization vigente da sessão dona de um token (que pode já ter sido renovado), ou None.
+        # Usado por quem guarda os headers para enviar depois (write_queue).
+        self.current_authorization = None
+        # Rate limit, limite de concorrência e circuit breaker (ver resilience.Resilience); None desliga.
+        self.resilience = resilience
+
+    def timeout_for(self, path):
+        return match_prefix(self.timeouts, path, self.default_timeout)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout_for(path))
+        response = self._send(method, path, **kwargs)
+        headers = kwargs.get("headers") or {}
+        if response.status_code == 401 and self.reauthenticate is not None and headers.get("Authorization"):
+            authorization = self.reauthenticate(headers["Authorization"])
+            if authorization:
+                kwargs["headers"] = {**headers, "Authorization": authorization}
+                response = self._send(method, path, **kwargs)
+        return response
+
+    def _send(self, method, path, **kwargs):
+        if self.resilience is None:
+            return self._request(method, path, **kwargs)
+        return self.resilience.call(path, kwargs.get("headers"), lambda: self._request(method, path, **kwargs))
+
+    def _request(self, method, path, **kwargs):
+        start = time.perf_counter()
+        status, size = "error", 0
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            status, size = response.status_code, len(response.content)
+            return response
+        finally:
+            record("http", method=method, path=metric_path(path), status=status, seconds=round(time.perf_counter() - start, 6), bytes=size)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+
+def _env_timeout(default):
+    connect = float(os.getenv("API_CONNECT_TIMEOUT", default[0]))
+    read = float(os.getenv("API_READ_TIMEOUT", default[1]))
+    return (connect, read)
+
+
+@st.cache_resource
+def get_api_client(base_url):
+    return ApiClient(
+        base_url,
+        pool_size=int(os.getenv("API_POOL_SIZE", "10")),
+        max_retries=int(os.getenv("API_MAX_RETRIES", "3")),
+        backoff_factor=float(os.getenv("API_RETRY_BACKOFF", "0.3")),
+        default_timeout=_env_timeout(DEFAULT_TIMEOUT),
+        resilience=Resilience(get_state_backend()) if os.getenv("API_RESILIENCE", "1") == "1" else None,
+    )
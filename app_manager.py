@@ -1,8 +1,15 @@
 import streamlit as st
-import requests
+from api_client import get_api_client
+from entities import limits
+from bulk_edit import bulk_edit_form
+from bulk_import import bulk_import_form
+from indexes import id_picker, reference_checker
+from write_queue import queue_write
 from datetime import date
 
 def manage_companies(API_BASE_URL, headers):
+    client = get_api_client(API_BASE_URL)
+    check = reference_checker(client, headers, "empresas")
     st.subheader("Adicionar Nova Empresa")
     with st.form(key="add_empresa_form"):
         nome_empresa_add = st.text_input("Nome da Empresa")
@@ -11,66 +18,70 @@ def manage_companies(API_BASE_URL, headers):
 
         if submit_add:
             if nome_empresa_add and diretor_empresa_add:
-                add_url = f"{API_BASE_URL}/api/empresas/"
+                add_path = "/api/empresas/"
                 add_data = {
                     "nome_empresa": nome_empresa_add,
                     "diretor_empresa": diretor_empresa_add
                 }
-                try:
-                    response = requests.post(add_url, headers=headers, json=add_data)
-                    if response.status_code == 200:
-                        st.success(f"Empresa '{nome_empresa_add}' adicionada com sucesso!")
-                    else:
-                        st.error(f"Erro ao adicionar empresa: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(add_data)
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "POST", add_path, add_data, f"Empresa '{nome_empresa_add}' adicionada")
             else:
                 st.warning("Por favor, preencha todos os campos.")
 
     st.markdown("---")
     st.subheader("Atualizar Empresa Existente")
+    id_picker(client, headers, "empresas", "id_empresa_update", "empresa")
     with st.form(key="update_empresa_form"):
-        id_empresa_update = st.number_input("ID da Empresa", min_value=1, step=1)
+        id_empresa_update = st.number_input("ID da Empresa", min_value=1, step=1, key="id_empresa_update")
         nome_empresa_update = st.text_input("Novo Nome da Empresa")
         diretor_empresa_update = st.text_input("Novo Nome do Diretor")
         submit_update = st.form_submit_button("Atualizar Empresa")
         
         if submit_update:
             if id_empresa_update and (nome_empresa_update or diretor_empresa_update):
-                update_url = f"{API_BASE_URL}/api/empresas/{id_empresa_update}"
+                update_path = f"/api/empresas/{id_empresa_update}"
                 update_data = {}
                 if nome_empresa_update:
                     update_data["nome_empresa"] = nome_empresa_update
                 if diretor_empresa_update:
                     update_data["diretor_empresa"] = diretor_empresa_update
                 
-                try:
-                    response = requests.put(update_url, headers=headers, json=update_data)
-                    if response.status_code == 200:
-                        st.success(f"Empresa com ID {id_empresa_update} atualizada com sucesso!")
-                    else:
-                        st.error(f"Erro ao atualizar empresa: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(update_data, int(id_empresa_update))
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "PUT", update_path, update_data, f"Empresa com ID {id_empresa_update} atualizada")
             else:
                 st.warning("Por favor, preencha o ID e pelo menos um dos campos para atualizar.")
 
+    st.markdown("---")
+    bulk_edit_form(API_BASE_URL, headers, "empresas")
+
+    st.markdown("---")
+    bulk_import_form(API_BASE_URL, headers, "empresas")
+
 def manage_product_details(API_BASE_URL, headers):
-    add_tab, update_tab = st.tabs(["Adicionar Detalhes", "Atualizar Detalhes"])
+    client = get_api_client(API_BASE_URL)
+    check = reference_checker(client, headers, "detalhes_produtos")
+    add_tab, update_tab, edit_tab, import_tab = st.tabs(["Adicionar Detalhes", "Atualizar Detalhes", "Edição em Lote", "Importar em Lote"])
 
     with add_tab:
         st.subheader("Adicionar Detalhes do Produto")
+        id_picker(client, headers, "empresas", "id_empresa_det_add", "empresa")
         with st.form(key="add_detalhes_form"):
-            id_empresa = st.number_input("ID da Empresa", min_value=1, step=1, key="id_empresa_det_add")
+            id_empresa = st.number_input("ID da Empresa", step=1, key="id_empresa_det_add", **limits("detalhes_produtos", "id_empresa"))
             nome_produto = st.text_input("Nome do Produto", key="nome_produto_det_add")
             categoria = st.text_input("Categoria", key="categoria_det_add")
-            preco_unitario = st.number_input("Preço Unitário", min_value=0.01, key="preco_unitario_det_add")
-            margem_lucro_percentual = st.number_input("Margem de Lucro (%)", min_value=0.0, max_value=100.0, key="margem_lucro_det_add")
+            preco_unitario = st.number_input("Preço Unitário", key="preco_unitario_det_add", **limits("detalhes_produtos", "preco_unitario"))
+            margem_lucro_percentual = st.number_input("Margem de Lucro (%)", key="margem_lucro_det_add", **limits("detalhes_produtos", "margem_lucro_percentual"))
             data_lancamento = st.date_input("Data de Lançamento", date.today(), key="data_lancamento_det_add")
             submit_add = st.form_submit_button("Adicionar Detalhes")
 
             if submit_add:
-                add_url = f"{API_BASE_URL}/api/detalhes_produtos/"
+                add_path = "/api/detalhes_produtos/"
                 add_data = {
                     "id_empresa": int(id_empresa),
                     "nome_produto": nome_produto,
@@ -79,141 +90,151 @@ def manage_product_details(API_BASE_URL, headers):
                     "margem_lucro_percentual": float(margem_lucro_percentual),
                     "data_lancamento": str(data_lancamento)
                 }
-                try:
-                    response = requests.post(add_url, headers=headers, json=add_data)
-                    if response.status_code == 200:
-                        st.success(f"Detalhes do produto '{nome_produto}' adicionados com sucesso!")
-                    else:
-                        st.error(f"Erro ao adicionar detalhes do produto: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(add_data)
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "POST", add_path, add_data, f"Detalhes do produto '{nome_produto}' adicionados")
 
     with update_tab:
         st.subheader("Atualizar Detalhes do Produto")
+        id_picker(client, headers, "detalhes_produtos", "id_produto_det_update", "produto")
         with st.form(key="update_detalhes_form"):
             id_produto_update = st.number_input("ID do Produto", min_value=1, step=1, key="id_produto_det_update")
             nome_produto_update = st.text_input("Novo Nome do Produto", key="nome_produto_det_update")
             categoria_update = st.text_input("Nova Categoria", key="categoria_det_update")
-            preco_unitario_update = st.number_input("Novo Preço Unitário", min_value=0.01, key="preco_unitario_det_update")
-            margem_lucro_update = st.number_input("Nova Margem de Lucro (%)", min_value=0.0, max_value=100.0, key="margem_lucro_det_update")
+            preco_unitario_update = st.number_input("Novo Preço Unitário", value=None, key="preco_unitario_det_update", **limits("detalhes_produtos", "preco_unitario"))
+            margem_lucro_update = st.number_input("Nova Margem de Lucro (%)", value=None, key="margem_lucro_det_update", **limits("detalhes_produtos", "margem_lucro_percentual"))
             submit_update = st.form_submit_button("Atualizar Detalhes")
 
             if submit_update:
-                update_url = f"{API_BASE_URL}/api/detalhes_produtos/{id_produto_update}"
+                update_path = f"/api/detalhes_produtos/{id_produto_update}"
                 update_data = {}
                 if nome_produto_update:
                     update_data["nome_produto"] = nome_produto_update
                 if categoria_update:
                     update_data["categoria"] = categoria_update
-                if preco_unitario_update:
+                if preco_unitario_update is not None:
                     update_data["preco_unitario"] = float(preco_unitario_update)
-                if margem_lucro_update:
+                if margem_lucro_update is not None:
                     update_data["margem_lucro_percentual"] = float(margem_lucro_update)
                 
-                try:
-                    response = requests.put(update_url, headers=headers, json=update_data)
-                    if response.status_code == 200:
-                        st.success(f"Detalhes do produto com ID {id_produto_update} atualizados com sucesso!")
-                    else:
-                        st.error(f"Erro ao atualizar detalhes do produto: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(update_data, int(id_produto_update))
+                if not update_data:
+                    st.warning("Por favor, preencha pelo menos um dos campos para atualizar.")
+                elif errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "PUT", update_path, update_data, f"Detalhes do produto com ID {id_produto_update} atualizados")
+
+    with edit_tab:
+        bulk_edit_form(API_BASE_URL, headers, "detalhes_produtos")
+
+    with import_tab:
+        bulk_import_form(API_BASE_URL, headers, "detalhes_produtos")
 
 def manage_sold_products(API_BASE_URL, headers):
-    add_tab, update_tab = st.tabs(["Adicionar Venda", "Atualizar Venda"])
+    client = get_api_client(API_BASE_URL)
+    check = reference_checker(client, headers, "produtos_vendidos")
+    add_tab, update_tab, edit_tab, import_tab = st.tabs(["Adicionar Venda", "Atualizar Venda", "Edição em Lote", "Importar em Lote"])
 
     with add_tab:
         st.subheader("Adicionar Nova Venda")
+        id_picker(client, headers, "faturamento", "id_faturamento_venda", "faturamento (pela empresa)")
         with st.form(key="add_venda_form"):
-            id_faturamento = st.number_input("ID do Faturamento", min_value=1, step=1, key="id_faturamento_venda")
+            id_faturamento = st.number_input("ID do Faturamento", step=1, key="id_faturamento_venda", **limits("produtos_vendidos", "id_faturamento"))
             nome_produto = st.text_input("Nome do Produto", key="nome_produto_venda_add")
-            produtos_vendidos = st.number_input("Produtos Vendidos", min_value=1, step=1, key="qtd_vendida_add")
+            produtos_vendidos = st.number_input("Produtos Vendidos", step=1, key="qtd_vendida_add", **limits("produtos_vendidos", "produtos_vendidos"))
             submit_add = st.form_submit_button("Adicionar Venda")
 
             if submit_add:
-                add_url = f"{API_BASE_URL}/api/produtos_vendidos/"
+                add_path = "/api/produtos_vendidos/"
                 add_data = {
                     "id_faturamento": int(id_faturamento),
                     "nome_produto": nome_produto,
                     "produtos_vendidos": int(produtos_vendidos)
                 }
-                try:
-                    response = requests.post(add_url, headers=headers, json=add_data)
-                    if response.status_code == 200:
-                        st.success(f"Venda de '{nome_produto}' adicionada com sucesso!")
-                    else:
-                        st.error(f"Erro ao adicionar venda: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(add_data)
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "POST", add_path, add_data, f"Venda de '{nome_produto}' adicionada")
     
     with update_tab:
         st.subheader("Atualizar Venda Existente")
+        id_picker(client, headers, "produtos_vendidos", "id_venda_update", "venda (pelo produto)")
         with st.form(key="update_venda_form"):
             id_venda = st.number_input("ID da Venda", min_value=1, step=1, key="id_venda_update")
-            id_faturamento_update = st.number_input("Novo ID do Faturamento", min_value=1, step=1, key="id_faturamento_venda_update")
+            id_faturamento_update = st.number_input("Novo ID do Faturamento", step=1, value=None, key="id_faturamento_venda_update", **limits("produtos_vendidos", "id_faturamento"))
             nome_produto_update = st.text_input("Novo Nome do Produto", key="nome_produto_venda_update")
-            produtos_vendidos_update = st.number_input("Nova Quantidade Vendida", min_value=1, step=1, key="qtd_vendida_update")
+            produtos_vendidos_update = st.number_input("Nova Quantidade Vendida", step=1, value=None, key="qtd_vendida_update", **limits("produtos_vendidos", "produtos_vendidos"))
             submit_update = st.form_submit_button("Atualizar Venda")
             
             if submit_update:
-                update_url = f"{API_BASE_URL}/api/produtos_vendidos/{id_venda}"
+                update_path = f"/api/produtos_vendidos/{id_venda}"
                 update_data = {}
-                if id_faturamento_update:
+                if id_faturamento_update is not None:
                     update_data["id_faturamento"] = int(id_faturamento_update)
                 if nome_produto_update:
                     update_data["nome_produto"] = nome_produto_update
-                if produtos_vendidos_update:
+                if produtos_vendidos_update is not None:
                     update_data["produtos_vendidos"] = int(produtos_vendidos_update)
                 
-                try:
-                    response = requests.put(update_url, headers=headers, json=update_data)
-                    if response.status_code == 200:
-                        st.success(f"Venda com ID {id_venda} atualizada com sucesso!")
-                    else:
-                        st.error(f"Erro ao atualizar venda: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(update_data, int(id_venda))
+                if not update_data:
+                    st.warning("Por favor, preencha pelo menos um dos campos para atualizar.")
+                elif errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "PUT", update_path, update_data, f"Venda com ID {id_venda} atualizada")
+
+    with edit_tab:
+        bulk_edit_form(API_BASE_URL, headers, "produtos_vendidos")
+
+    with import_tab:
+        bulk_import_form(API_BASE_URL, headers, "produtos_vendidos")
 
 def manage_reviews(API_BASE_URL, headers):
-    add_tab, update_tab = st.tabs(["Adicionar Avaliação", "Atualizar Avaliação"])
+    client = get_api_client(API_BASE_URL)
+    check = reference_checker(client, headers, "avaliacoes")
+    add_tab, update_tab, edit_tab, import_tab = st.tabs(["Adicionar Avaliação", "Atualizar Avaliação", "Edição em Lote", "Importar em Lote"])
 
     with add_tab:
         st.subheader("Adicionar Nova Avaliação")
+        id_picker(client, headers, "empresas", "id_empresa_review", "empresa")
         with st.form(key="add_avaliacao_form"):
-            id_empresa = st.number_input("ID da Empresa", min_value=1, step=1, key="id_empresa_review")
-            nota_diretor = st.slider("Nota do Diretor (0 a 10)", min_value=0, max_value=10, value=5, key="nota_diretor")
-            nota_geral_empresa = st.slider("Nota Geral da Empresa (0 a 10)", min_value=0, max_value=10, value=5, key="nota_geral")
+            id_empresa = st.number_input("ID da Empresa", step=1, key="id_empresa_review", **limits("avaliacoes", "id_empresa"))
+            nota_diretor = st.slider("Nota do Diretor (0 a 10)", value=5, key="nota_diretor", **limits("avaliacoes", "nota_diretor"))
+            nota_geral_empresa = st.slider("Nota Geral da Empresa (0 a 10)", value=5, key="nota_geral", **limits("avaliacoes", "nota_geral_empresa"))
             comentario = st.text_area("Comentário", key="comentario")
             submit_add = st.form_submit_button("Adicionar Avaliação")
 
             if submit_add:
-                add_url = f"{API_BASE_URL}/api/avaliacoes/"
+                add_path = "/api/avaliacoes/"
                 add_data = {
                     "id_empresa": int(id_empresa),
                     "nota_diretor": int(nota_diretor),
                     "nota_geral_empresa": int(nota_geral_empresa),
                     "comentario": comentario
                 }
-                try:
-                    response = requests.post(add_url, headers=headers, json=add_data)
-                    if response.status_code == 200:
-                        st.success(f"Avaliação para a empresa {id_empresa} adicionada com sucesso!")
-                    else:
-                        st.error(f"Erro ao adicionar avaliação: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(add_data)
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "POST", add_path, add_data, f"Avaliação para a empresa {id_empresa} adicionada")
 
     with update_tab:
         st.subheader("Atualizar Avaliação Existente")
+        id_picker(client, headers, "avaliacoes", "id_avaliacao_update", "avaliação (pela empresa)")
         with st.form(key="update_avaliacao_form"):
             id_avaliacao_update = st.number_input("ID da Avaliação", min_value=1, step=1, key="id_avaliacao_update")
-            nota_diretor_update = st.slider("Nova Nota do Diretor", min_value=0, max_value=10, key="nota_diretor_update")
-            nota_geral_update = st.slider("Nova Nota Geral da Empresa", min_value=0, max_value=10, key="nota_geral_update")
+            nota_diretor_update = st.number_input("Nova Nota do Diretor", value=None, step=1, key="nota_diretor_update", **limits("avaliacoes", "nota_diretor"))
+            nota_geral_update = st.number_input("Nova Nota Geral da Empresa", value=None, step=1, key="nota_geral_update", **limits("avaliacoes", "nota_geral_empresa"))
             comentario_update = st.text_area("Novo Comentário", key="comentario_update")
             submit_update = st.form_submit_button("Atualizar Avaliação")
             
             if submit_update:
-                update_url = f"{API_BASE_URL}/api/avaliacoes/{id_avaliacao_update}"
+                update_path = f"/api/avaliacoes/{id_avaliacao_update}"
                 update_data = {}
                 if nota_diretor_update is not None:
                     update_data["nota_diretor"] = int(nota_diretor_update)
@@ -222,65 +243,77 @@ def manage_reviews(API_BASE_URL, headers):
                 if comentario_update:
                     update_data["comentario"] = comentario_update
 
-                try:
-                    response = requests.put(update_url, headers=headers, json=update_data)
-                    if response.status_code == 200:
-                        st.success(f"Avaliação com ID {id_avaliacao_update} atualizada com sucesso!")
-                    else:
-                        st.error(f"Erro ao atualizar avaliação: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(update_data, int(id_avaliacao_update))
+                if not update_data:
+                    st.warning("Por favor, preencha pelo menos um dos campos para atualizar.")
+                elif errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "PUT", update_path, update_data, f"Avaliação com ID {id_avaliacao_update} atualizada")
+
+    with edit_tab:
+        bulk_edit_form(API_BASE_URL, headers, "avaliacoes")
+
+    with import_tab:
+        bulk_import_form(API_BASE_URL, headers, "avaliacoes")
+
 def manage_faturamento(API_BASE_URL, headers):
-    add_tab, update_tab = st.tabs(["Adicionar Faturamento", "Atualizar Faturamento"])
+    client = get_api_client(API_BASE_URL)
+    check = reference_checker(client, headers, "faturamento")
+    add_tab, update_tab, edit_tab, import_tab = st.tabs(["Adicionar Faturamento", "Atualizar Faturamento", "Edição em Lote", "Importar em Lote"])
 
     with add_tab:
         st.subheader("Adicionar Novo Faturamento")
+        id_picker(client, headers, "empresas", "id_empresa_fat_add", "empresa")
         with st.form(key="add_faturamento_form"):
-            id_empresa = st.number_input("ID da Empresa", min_value=1, step=1, key="id_empresa_fat_add")
-            faturamento_mensal = st.number_input("Faturamento Mensal", min_value=0.01, key="faturamento_mensal_add")
-            faturamento_anual = st.number_input("Faturamento Anual", min_value=0.01, key="faturamento_anual_add")
+            id_empresa = st.number_input("ID da Empresa", step=1, key="id_empresa_fat_add", **limits("faturamento", "id_empresa"))
+            faturamento_mensal = st.number_input("Faturamento Mensal", key="faturamento_mensal_add", **limits("faturamento", "faturamento_mensal"))
+            faturamento_anual = st.number_input("Faturamento Anual", key="faturamento_anual_add", **limits("faturamento", "faturamento_anual"))
             submit_add = st.form_submit_button("Adicionar Faturamento")
 
             if submit_add:
-                add_url = f"{API_BASE_URL}/api/faturamento/"
+                add_path = "/api/faturamento/"
                 add_data = {
                     "id_empresa": int(id_empresa),
                     "faturamento_mensal": float(faturamento_mensal),
                     "faturamento_anual": float(faturamento_anual)
                 }
-                try:
-                    response = requests.post(add_url, headers=headers, json=add_data)
-                    if response.status_code == 200:
-                        st.success(f"Faturamento adicionado para a empresa {id_empresa} com sucesso!")
-                    else:
-                        st.error(f"Erro ao adicionar faturamento: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(add_data)
+                if errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "POST", add_path, add_data, f"Faturamento adicionado para a empresa {id_empresa}")
     
     with update_tab:
         st.subheader("Atualizar Faturamento Existente")
+        id_picker(client, headers, "faturamento", "id_faturamento_update", "faturamento (pela empresa)")
         with st.form(key="update_faturamento_form"):
             id_faturamento_update = st.number_input("ID do Faturamento", min_value=1, step=1, key="id_faturamento_update")
-            id_empresa_update = st.number_input("Novo ID da Empresa", min_value=1, step=1, key="id_empresa_fat_update")
-            faturamento_mensal_update = st.number_input("Novo Faturamento Mensal", min_value=0.01, key="faturamento_mensal_update")
-            faturamento_anual_update = st.number_input("Novo Faturamento Anual", min_value=0.01, key="faturamento_anual_update")
+            id_empresa_update = st.number_input("Novo ID da Empresa", step=1, value=None, key="id_empresa_fat_update", **limits("faturamento", "id_empresa"))
+            faturamento_mensal_update = st.number_input("Novo Faturamento Mensal", value=None, key="faturamento_mensal_update", **limits("faturamento", "faturamento_mensal"))
+            faturamento_anual_update = st.number_input("Novo Faturamento Anual", value=None, key="faturamento_anual_update", **limits("faturamento", "faturamento_anual"))
             submit_update = st.form_submit_button("Atualizar Faturamento")
 
             if submit_update:
-                update_url = f"{API_BASE_URL}/api/faturamento/{id_faturamento_update}"
+                update_path = f"/api/faturamento/{id_faturamento_update}"
                 update_data = {}
-                if id_empresa_update:
+                if id_empresa_update is not None:
                     update_data["id_empresa"] = int(id_empresa_update)
-                if faturamento_mensal_update:
+                if faturamento_mensal_update is not None:
                     update_data["faturamento_mensal"] = float(faturamento_mensal_update)
-                if faturamento_anual_update:
+                if faturamento_anual_update is not None:
                     update_data["faturamento_anual"] = float(faturamento_anual_update)
                 
-                try:
-                    response = requests.put(update_url, headers=headers, json=update_data)
-                    if response.status_code == 200:
-                        st.success(f"Faturamento com ID {id_faturamento_update} atualizado com sucesso!")
-                    else:
-                        st.error(f"Erro ao atualizar faturamento: {response.status_code} - {response.text}")
-                except requests.exceptions.ConnectionError:
-                    st.error("Erro de conexão com a API.")
+                errors = check(update_data, int(id_faturamento_update))
+                if not update_data:
+                    st.warning("Por favor, preencha pelo menos um dos campos para atualizar.")
+                elif errors:
+                    st.error("Dados inválidos: " + "; ".join(errors))
+                else:
+                    queue_write(client, headers, "PUT", update_path, update_data, f"Faturamento com ID {id_faturamento_update} atualizado")
+
+    with edit_tab:
+        bulk_edit_form(API_BASE_URL, headers, "faturamento")
+
+    with import_tab:
+        bulk_import_form(API_BASE_URL, headers, "faturamento")
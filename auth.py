@@ -0,0 +1,222 @@
+import base64
+import hashlib
+import json
+import os
+import secrets
+import threading
+import time
+import requests
+import streamlit as st
+from api_client import auth_headers, get_api_client
+from data_fetcher import get_fetch_executor
+from dataset_store import get_dataset_store, user_key
+from state_backend import LockTimeout, MemoryBackend, get_state_backend
+
+
+REFRESH_PATH = os.getenv("AUTH_REFRESH_PATH", "/auth/refresh")
+# Renova o token quando faltar menos que isso para expirar (segundos).
+REFRESH_MARGIN = float(os.getenv("AUTH_REFRESH_MARGIN", "120"))
+# Sessões sem uso por mais tempo que isso são descartadas.
+SESSION_IDLE_TTL = float(os.getenv("AUTH_SESSION_IDLE_TTL", 12 * 3600))
+# Cookie com o handle da sessão. Fica fora da URL, que vaza em histórico, logs de proxy, Referer e links compartilhados.
+SESSION_COOKIE = "dashboard_sid"
+# O TTL da sessão no backend é renovado no uso, no máximo uma vez a cada SESSION_TOUCH segundos.
+SESSION_TOUCH = 60
+
+
+def token_expiry(token):
+    # Lê o claim exp do JWT sem validar a assinatura: quem valida o token é a API.
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _token_hash(authorization):
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+class AuthSession:
+    def __init__(self, email, access_token, refresh_token, handle=None):
+        self.handle = handle or secrets.token_urlsafe(16)
+        self.email = email
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = token_expiry(access_token)
+        self.last_seen = time.monotonic()
+        self.saved_at = float("-inf")
+        self.pending = None
+        self.lock = threading.Lock()
+
+    def record(self):
+        return json.dumps({"email": self.email, "access_token": self.access_token, "refresh_token": self.refresh_token}).encode()
+
+    @property
+    def headers(self):
+        return auth_headers(self.access_token)
+
+    def expires_in(self):
+        return None if self.expires_at is None else self.expires_at - time.time()
+
+
+class AuthManager:
+    # Sessões de login. O navegador só guarda o handle opaco (cookie SESSION_COOKIE), nunca os tokens.
+    # Os tokens ficam no StateBackend: com backend compartilhado, qualquer réplica retoma a
+    # sessão e a renovação (refresh token de uso único) acontece em uma réplica por vez.
+    def __init__(self, client, store, executor, backend=None, refresh_path=REFRESH_PATH, margin=REFRESH_MARGIN, idle_ttl=SESSION_IDLE_TTL):
+        self.client = client
+        self.store = store
+        self.executor = executor
+        self.backend = backend or MemoryBackend()
+        self.refresh_path = refresh_path
+        self.margin = margin
+        self.idle_ttl = idle_ttl
+        self.sessions = {}
+        # hash do Authorization -> sessão, inclusive tokens já renovados (ainda em uso por requisições em curso).
+        self.by_token = {}
+        self.lock = threading.Lock()
+        client.reauthenticate = self.reauthenticate
+        client.current_authorization = self.current_authorization
+
+    def login(self, email, password):
+        # Devolve (sessão, resposta); a sessão é None se a API recusar as credenciais.
+        response = self.client.post("/auth/token", data={"username": email, "password": password})
+        if response.status_code != 200:
+            return None, response
+        tokens = response.json()
+        session = AuthSession(email, tokens["access_token"], tokens.get("refresh_token", ""))
+        self.store.verify(user_key(session.headers))
+        self._save(session)
+        self._register(session)
+        return session, response
+
+    def resume(self, handle):
+        if not handle:
+            return None
+        stored = self.backend.get("auth", handle)
+        session = self.sessions.get(handle)
+        if stored is None:
+            # Expirou ou saiu em outra réplica.
+            if session is not None:
+                self._forget(session)
+            return None
+        if session is None:
+            record = json.loads(stored)
+            session = AuthSession(record["email"], record["access_token"], record["refresh_token"], handle=handle)
+            self._register(session)
+        else:
+            self._sync(session, stored)
+            # O logout de outra sessão do mesmo login desfaz os aliases do escopo.
+            self.store.identify(user_key(session.headers), session.email)
+        session.last_seen = time.monotonic()
+        if session.last_seen - session.saved_at > SESSION_TOUCH:
+            self._save(session)
+        return session
+
+    def logout(self, session):
+        self.backend.delete("auth", session.handle)
+        self._forget(session)
+        return user_key(session.headers)
+
+    def _save(self, session):
+        self.backend.set("auth", session.handle, session.record(), ttl=self.idle_ttl)
+        session.saved_at = time.monotonic()
+
+    def _register(self, session):
+        self.store.identify(user_key(session.headers), session.email)
+        with self.lock:
+            self._prune()
+            self.sessions[session.handle] = session
+            self.by_token[_token_hash(session.headers["Authorization"])] = session
+
+    def _forget(self, session):
+        with self.lock:
+            self.sessions.pop(session.handle, None)
+            for token in [t for t, owner in self.by_token.items() if owner is session]:
+                del self.by_token[token]
+
+    def _sync(self, session, stored=None):
+        # Adota os tokens que outra réplica renovou. Devolve True se mudaram.
+        stored = stored if stored is not None else self.backend.get("auth", session.handle)
+        if stored is None:
+            return False
+        record = json.loads(stored)
+        if record["access_token"] == session.access_token:
+            return False
+        self._adopt(session, record["access_token"], record["refresh_token"])
+        return True
+
+    def _adopt(self, session, access_token, refresh_token):
+        old_user = user_key(session.headers)
+        session.access_token = access_token
+        session.refresh_token = refresh_token
+        session.expires_at = token_expiry(access_token)
+        self.store.rekey_user(old_user, user_key(session.headers))
+        with self.lock:
+            self.by_token[_token_hash(session.headers["Authorization"])] = session
+
+    def refresh(self, session, stale_authorization=None):
+        try:
+            with session.lock, self.backend.lock("auth_refresh", session.handle):
+                return self._refresh(session, stale_authorization)
+        except LockTimeout:
+            # Outra réplica segura a renovação há tempo demais: vale o que ela já tiver gravado.
+            return self._sync(session)
+
+    def _refresh(self, session, stale_authorization):
+        if self._sync(session):
+            # Outra réplica renovou enquanto esta esperava.
+            return True
+        if stale_authorization is not None and stale_authorization != session.headers["Authorization"]:
+            # Outra thread já renovou enquanto esta esperava.
+            return True
+        if not session.refresh_token:
+            return False
+        try:
+            response = self.client.post(self.refresh_path, json={"refresh_token": session.refresh_token})
+        except requests.exceptions.RequestException:
+            return False
+        if response.status_code != 200:
+            return False
+        tokens = response.json()
+        self._adopt(session, tokens["access_token"], tokens.get("refresh_token", session.refresh_token))
+        self._save(session)
+        return True
+
+    def ensure_fresh(self, session):
+        # No início de cada execução do script: token vencido é renovado agora; perto de
+        # vencer, em segundo plano, para a próxima interação já encontrar o token novo.
+        # Devolve False se a sessão não puder mais ser usada.
+        remaining = session.expires_in()
+        if remaining is None or remaining > self.margin:
+            return True
+        if remaining <= 0:
+            return self.refresh(session)
+        if session.pending is None or session.pending.done():
+            session.pending = self.executor.submit(self.refresh, session)
+        return True
+
+    def reauthenticate(self, authorization):
+        # Gancho do ApiClient para respostas 401: renova a sessão dona do token, uma vez.
+        session = self.by_token.get(_token_hash(authorization))
+        if session is None or not self.refresh(session, stale_authorization=authorization):
+            return None
+        return session.headers["Authorization"]
+
+    def current_authorization(self, authorization):
+        session = self.by_token.get(_token_hash(authorization))
+        return None if session is None else session.headers["Authorization"]
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        for session in [s for s in self.sessions.values() if s.last_seen < cutoff]:
+            del self.sessions[session.handle]
+            for token in [t for t, owner in self.by_token.items() if owner is session]:
+                del self.by_token[token]
+
+
+@st.cache_resource
+def get_auth_manager(base_url):
+    return AuthManager(get_api_client(base_url), get_dataset_store(), get_fetch_executor(), get_state_backend())
@@ -0,0 +1,101 @@
+# Medição de cold start: cada repetição roda em um processo Python novo, como um container
+# recém-criado, e mede a primeira renderização da tela de login e das primeiras seções.
+#
+#   python benchmarks/cold_start.py                # 3 repetições, mediana
+#   python benchmarks/cold_start.py --repeat 5 --max-login-seconds 1.5
+#
+# Falha (código 1) se a tela de login importar algum módulo pesado (HEAVY_MODULES) ou se
+# passar de --max-login-seconds.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_api import MockApi
+
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "altair"]
+
+# Executado no processo filho; imprime uma linha JSON com os tempos de cada etapa.
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+heavy = {heavy!r}
+loaded = lambda: [name for name in heavy if name in sys.modules]
+timings = {{"import_streamlit": time.perf_counter() - start}}
+
+at = AppTest.from_file({main!r}, default_timeout=120)
+mark = time.perf_counter()
+at.run()
+timings["login_page"] = time.perf_counter() - mark
+timings["login_page_modules"] = loaded()
+
+next(w for w in at.text_input if w.label == "E-mail").input("bench@example.com")
+next(w for w in at.text_input if w.label == "Senha").input("senha")
+next(b for b in at.button if b.label == "Entrar").click()
+mark = time.perf_counter()
+at.run()
+timings["first_view"] = time.perf_counter() - mark
+timings["first_view_modules"] = loaded()
+
+at.radio(key="section").set_value("Insights")
+mark = time.perf_counter()
+at.run()
+timings["insights"] = time.perf_counter() - mark
+timings["insights_modules"] = loaded()
+timings["errors"] = [str(e.value) for e in at.exception]
+print(json.dumps(timings))
+"""
+
+
+def measure(base_url):
+    # Sem cache em disco de execuções anteriores: o container recém-criado começa vazio.
+    env = dict(os.environ, API_BASE_URL=base_url, DATASET_DISK_CACHE_DIR=tempfile.mkdtemp(prefix="cold-start-"))
+    code = CHILD.format(heavy=HEAVY_MODULES, main=str(ROOT / "main.py"))
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start do dashboard em processos novos.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-login-seconds", type=float)
+    args = parser.parse_args()
+
+    api = MockApi(rows=1_000).start()
+    try:
+        runs = [measure(api.base_url) for _ in range(args.repeat)]
+    finally:
+        api.stop()
+
+    failures = [error for run in runs for error in run["errors"]]
+    for step in ("import_streamlit", "login_page", "first_view", "insights"):
+        values = [run[step] for run in runs]
+        print(f"{step:<18} mediana {statistics.median(values) * 1000:8.1f} ms   (min {min(values) * 1000:.1f}, máx {max(values) * 1000:.1f})")
+    last = runs[-1]
+    for step in ("login_page", "first_view", "insights"):
+        print(f"{step:<18} módulos pesados: {', '.join(last[f'{step}_modules']) or '-'}")
+
+    if last["login_page_modules"]:
+        failures.append(f"a tela de login importou {', '.join(last['login_page_modules'])}")
+    login = statistics.median(run["login_page"] for run in runs)
+    if args.max_login_seconds is not None and login > args.max_login_seconds:
+        failures.append(f"tela de login em {login:.3f}s (limite {args.max_login_seconds}s)")
+    if failures:
+        print("\nFalhas:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
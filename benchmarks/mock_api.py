@@ -0,0 +1,304 @@
+# API fictícia para os benchmarks: serve todos os endpoints usados pelo dashboard com
+# dados sintéticos de tamanho configurável e latência/jitter simulados.
+import hashlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+
+CATEGORIAS = ["Eletrônicos", "Alimentos", "Vestuário", "Casa", "Esportes", "Livros", "Beleza", "Brinquedos"]
+PALAVRAS = ["bom", "ótimo", "ruim", "atendimento", "entrega", "produto", "preço", "qualidade", "demorado", "recomendo"]
+
+
+def _dates(rng, n, start="2020-01-01", days=5 * 365):
+    return (pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), unit="D")).strftime("%Y-%m-%d")
+
+
+def generate_datasets(rows, seed=42):
+    # Tabelas brutas com `rows` linhas cada; empresas e produtos crescem na proporção.
+    rng = np.random.default_rng(seed)
+    n_empresas = max(10, rows // 100)
+    n_diretores = max(5, n_empresas // 2)
+    n_produtos = max(20, rows // 50)
+    produtos = np.array([f"Produto {i}" for i in range(1, n_produtos + 1)], dtype=object)
+
+    empresas = pd.DataFrame({
+        "id_empresa": np.arange(1, n_empresas + 1),
+        "nome_empresa": [f"Empresa {i}" for i in range(1, n_empresas + 1)],
+        "diretor_empresa": [f"Diretor {i % n_diretores + 1}" for i in range(n_empresas)],
+    })
+    mensal = rng.uniform(1_000, 500_000, rows).round(2)
+    faturamento = pd.DataFrame({
+        "id_faturamento": np.arange(1, rows + 1),
+        "id_empresa": rng.integers(1, n_empresas + 1, rows),
+        "faturamento_mensal": mensal,
+        "faturamento_anual": (mensal * 12).round(2),
+    })
+    vendas = pd.DataFrame({
+        "id_venda": np.arange(1, rows + 1),
+        "id_faturamento": rng.integers(1, rows + 1, rows),
+        "nome_produto": produtos[rng.integers(0, n_produtos, rows)],
+        "produtos_vendidos": rng.integers(1, 100, rows),
+    })
+    detalhes = pd.DataFrame({
+        "id_produto": np.arange(1, rows + 1),
+        "id_empresa": rng.integers(1, n_empresas + 1, rows),
+        "nome_produto": produtos[rng.integers(0, n_produtos, rows)],
+        "categoria": np.array(CATEGORIAS, dtype=object)[rng.integers(0, len(CATEGORIAS), rows)],
+        "preco_unitario": rng.uniform(1, 5_000, rows).round(2),
+        "margem_lucro_percentual": rng.uniform(0, 100, rows).round(1),
+        "data_lancamento": _dates(rng, rows),
+    })
+    palavras = np.array(PALAVRAS, dtype=object)
+    avaliacoes = pd.DataFrame({
+        "id_avaliacao": np.arange(1, rows + 1),
+        "id_empresa": rng.integers(1, n_empresas + 1, rows),
+        "nota_diretor": rng.integers(0, 11, rows),
+        "nota_geral_empresa": rng.integers(0, 11, rows),
+        "comentario": palavras[rng.integers(0, len(palavras), rows)] + " " + palavras[rng.integers(0, len(palavras), rows)],
+    })
+
+    # Endpoints agregados, calculados como o backend faria.
+    nomes = empresas.set_index("id_empresa")["nome_empresa"]
+    diretores = empresas.set_index("id_empresa")["diretor_empresa"]
+    insights = pd.DataFrame({
+        "faturamento_total_anual": faturamento.groupby("id_empresa")["faturamento_anual"].sum(),
+        "media_nota_empresa": avaliacoes.groupby("id_empresa")["nota_geral_empresa"].mean().round(2),
+    }).join(nomes, how="inner").reset_index(drop=True)[["nome_empresa", "faturamento_total_anual", "media_nota_empresa"]]
+    media_diretor = avaliacoes.assign(diretor_empresa=avaliacoes["id_empresa"].map(diretores)).groupby("diretor_empresa")["nota_diretor"].mean().round(2)
+    vendas_empresa = vendas.assign(id_empresa=vendas["id_faturamento"].map(faturamento.set_index("id_faturamento")["id_empresa"]))
+    precos = detalhes.groupby(["id_empresa", "nome_produto"])["preco_unitario"].last()
+    lucro = (vendas_empresa.groupby(["id_empresa", "nome_produto"])["produtos_vendidos"].sum() * precos).dropna().nlargest(5)
+    mensal_empresa = faturamento.groupby("id_empresa")["faturamento_mensal"].sum()
+
+    return {
+        "/api/empresas/": empresas,
+        "/api/faturamento/": faturamento,
+        "/api/produtos_vendidos/": vendas,
+        "/api/detalhes_produtos/": detalhes,
+        "/api/avaliacoes/": avaliacoes,
+        "/api/insights/": insights,
+        "/api/media_notas_diretor/": pd.DataFrame({"diretor_empresa": media_diretor.index, "media_nota": media_diretor.values}),
+        "/api/insights/maior_lucro/": pd.DataFrame({
+            "nome_produto": lucro.index.get_level_values(1),
+            "nome_empresa": nomes.reindex(lucro.index.get_level_values(0)).values,
+            "faturamento_total": lucro.values.round(2),
+        }),
+        "/api/faturamento_mensal_por_empresa/": pd.DataFrame({
+            "nome_empresa": nomes.reindex(mensal_empresa.index).values,
+            "faturamento_mensal": mensal_empresa.values.round(2),
+        }),
+    }
+
+
+class MockApi:
+    # paging="none": listas inteiras (como a API atual); "server": honra limit/offset/order_by/q
+    # e responde {"items", "total"}. Listas inteiras honram since_id (delta por id) e, com
+    # events=True, GET /api/events é um stream SSE com as linhas incluídas por append().
+    def __init__(self, rows=1_000, latency=0.0, jitter=0.0, paging="none", seed=42, events=False):
+        self.datasets = generate_datasets(rows, seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.paging = paging
+        self.events = events
+        self.random = random.Random(seed)
+        self.bodies = {}
+        self.etags = {}
+        for path in self.datasets:
+            self._serialize(path)
+        self.subscribers = []
+        self.stopping = threading.Event()
+        self.requests = 0
+        self.bytes_sent = 0
+        self.inflight = 0
+        self.log = []
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self, port=0):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                with api.lock:
+                    api.inflight += 1
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    body = self.rfile.read(length) if length else b""
+                    api.sleep()
+                    status, payload = api.respond(method, self.path, body)
+                    etag = api.etag_for(method, self.path) if status == 200 else None
+                    if etag is not None and self.headers.get("If-None-Match") == etag:
+                        status, payload = 304, b""
+                    self.send_response(status)
+                    if etag is not None:
+                        self.send_header("ETag", etag)
+                    if status != 304:
+                        self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    with api.lock:
+                        api.requests += 1
+                        api.bytes_sent += len(payload)
+                        api.log.append((method, self.path, status, len(payload)))
+                finally:
+                    with api.lock:
+                        api.inflight -= 1
+
+            def _stream(self):
+                events = api.subscribe()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.close_connection = True
+                try:
+                    while not api.stopping.is_set():
+                        try:
+                            event = events.get(timeout=0.2)
+                        except queue.Empty:
+                            continue
+                        chunk = b"data: " + event + b"\n\n"
+                        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                        self.wfile.flush()
+                except OSError:
+                    pass
+                finally:
+                    api.unsubscribe(events)
+
+            def do_GET(self):
+                if api.events and urlparse(self.path).path == "/api/events":
+                    self._stream()
+                else:
+                    self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PUT(self):
+                self._handle("PUT")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.stopping.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def _serialize(self, path):
+        # Listas inteiras são serializadas uma vez só (e de novo a cada append).
+        self.bodies[path] = self.datasets[path].to_json(orient="records", force_ascii=False).encode()
+        self.etags[path] = '"' + hashlib.sha1(self.bodies[path]).hexdigest() + '"'
+
+    def append(self, path, rows):
+        # Inclui linhas (lista de dicts) como se outro usuário tivesse cadastrado; avisa o stream SSE.
+        new = pd.DataFrame(rows, columns=self.datasets[path].columns)
+        with self.lock:
+            self.datasets[path] = pd.concat([self.datasets[path], new], ignore_index=True)
+            self._serialize(path)
+            subscribers = list(self.subscribers)
+        event = json.dumps({"path": path, "rows": json.loads(new.to_json(orient="records", force_ascii=False))}).encode()
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def subscribe(self):
+        events = queue.Queue()
+        with self.lock:
+            self.subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events):
+        with self.lock:
+            self.subscribers.remove(events)
+
+    def sleep(self):
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def stats(self):
+        with self.lock:
+            return {"requests": self.requests, "bytes": self.bytes_sent}
+
+    def wait_idle(self, quiet=0.05, timeout=30):
+        # Espera os prefetches em segundo plano terminarem antes de fechar a medição.
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self.lock:
+                idle = self.inflight == 0
+            if idle:
+                time.sleep(quiet)
+                with self.lock:
+                    if self.inflight == 0:
+                        return
+            else:
+                time.sleep(0.01)
+
+    def etag_for(self, method, raw_path):
+        # Só as listas inteiras têm ETag (revalidação condicional do cache em disco).
+        url = urlparse(raw_path)
+        if method != "GET" or url.path not in self.etags or url.query:
+            return None
+        return self.etags[url.path]
+
+    def respond(self, method, raw_path, body):
+        url = urlparse(raw_path)
+        path = url.path
+        if path.startswith("/auth/"):
+            return 200, json.dumps({"access_token": "benchmark-token", "refresh_token": "benchmark-refresh", "token_type": "bearer"}).encode()
+        if method in ("POST", "PUT"):
+            match = re.search(r"/(\d+)$", path)
+            return 200, json.dumps({"id": int(match.group(1)) if match else 0, "ok": True}).encode()
+        record = re.fullmatch(r"(/api/.+/)(\d+)", path)
+        if method == "GET" and record and record.group(1) in self.datasets:
+            # Registro pelo id: {path}{id}.
+            df = self.datasets[record.group(1)]
+            row = df[df[df.columns[0]] == int(record.group(2))]
+            if row.empty:
+                return 404, b'{"detail": "Not Found"}'
+            return 200, row.iloc[0].to_json(force_ascii=False).encode()
+        if path not in self.datasets:
+            return 404, b'{"detail": "Not Found"}'
+
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        df = self.datasets[path]
+        if "since_id" in params:
+            id_field = df.columns[0]
+            return 200, df[df[id_field] > int(params["since_id"])].to_json(orient="records", force_ascii=False).encode()
+        if self.paging != "server" or "limit" not in params:
+            return 200, self.bodies[path]
+        if params.get("q"):
+            text = params["q"].lower()
+            mask = np.zeros(len(df), dtype=bool)
+            for column in df.columns:
+                mask |= df[column].astype(str).str.lower().str.contains(text, regex=False).to_numpy()
+            df = df[mask]
+        if params.get("order_by"):
+            column = params["order_by"].lstrip("-")
+            if column in df.columns:
+                df = df.sort_values(column, ascending=not params["order_by"].startswith("-"), kind="stable")
+        offset, limit = int(params.get("offset", 0)), int(params["limit"])
+        items = df.iloc[offset:offset + limit].to_json(orient="records", force_ascii=False)
+        return 200, b'{"items": ' + items.encode() + b', "total": ' + str(len(df)).encode() + b"}"
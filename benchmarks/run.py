@@ -0,0 +1,176 @@
+# Benchmarks do caminho de renderização do dashboard, sem o backend real.
+#
+#   python benchmarks/run.py                      # cenários padrão, compara com baselines.json
+#   python benchmarks/run.py --scenario large     # 1M linhas por tabela
+#   python benchmarks/run.py --update-baselines   # grava os resultados como nova referência
+#
+# Cada cenário sobe a API fictícia (mock_api.py), executa main.py com o AppTest do Streamlit
+# e mede, por etapa: tempo de parede da execução, chamadas à API, bytes transferidos e pico de
+# memória adicional (tracemalloc). Sai com código 1 se alguma métrica piorar além da tolerância.
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+from mock_api import MockApi
+
+
+BASELINES = Path(__file__).resolve().parent / "baselines.json"
+
+SCENARIOS = {
+    "small": {"rows": 1_000, "latency": 0.0, "jitter": 0.0, "paging": "none"},
+    "medium": {"rows": 100_000, "latency": 0.02, "jitter": 0.01, "paging": "none"},
+    "paged": {"rows": 100_000, "latency": 0.02, "jitter": 0.01, "paging": "server"},
+    "large": {"rows": 1_000_000, "latency": 0.05, "jitter": 0.02, "paging": "none"},
+}
+DEFAULT_SCENARIOS = ["small", "medium", "paged"]
+
+# Piora aceita: relativa (fração do baseline) + folga absoluta, para não falhar por ruído.
+TOLERANCES = {
+    "seconds": (0.5, 0.05),
+    "requests": (0.0, 0),
+    "bytes": (0.1, 1024),
+    "peak_mb": (0.5, 5.0),
+}
+
+
+def _login(at):
+    next(w for w in at.text_input if w.label == "E-mail").input("bench@example.com")
+    next(w for w in at.text_input if w.label == "Senha").input("senha")
+    next(b for b in at.button if b.label == "Entrar").click()
+    at.run()
+
+
+def _section(name):
+    def step(at):
+        at.radio(key="section").set_value(name)
+        at.run()
+    return step
+
+
+def _rerun(at):
+    at.run()
+
+
+def _local_insights(at):
+    at.checkbox(key="local_insights").check()
+    at.radio(key="section").set_value("Insights")
+    at.run()
+
+
+STEPS = [
+    ("login", _login),
+    ("listar", _section("Listar")),
+    ("faturamento", _section("Faturamento")),
+    ("produtos_vendidos", _section("Prod. Vendidos")),
+    ("detalhes_produtos", _section("Detalhes Prod.")),
+    ("avaliacoes", _section("Avaliações")),
+    ("insights", _section("Insights")),
+    ("insights_rerun", _rerun),
+    ("insights_local", _local_insights),
+    ("gerenciar", _section("Gerenciar")),
+]
+
+
+def run_scenario(name, config, timeout):
+    print(f"[{name}] gerando {config['rows']:,} linhas por tabela...", flush=True)
+    api = MockApi(rows=config["rows"], latency=config["latency"], jitter=config["jitter"], paging=config["paging"]).start()
+    os.environ["API_BASE_URL"] = api.base_url
+    # Cache em disco vazio a cada cenário: mede a primeira visita, não a de uma execução anterior.
+    os.environ["DATASET_DISK_CACHE_DIR"] = tempfile.mkdtemp(prefix=f"bench-{name}-")
+    # Recursos de processo (store, pools, motor de insights) não podem vazar entre cenários.
+    st.cache_resource.clear()
+    st.cache_data.clear()
+    results = {}
+    try:
+        at = AppTest.from_file(str(ROOT / "main.py"), default_timeout=timeout)
+        at.run()
+        for step_name, step in STEPS:
+            before = api.stats()
+            tracemalloc.reset_peak()
+            baseline_memory = tracemalloc.get_traced_memory()[0]
+            start = time.perf_counter()
+            step(at)
+            seconds = time.perf_counter() - start
+            # Pico acima do que já estava alocado no início da etapa.
+            peak = tracemalloc.get_traced_memory()[1] - baseline_memory
+            api.wait_idle()
+            after = api.stats()
+            if at.exception:
+                raise RuntimeError(f"{name}/{step_name}: {at.exception[0].value}")
+            results[step_name] = {
+                "seconds": round(seconds, 4),
+                "requests": after["requests"] - before["requests"],
+                "bytes": after["bytes"] - before["bytes"],
+                "peak_mb": round(peak / 1024 / 1024, 2),
+            }
+            print(f"  {step_name:<18} {seconds * 1000:9.1f} ms {results[step_name]['requests']:4d} req "
+                  f"{results[step_name]['bytes'] / 1024:10.1f} KB {results[step_name]['peak_mb']:8.1f} MB", flush=True)
+    finally:
+        api.stop()
+    return results
+
+
+def compare(results, baselines):
+    regressions = []
+    for scenario, steps in results.items():
+        for step, metrics in steps.items():
+            base = baselines.get(scenario, {}).get(step)
+            if base is None:
+                continue
+            for metric, value in metrics.items():
+                relative, absolute = TOLERANCES[metric]
+                limit = base[metric] * (1 + relative) + absolute
+                if value > limit:
+                    regressions.append(f"{scenario}/{step}: {metric} {value} > {limit:.4g} (baseline {base[metric]})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do dashboard com API fictícia.")
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS), help="pode repetir; padrão: " + ", ".join(DEFAULT_SCENARIOS))
+    parser.add_argument("--rows", type=int, help="sobrescreve o número de linhas dos cenários")
+    parser.add_argument("--baselines", type=Path, default=BASELINES)
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--output", type=Path, help="grava os resultados em JSON")
+    parser.add_argument("--timeout", type=float, default=600)
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    results = {}
+    for name in args.scenario or DEFAULT_SCENARIOS:
+        config = dict(SCENARIOS[name], **({"rows": args.rows} if args.rows else {}))
+        results[name] = run_scenario(name, config, args.timeout)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    baselines = json.loads(args.baselines.read_text()) if args.baselines.exists() else {}
+    if args.update_baselines:
+        baselines.update(results)
+        args.baselines.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines atualizados em {args.baselines}")
+        return 0
+
+    regressions = compare(results, baselines)
+    if regressions:
+        print("\nRegressões:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nSem regressões." if baselines else "\nSem baselines para comparar (use --update-baselines).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
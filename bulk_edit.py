@@ -0,0 +1,155 @@
+import os
+import pandas as pd
+import requests
+import streamlit as st
+from aggregations import apply_local_write, engine_for
+from api_client import get_api_client
+from bulk_import import error_text, get_write_executor, submit_batch, submit_one
+from data_fetcher import fetch_cached
+from dataset_store import get_dataset_store
+from entities import ENTITIES, parse_field, validate_record
+from indexes import reference_checker
+from metrics import bind_trace
+
+
+PAGE_SIZE = int(os.getenv("BULK_EDIT_PAGE_SIZE", "100"))
+
+
+def diff_rows(entity, original, edited, check=None):
+    # Compara o editor com o dataset em cache: {id: {campo: valor}} só com os campos que
+    # mudaram, mais as linhas novas. Linhas sem alteração não geram requisição.
+    fields = {field.name: field for field in entity.fields if field.name in original.columns}
+    columns = list(fields)
+    before = original.set_index(entity.id_field)[columns]
+    existing = edited[edited[entity.id_field].notna()]
+    after = existing.set_index(entity.id_field)[columns].reindex(before.index)
+
+    changed = pd.DataFrame(False, index=before.index, columns=columns)
+    for column in columns:
+        old, new = before[column].astype(object), after[column].astype(object)
+        changed[column] = ~((old == new) | (old.isna() & new.isna()))
+
+    updates, errors = {}, {}
+    for record_id, row in changed[changed.any(axis=1)].iterrows():
+        payload, problems = {}, []
+        for column in row.index[row]:
+            try:
+                payload[column] = parse_field(fields[column], after.at[record_id, column])
+            except ValueError as exc:
+                problems.append(f"{column}: {exc}")
+        if not problems and check is not None:
+            problems = check(payload)
+        if problems:
+            errors[f"ID {record_id}"] = "; ".join(problems)
+        else:
+            updates[int(record_id)] = payload
+
+    inserts = []
+    for position, (_, row) in enumerate(edited[edited[entity.id_field].isna()].iterrows(), start=1):
+        payload, problems = validate_record(entity, row.to_dict())
+        if not problems and check is not None:
+            problems = check(payload)
+        if problems:
+            errors[f"Nova linha {position}"] = "; ".join(problems)
+        else:
+            inserts.append(payload)
+    return updates, inserts, errors
+
+
+def _put(client, path, headers, payload):
+    try:
+        response = client.put(path, headers=headers, json=payload)
+    except requests.exceptions.RequestException as exc:
+        return None, f"Erro de conexão com a API: {exc.__class__.__name__}"
+    return response, None if response.status_code == 200 else error_text(response)
+
+
+def submit_changes(client, entity, headers, updates, inserts):
+    # PUTs (só os campos alterados) em paralelo no pool de escrita; inserções pelo endpoint
+    # de lote quando a API tiver, senão também em paralelo. Retorna {rótulo: erro}.
+    executor = get_write_executor()
+    failures = {}
+
+    paths = {record_id: f"{entity.path}{record_id}" for record_id in updates}
+    futures = {record_id: executor.submit(bind_trace(_put), client, paths[record_id], headers, payload) for record_id, payload in updates.items()}
+    for record_id, future in futures.items():
+        response, error = future.result()
+        if error:
+            failures[f"ID {record_id}"] = error
+        else:
+            apply_local_write(headers, paths[record_id], updates[record_id], response)
+
+    if inserts:
+        results = submit_batch(client, entity.path, headers, inserts)
+        if results is None:
+            results = list(executor.map(bind_trace(lambda payload: submit_one(client, entity.path, headers, payload)), inserts))
+        for position, error in enumerate(results, start=1):
+            if error:
+                failures[f"Nova linha {position}"] = error
+        if any(error is None for error in results):
+            engine_for(headers).invalidate()
+
+    if len(failures) < len(updates) + len(inserts):
+        get_dataset_store().invalidate_for_write(entity.path)
+    return failures
+
+
+def _pending(state):
+    # Estado do st.data_editor: há alterações ainda não salvas?
+    return bool(state) and any(state.get(name) for name in ("edited_rows", "added_rows", "deleted_rows"))
+
+
+def bulk_edit_form(API_BASE_URL, headers, entity_key):
+    client = get_api_client(API_BASE_URL)
+    entity = ENTITIES[entity_key]
+    st.subheader(f"Edição em Lote ({entity.label})")
+    st.caption("Edite as células ou adicione linhas no fim da tabela; ao salvar, só os campos alterados são enviados.")
+
+    result = fetch_cached(client, entity.path, headers)
+    if not result.ok:
+        st.error(f"Erro ao carregar {entity.label}: {result.error}")
+        return
+
+    # O editor mostra uma página por vez: o diff e o payload do widget ficam do tamanho da página.
+    last_page = max(1, -(-len(result.data) // PAGE_SIZE))
+    page = st.number_input(f"Página (de {last_page})", min_value=1, max_value=last_page, value=1, step=1, key=f"bulk_edit_{entity_key}_page")
+    # A geração só muda depois de salvar: recargas e atualizações automáticas mantêm a mesma chave.
+    generation = st.session_state.setdefault(f"bulk_edit_{entity_key}_generation", 0)
+    editor_key = f"bulk_edit_{entity_key}_{generation}_{page}"
+
+    # Com alterações pendentes o editor continua sobre a página como ela estava quando a edição
+    # começou; sem elas, acompanha o dataset em cache.
+    snapshots = st.session_state.setdefault(f"bulk_edit_{entity_key}_snapshots", {})
+    for other in [p for p in snapshots if p != page and not _pending(st.session_state.get(f"bulk_edit_{entity_key}_{generation}_{p}"))]:
+        del snapshots[other]
+    if page not in snapshots or not _pending(st.session_state.get(editor_key)):
+        columns = [entity.id_field] + [field.name for field in entity.fields if field.name in result.data.columns]
+        rows = result.data.iloc[(page - 1) * PAGE_SIZE:page * PAGE_SIZE][columns]
+        # Categorias viram texto no editor para permitir valores novos.
+        snapshots[page] = rows.astype({column: "string" for column in columns if isinstance(rows[column].dtype, pd.CategoricalDtype)})
+    original = snapshots[page]
+
+    edited = st.data_editor(original, key=editor_key, num_rows="add", disabled=[entity.id_field], hide_index=True, use_container_width=True)
+    if not _pending(st.session_state.get(editor_key)):
+        st.caption("Nenhuma alteração nesta página.")
+        return
+
+    updates, inserts, errors = diff_rows(entity, original, edited, reference_checker(client, headers, entity_key))
+    changed_fields = sum(len(payload) for payload in updates.values())
+    st.caption(f"{len(updates)} linhas alteradas ({changed_fields} campos) · {len(inserts)} linhas novas")
+    if errors:
+        st.warning("Corrija os valores abaixo antes de salvar.")
+        st.dataframe(pd.DataFrame(list(errors.items()), columns=["linha", "erro"]), hide_index=True, use_container_width=True)
+
+    if st.button("Salvar alterações", key=f"bulk_edit_{entity_key}_save", disabled=bool(errors) or not (updates or inserts)):
+        failures = submit_changes(client, entity, headers, updates, inserts)
+        saved = len(updates) + len(inserts) - len(failures)
+        if saved:
+            st.success(f"{saved} linhas salvas com sucesso!")
+        if failures:
+            st.error(f"{len(failures)} linhas não foram salvas.")
+            st.dataframe(pd.DataFrame(list(failures.items()), columns=["linha", "erro"]), hide_index=True, use_container_width=True)
+        else:
+            # Tudo salvo: na próxima execução o editor recomeça dos dados novos.
+            st.session_state[f"bulk_edit_{entity_key}_generation"] = generation + 1
+            snapshots.clear()
@@ -0,0 +1,165 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import requests
+import streamlit as st
+from aggregations import engine_for
+from api_client import get_api_client
+from dataset_store import get_dataset_store
+from entities import ENTITIES, validate_record
+from indexes import reference_checker
+from metrics import bind_trace
+
+
+CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+
+@st.cache_resource
+def get_write_executor():
+    # Separado do pool de leitura: uma importação grande não atrasa os GETs do dashboard.
+    max_workers = int(os.getenv("IMPORT_WORKERS", "4"))
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-write")
+
+
+@st.cache_resource
+def get_batch_support():
+    # caminho -> a API aceita POST {caminho}bulk? (descoberto na primeira tentativa)
+    return {}
+
+
+def iter_chunks(uploaded, chunk_size=CHUNK_SIZE):
+    # Gera (linhas, fração_lida); cada linha é (número da linha no arquivo, dict).
+    uploaded.seek(0)
+    if uploaded.name.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Instale o pacote openpyxl para importar arquivos Excel.")
+        workbook = load_workbook(uploaded, read_only=True, data_only=True)
+        sheet = workbook.active
+        total = max(sheet.max_row or 1, 1)
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        chunk = []
+        for line, row in enumerate(rows, start=2):
+            chunk.append((line, dict(zip(header, row))))
+            if len(chunk) == chunk_size:
+                yield chunk, line / total
+                chunk = []
+        if chunk:
+            yield chunk, 1.0
+        workbook.close()
+        return
+
+    size = max(uploaded.size, 1)
+    reader = pd.read_csv(uploaded, chunksize=chunk_size, dtype=str, keep_default_na=False, sep=None, engine="python")
+    line = 2
+    for df in reader:
+        df.columns = [str(column).strip() for column in df.columns]
+        yield [(line + offset, record) for offset, record in enumerate(df.to_dict("records"))], min(uploaded.tell() / size, 1.0)
+        line += len(df)
+
+
+def error_text(response):
+    return f"{response.status_code} - {response.text[:200]}"
+
+
+def submit_one(client, path, headers, payload):
+    try:
+        response = client.post(path, headers=headers, json=payload)
+    except requests.exceptions.RequestException as exc:
+        return f"Erro de conexão com a API: {exc.__class__.__name__}"
+    return None if response.status_code == 200 else error_text(response)
+
+
+def submit_batch(client, path, headers, payloads):
+    # Uma requisição para o lote inteiro, se a API tiver o endpoint; None se não tiver.
+    support = get_batch_support()
+    if support.get(path) is False:
+        return None
+    try:
+        response = client.post(f"{path}bulk", headers=headers, json=payloads)
+    except requests.exceptions.RequestException as exc:
+        return [f"Erro de conexão com a API: {exc.__class__.__name__}"] * len(payloads)
+    if response.status_code in (404, 405):
+        support[path] = False
+        return None
+    support[path] = True
+    return [None if response.status_code == 200 else error_text(response)] * len(payloads)
+
+
+def run_import(client, entity, headers, uploaded, state, progress, status):
+    executor = get_write_executor()
+    check = reference_checker(client, headers, entity.key)
+    for chunk, fraction in iter_chunks(uploaded):
+        pending = []
+        for line, raw in chunk:
+            if line in state["done"]:
+                continue
+            payload, errors = validate_record(entity, raw)
+            errors = errors or check(payload)
+            if errors:
+                state["failed"][line] = "; ".join(errors)
+            else:
+                pending.append((line, payload))
+
+        if pending:
+            payloads = [payload for _, payload in pending]
+            results = submit_batch(client, entity.path, headers, payloads)
+            if results is None:
+                results = list(executor.map(bind_trace(lambda payload: submit_one(client, entity.path, headers, payload)), payloads))
+            for (line, _), error in zip(pending, results):
+                if error:
+                    state["failed"][line] = error
+                else:
+                    state["done"].add(line)
+                    state["failed"].pop(line, None)
+
+        # O estado fica em session_state a cada lote: se o script for interrompido, retomamos daqui.
+        progress.progress(fraction)
+        status.caption(f"{len(state['done'])} linhas importadas · {len(state['failed'])} com erro")
+    state["finished"] = True
+
+
+def bulk_import_form(API_BASE_URL, headers, entity_key):
+    client = get_api_client(API_BASE_URL)
+    entity = ENTITIES[entity_key]
+    st.subheader(f"Importação em Lote ({entity.label})")
+    st.caption("Colunas esperadas: " + ", ".join(field.name for field in entity.fields))
+
+    uploaded = st.file_uploader("Arquivo CSV ou Excel", type=["csv", "xlsx"], key=f"bulk_{entity_key}_file")
+    if uploaded is None:
+        return
+
+    state_key = f"bulk_{entity_key}_{hashlib.sha1(uploaded.getvalue()).hexdigest()}"
+    state = st.session_state.setdefault(state_key, {"done": set(), "failed": {}, "finished": False})
+    resuming = bool(state["done"]) and not state["finished"]
+    if resuming:
+        st.info(f"{len(state['done'])} linhas deste arquivo já foram importadas; a importação continua de onde parou.")
+
+    col_start, col_reset = st.columns(2)
+    with col_start:
+        start = st.button("Retomar importação" if resuming else "Importar", key=f"bulk_{entity_key}_start")
+    with col_reset:
+        if st.button("Recomeçar do zero", key=f"bulk_{entity_key}_reset"):
+            st.session_state[state_key] = state = {"done": set(), "failed": {}, "finished": False}
+
+    if start:
+        state["finished"] = False
+        progress = st.progress(0.0)
+        status = st.empty()
+        try:
+            run_import(client, entity, headers, uploaded, state, progress, status)
+        except ValueError as exc:
+            st.error(f"Não foi possível ler o arquivo: {exc}")
+        if state["done"]:
+            get_dataset_store().invalidate_for_write(entity.path)
+            engine_for(headers).invalidate()
+        st.success(f"Importação concluída: {len(state['done'])} linhas importadas.")
+
+    if state["failed"]:
+        st.warning(f"{len(state['failed'])} linhas com erro. Corrija o arquivo e clique em importar novamente: as linhas já importadas são puladas.")
+        report = pd.DataFrame(sorted(state["failed"].items()), columns=["linha", "erro"])
+        st.dataframe(report, hide_index=True, use_container_width=True)
+        st.download_button("Baixar relatório de erros", report.to_csv(index=False).encode(), file_name=f"erros_{entity_key}.csv", key=f"bulk_{entity_key}_report")
@@ -0,0 +1,59 @@
+import os
+import altair as alt
+import pandas as pd
+import streamlit as st
+from metrics import timed
+from ranking import VersionedCache, versioned_key
+
+
+MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "30"))
+OTHERS_LABEL = "Outros"
+
+
+@st.cache_resource
+def get_chart_cache():
+    return VersionedCache(max_entries=256)
+
+
+def rollup(df, x, y, agg="sum", max_points=MAX_POINTS, extra=()):
+    # Agrega por categoria e limita a max_points barras: top N-1 + "Outros".
+    data = df[[x, y, *extra]]
+    if data[x].duplicated().any():
+        data = data.groupby(x, as_index=False, observed=True, sort=False).agg({y: agg, **{column: "first" for column in extra}})
+    if len(data) <= max_points:
+        return data
+    top = data.nlargest(max_points - 1, y)
+    rest = data.drop(top.index)
+    others = pd.DataFrame({x: [OTHERS_LABEL], y: [rest[y].agg(agg)], **{column: [None] for column in extra}})
+    return pd.concat([top, others], ignore_index=True)
+
+
+def bar_chart(df, x, y, x_title, y_title, title, y_format=",.2f", agg="sum", extra_tooltip=(), max_points=MAX_POINTS):
+    # Só as colunas codificadas entram no payload: frames compartilhados por vários gráficos
+    # (ex.: insights) não são reenviados inteiros a cada gráfico.
+    def build():
+        with timed("chart", title):
+            data = rollup(df, x, y, agg, max_points, extra_tooltip)
+            return alt.Chart(data).mark_bar().encode(
+                x=alt.X(x, title=x_title),
+                y=alt.Y(y, title=y_title),
+                tooltip=[x, *extra_tooltip, alt.Tooltip(y, format=y_format)]
+            ).properties(
+                title=title
+            )
+
+    key = versioned_key("bar_chart", [df], x, y, x_title, y_title, title, y_format, agg, tuple(extra_tooltip), max_points)
+    return get_chart_cache().get_or_compute(key, build)
+
+
+def line_chart(df, x, y, color, x_title, y_title, title, y_format=",.2f"):
+    # Séries temporais já agregadas e reduzidas (timeseries.downsample): não há rollup aqui.
+    with timed("chart", title):
+        return alt.Chart(df).mark_line(point=len(df) <= 60).encode(
+            x=alt.X(f"{x}:T", title=x_title),
+            y=alt.Y(f"{y}:Q", title=y_title),
+            color=alt.Color(f"{color}:N", title=None),
+            tooltip=[alt.Tooltip(f"{x}:T", title=x_title), color, alt.Tooltip(y, format=y_format)]
+        ).properties(
+            title=title
+        )
@@ -0,0 +1,145 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Optional
+import streamlit as st
+import requests
+from dataset_store import get_dataset_store, session_id, user_key
+from disk_cache import STALE_ATTR
+from metrics import bind_trace, metric_path, record, timed
+from resilience import ApiUnavailable
+
+
+@dataclass
+class FetchResult:
+    path: str
+    data: Any = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+    size: int = 0
+    from_cache: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status_code == 200
+
+    @property
+    def stale_at(self):
+        # Timestamp da cópia em disco quando a API estava fora do ar; None para dados atuais.
+        return self.data.attrs.get(STALE_ATTR) if self.ok else None
+
+
+@st.cache_resource
+def get_fetch_executor():
+    # Compartilhado entre sessões: limita o total de GETs simultâneos do processo.
+    max_workers = int(os.getenv("API_FETCH_WORKERS", "8"))
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-fetch")
+
+
+def fetch_one(client, path, headers, params=None):
+    # ingest (pandas/pyarrow) só é importado na primeira busca, não na tela de login.
+    from ingest import accept_header, read_frame
+
+    try:
+        response = client.get(path, headers={**headers, "Accept": accept_header()}, params=params)
+    except ApiUnavailable as exc:
+        return FetchResult(path, error=str(exc))
+    except requests.exceptions.Timeout:
+        return FetchResult(path, error="Tempo de resposta da API esgotado.")
+    except requests.exceptions.RequestException:
+        return FetchResult(path, error="Erro de conexão com a API.")
+
+    if response.status_code == 304:
+        return FetchResult(path, status_code=304, error="Não modificado.")
+    if response.status_code != 200:
+        return FetchResult(path, status_code=response.status_code, error=f"HTTP {response.status_code}")
+    try:
+        with timed("dataframe", path):
+            data = read_frame(path, response.content, response.headers.get("Content-Type", ""))
+        return FetchResult(path, data=data, status_code=200, size=len(response.content),
+                           etag=response.headers.get("ETag"), last_modified=response.headers.get("Last-Modified"))
+    except ValueError:
+        return FetchResult(path, status_code=200, error="Resposta inválida da API.")
+
+
+def _load(store, client, path, headers, params, user):
+    # Busca com a cópia em disco: GET condicional (304 = usa o arquivo) e, se a API estiver
+    # fora do ar, devolve a cópia marcada como desatualizada.
+    disk = store.disk
+    if disk is None:
+        return fetch_one(client, path, headers, params)
+    key = store.key_for(user, path, params)
+    meta = disk.meta(key)
+    result = fetch_one(client, path, {**headers, **disk.conditional_headers(meta)}, params)
+    if result.status_code == 304:
+        data = disk.load(key, meta)
+        if data is not None:
+            return FetchResult(path, data=data, status_code=200, from_cache=True, etag=meta.get("etag"), last_modified=meta.get("last_modified"))
+        result = fetch_one(client, path, headers, params)
+
+    if result.ok:
+        disk.save(key, result.data, result.etag, result.last_modified)
+        return result
+    offline = result.status_code is None or result.status_code >= 500
+    if meta is not None and offline and store.trusted(user):
+        data = disk.load(key, meta)
+        if data is not None:
+            data.attrs[STALE_ATTR] = meta["stored_at"]
+            return FetchResult(path, data=data, status_code=200, from_cache=True)
+    return result
+
+
+def show_offline_notice(results):
+    stale = [result.stale_at for result in results if result.stale_at]
+    if stale:
+        saved_at = datetime.fromtimestamp(min(stale)).strftime("%d/%m/%Y %H:%M")
+        st.warning(f"API indisponível: exibindo dados salvos em {saved_at}. Use \"Atualizar Dados\" para tentar novamente.")
+
+
+# O store é obtido na thread do script e repassado às threads do pool.
+def _fetch_cached(store, client, path, headers, params=None, force_refresh=False):
+    user = user_key(headers)
+    if not force_refresh:
+        data = store.get(user, path, params)
+        if data is not None:
+            record("cache", path=metric_path(path), hit=True)
+            return FetchResult(path, data=data, status_code=200, from_cache=True)
+
+    record("cache", path=metric_path(path), hit=False)
+
+    def loader():
+        # Com backend compartilhado, outra réplica pode já estar buscando o mesmo dataset
+        # (num refresh forçado, a cópia dela seria justamente a que queremos substituir).
+        data = None if force_refresh else store.claim(user, path, params)
+        if data is not None:
+            return FetchResult(path, data=data, status_code=200, from_cache=True)
+        return _load(store, client, path, headers, params, user)
+
+    result = store.load(user, path, loader, params)
+    if result.ok:
+        # O frame armazenado é compartilhado; cada chamador recebe uma cópia rasa.
+        return replace(result, data=result.data.copy(deep=False))
+    return result
+
+
+def fetch_cached(client, path, headers, params=None, force_refresh=False):
+    store = get_dataset_store()
+    store.lease(session_id(), user_key(headers), [path])
+    return _fetch_cached(store, client, path, headers, params, force_refresh)
+
+
+def prefetch(client, path, headers, params=None):
+    # Aquece o store em segundo plano; o resultado é lido depois por fetch_cached.
+    return get_fetch_executor().submit(bind_trace(_fetch_cached), get_dataset_store(), client, path, headers, params)
+
+
+def fetch_all(client, paths, headers, force_refresh=False):
+    store = get_dataset_store()
+    store.lease(session_id(), user_key(headers), paths)
+    executor = get_fetch_executor()
+    task = bind_trace(_fetch_cached)
+    futures = {path: executor.submit(task, store, client, path, headers, None, force_refresh) for path in dict.fromkeys(paths)}
+    return {path: future.result() for path, future in futures.items()}
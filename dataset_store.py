@@ -0,0 +1,481 @@
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+import streamlit as st
+from api_client import match_prefix
+from disk_cache import PERSISTED_ATTRS, DiskCache
+from state_backend import get_state_backend
+
+
+DEFAULT_TTL = 60
+LEASE_TTL = 600
+# Com backend compartilhado: quanto tempo um usuário aceito pela API continua confiável
+# nas outras réplicas, e quanto uma réplica espera a busca que outra já começou.
+VERIFIED_TTL = 12 * 3600
+LOAD_CLAIM_TTL = 30
+
+# Por padrão cada usuário tem seu próprio escopo (o do login, ver identify): dados buscados
+# por um usuário nunca são servidos a outro. DATASET_SCOPE=shared divide os datasets entre as
+# sessões; só ligue se a API devolver os mesmos dados a qualquer usuário autenticado (sem
+# filtro por usuário/tenant).
+SHARED = "shared"
+
+# Marca, em df.attrs, um frame que veio do backend compartilhado (já gravado por outra réplica).
+SHARED_ATTR = "from_backend"
+
+# Versão de cada frame armazenado, em df.attrs; caches derivados (rankings, gráficos) usam essa chave.
+VERSION_ATTR = "dataset_version"
+
+# Segundos, pelo prefixo do caminho (vale o prefixo mais longo).
+ENDPOINT_TTLS = {
+    "/api/empresas/": 300,
+    "/api/insights/": 120,
+    "/api/media_notas_diretor/": 120,
+    "/api/pioresdiretores/": 120,
+    "/api/melhoresdiretores/": 120,
+    "/api/faturamento_mensal_por_empresa/": 120,
+}
+
+# Recurso escrito pelos formulários -> datasets de leitura que ficam desatualizados.
+WRITE_INVALIDATES = {
+    "/api/empresas/": [
+        "/api/empresas/",
+        "/api/insights/",
+        "/api/media_notas_diretor/",
+        "/api/pioresdiretores/",
+        "/api/melhoresdiretores/",
+        "/api/insights/maior_lucro/",
+        "/api/faturamento_mensal_por_empresa/",
+    ],
+    "/api/faturamento/": [
+        "/api/faturamento/",
+        "/api/insights/",
+        "/api/pioresdiretores/",
+        "/api/melhoresdiretores/",
+        "/api/faturamento_mensal_por_empresa/",
+    ],
+    "/api/produtos_vendidos/": [
+        "/api/produtos_vendidos/",
+        "/api/insights/maior_lucro/",
+    ],
+    "/api/detalhes_produtos/": [
+        "/api/detalhes_produtos/",
+        "/api/insights/maior_lucro/",
+    ],
+    "/api/avaliacoes/": [
+        "/api/avaliacoes/",
+        "/api/insights/",
+        "/api/media_notas_diretor/",
+    ],
+}
+
+
+def user_key(headers):
+    # Nunca guardamos o token em si, só um hash dele.
+    token = (headers or {}).get("Authorization", "")
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def login_key(email):
+    # Identidade estável do login: não muda quando o token é renovado nem num novo login.
+    return hashlib.sha256(f"login:{email.strip().lower()}".encode()).hexdigest()
+
+
+def params_key(params):
+    return tuple(sorted((params or {}).items()))
+
+
+def session_id():
+    if "_dataset_session_id" not in st.session_state:
+        st.session_state._dataset_session_id = uuid.uuid4().hex
+    return st.session_state._dataset_session_id
+
+
+def dumps_frame(df):
+    # Cabeçalho JSON (attrs persistidos) + Arrow IPC. Sem pyarrow, ou com colunas que o Arrow não
+    # representa, devolve None e o frame fica só no cache local: nada é serializado com pickle
+    # num backend que outras réplicas leem.
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    attrs = {name: df.attrs[name] for name in PERSISTED_ATTRS if name in df.attrs}
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowException, ValueError, TypeError):
+        return None
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return json.dumps({"format": "arrow", "attrs": attrs}).encode() + b"\n" + sink.getvalue().to_pybytes()
+
+
+def loads_frame(blob):
+    # None para qualquer formato que não seja Arrow (ex.: cópias em pickle de versões antigas).
+    header, payload = bytes(blob).split(b"\n", 1)
+    header = json.loads(header)
+    if header.get("format") != "arrow":
+        return None
+    import pyarrow as pa
+
+    df = pa.ipc.open_stream(payload).read_all().to_pandas()
+    df.attrs.update(header["attrs"])
+    return df
+
+
+def _close(resource):
+    # Objetos com conexões ou threads próprias (ex.: live_updates.EventStream) fecham ao sair do store.
+    close = getattr(resource, "close", None)
+    if close is not None:
+        close()
+
+
+class StoreEntry:
+    __slots__ = ("data", "nbytes", "expires_at", "generation")
+
+    def __init__(self, data, nbytes, expires_at, generation=0):
+        self.data = data
+        self.nbytes = nbytes
+        self.expires_at = expires_at
+        self.generation = generation
+
+
+class DatasetStore:
+    def __init__(self, max_bytes=256 * 1024 * 1024, default_ttl=DEFAULT_TTL, ttls=None, shared=False, lease_ttl=LEASE_TTL, disk=None,
+                 backend=None, backend_max_bytes=64 * 1024 * 1024, max_resources=192):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttls = dict(ENDPOINT_TTLS if ttls is None else ttls)
+        self.shared = shared
+        self.lease_ttl = lease_ttl
+        # Camada persistente opcional (DiskCache): revalidação com ETag e dados offline.
+        self.disk = disk
+        # Backend compartilhado opcional (StateBackend): as réplicas dividem datasets, usuários
+        # confiáveis e aliases. Cada caminho tem uma geração no backend; invalidar incrementa a
+        # geração, e as cópias locais de outra geração são descartadas em todas as réplicas.
+        self.backend = backend
+        self.backend_max_bytes = backend_max_bytes
+        self.claims = {}
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.inflight = {}
+        self.versions = itertools.count(1)
+        # sessão -> {chave: expira_em}; uma chave com lease válido está em uso.
+        self.leases = {}
+        # Usuários cujo token a API já aceitou: só eles leem datasets compartilhados.
+        self.verified = set()
+        # Token renovado -> usuário original: a renovação não troca o escopo nem esvazia o cache.
+        self.aliases = {}
+        # (nome, escopo) -> objeto mantido por escopo (motor de insights, índices, análise das
+        # avaliações). LRU com no máximo max_resources objetos; saem junto com o usuário em drop_user.
+        self.resources = OrderedDict()
+        self.max_resources = max_resources
+        self.lock = threading.Lock()
+
+    def ttl_for(self, path):
+        return match_prefix(self.ttls, path, self.default_ttl)
+
+    def canonical(self, user):
+        if user not in self.aliases and self.backend is not None:
+            original = self.backend.get("alias", user)
+            if original is not None:
+                self.aliases[user] = original.decode()
+        return self.aliases.get(user, user)
+
+    def scope_for(self, user):
+        return SHARED if self.shared else self.canonical(user)
+
+    def key_for(self, user, path, params=None):
+        return (self.scope_for(user), path, params_key(params))
+
+    def verify(self, user):
+        with self.lock:
+            self.verified.add(user)
+        if self.backend is not None:
+            self.backend.set("verified", user, b"1", ttl=VERIFIED_TTL)
+
+    def is_verified(self, user):
+        if user in self.verified:
+            return True
+        if self.backend is not None and self.backend.get("verified", user) is not None:
+            with self.lock:
+                self.verified.add(user)
+            return True
+        return False
+
+    def trusted(self, user):
+        # Pode receber dados sem a API ter aceitado o token nesta busca (cópia em disco, offline)?
+        return not self.shared or self.is_verified(user)
+
+    def identify(self, user, email):
+        # O token passa a usar o escopo do login: sessões novas do mesmo e-mail reaproveitam o
+        # cache em disco (e o ETag dele) e os objetos por escopo, em vez de recomeçar do zero.
+        identity = login_key(email)
+        if self.aliases.get(user) == identity:
+            return
+        with self.lock:
+            self.aliases[user] = identity
+        if self.backend is not None:
+            self.backend.set("alias", user, identity.encode(), ttl=VERIFIED_TTL)
+
+    def rekey_user(self, old, new):
+        # Chamado quando a API emite um novo token para o mesmo login.
+        original = self.canonical(old)
+        verified = self.is_verified(old)
+        with self.lock:
+            self.aliases[new] = original
+        if self.backend is not None:
+            self.backend.set("alias", new, original.encode(), ttl=VERIFIED_TTL)
+        if verified:
+            self.verify(new)
+
+    def generation(self, path):
+        if self.backend is None:
+            return 0
+        return int(self.backend.get("generation", path) or 0)
+
+    def _backend_key(self, key, generation):
+        return json.dumps([generation, *key])
+
+    def get(self, user, path, params=None):
+        key = self.key_for(user, path, params)
+        if key[0] == SHARED and not self.is_verified(user):
+            return None
+        generation = self.generation(path)
+        with self.lock:
+            entry = self._live_entry(key)
+            if entry is not None and entry.generation != generation:
+                self._pop(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry.data.copy(deep=False)
+        data = self._pull(key, path, generation)
+        return None if data is None else data.copy(deep=False)
+
+    def _pull(self, key, path, generation):
+        # Cópia gravada por outra réplica: entra no cache local sem ser reenviada ao backend.
+        if self.backend is None:
+            return None
+        blob = self.backend.get("datasets", self._backend_key(key, generation))
+        if blob is None:
+            return None
+        data = loads_frame(blob)
+        if data is None:
+            return None
+        self._put_local(key, path, data, generation)
+        return data
+
+    def claim(self, user, path, params=None):
+        # Busca na API só numa réplica por vez: as outras esperam o dataset aparecer no backend.
+        # Devolve o frame gravado pela réplica que buscou, ou None se esta deve buscar.
+        if self.backend is None:
+            return None
+        key = self.key_for(user, path, params)
+        name = self._backend_key(key, self.generation(path))
+        token = uuid.uuid4().hex.encode()
+        deadline = time.monotonic() + LOAD_CLAIM_TTL
+        while not self.backend.add("loading", name, token, ttl=LOAD_CLAIM_TTL):
+            data = self._from_peer(key, path)
+            if data is not None or time.monotonic() > deadline:
+                return data
+            time.sleep(0.05)
+        # A réplica anterior pode ter gravado e soltado o claim entre o get() e o add().
+        data = self._from_peer(key, path)
+        if data is not None:
+            self.backend.delete("loading", name, token)
+            return data
+        with self.lock:
+            self.claims[key] = (name, token)
+        return None
+
+    def _from_peer(self, key, path):
+        data = self._pull(key, path, self.generation(path))
+        if data is None:
+            return None
+        data = data.copy(deep=False)
+        data.attrs[SHARED_ATTR] = True
+        return data
+
+    def load(self, user, path, loader, params=None):
+        # Single-flight: buscas simultâneas da mesma chave esperam uma única chamada a loader().
+        # loader() devolve um FetchResult; quem esperava recebe o mesmo resultado.
+        key = self.key_for(user, path, params)
+        with self.lock:
+            trusted = key[0] != SHARED or user in self.verified
+            future = self.inflight.get(key) if trusted else None
+            owner = future is None
+            if owner:
+                future = Future()
+                if trusted:
+                    self.inflight[key] = future
+
+        if not owner:
+            return future.result()
+
+        # Geração de antes da busca: se outra réplica invalidar durante a busca, o resultado já nasce velho.
+        generation = self.generation(path)
+        try:
+            result = loader()
+            if result.ok:
+                self.verify(user)
+                if not result.data.attrs.pop(SHARED_ATTR, False):
+                    self.put(user, path, result.data, params, generation)
+            future.set_result(result)
+            return result
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self.lock:
+                if self.inflight.get(key) is future:
+                    del self.inflight[key]
+                claim = self.claims.pop(key, None)
+            if claim is not None:
+                self.backend.delete("loading", *claim)
+
+    def put(self, user, path, data, params=None, generation=None):
+        key = self.key_for(user, path, params)
+        generation = self.generation(path) if generation is None else generation
+        if self.backend is not None:
+            blob = dumps_frame(data)
+            if blob is not None and len(blob) <= self.backend_max_bytes:
+                self.backend.set("datasets", self._backend_key(key, generation), blob, ttl=self.ttl_for(path))
+        self._put_local(key, path, data, generation)
+
+    def _put_local(self, key, path, data, generation):
+        from ingest import frame_nbytes
+
+        nbytes = frame_nbytes(data)
+        # Cada frame armazenado ganha uma versão única; caches derivados (rankings) usam essa chave.
+        data.attrs[VERSION_ATTR] = next(self.versions)
+        if nbytes > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._pop(key)
+            self.entries[key] = StoreEntry(data, nbytes, time.monotonic() + self.ttl_for(path), generation)
+            self.total_bytes += nbytes
+            self._evict()
+
+    def resource(self, name, user, factory):
+        key = (name, self.scope_for(user))
+        evicted = []
+        with self.lock:
+            value = self.resources.get(key)
+            if value is None:
+                value = self.resources[key] = factory()
+            self.resources.move_to_end(key)
+            while len(self.resources) > self.max_resources:
+                evicted.append(self.resources.popitem(last=False)[1])
+        for resource in evicted:
+            _close(resource)
+        return value
+
+    def lease(self, session, user, paths):
+        expires_at = time.monotonic() + self.lease_ttl
+        with self.lock:
+            held = self.leases.setdefault(session, {})
+            for path in paths:
+                held[self.key_for(user, path)] = expires_at
+
+    def invalidate(self, paths):
+        paths = set(paths)
+        if self.backend is not None:
+            # A geração é do caminho, não do usuário: com backend, invalida para todos.
+            for path in paths:
+                self.backend.incr("generation", path)
+        with self.lock:
+            for key in [k for k in self.entries if k[1] in paths]:
+                self._pop(key)
+
+    def invalidate_for_write(self, path):
+        # O dado é compartilhado no backend: a escrita invalida o dataset para todos os usuários.
+        self.invalidate(match_prefix(WRITE_INVALIDATES, path, []))
+
+    def refresh_user(self, user):
+        # "Atualizar Dados": descarta o que este usuário enxerga, inclusive os datasets compartilhados.
+        user = self.canonical(user)
+        with self.lock:
+            paths = {k[1] for k in self.entries}
+            for key in [k for k in self.entries if k[0] in (user, SHARED)]:
+                self._pop(key)
+        if self.backend is not None:
+            # Sem isso, a próxima leitura traria de volta a cópia do backend.
+            self.invalidate(paths | {p for written in WRITE_INVALIDATES.values() for p in written})
+
+    def drop_user(self, user, session=None):
+        user = self.canonical(user)
+        with self.lock:
+            aliases = [a for a, original in self.aliases.items() if original == user]
+            for alias in aliases:
+                self.verified.discard(alias)
+                del self.aliases[alias]
+            self.verified.discard(user)
+            if session is not None:
+                self.leases.pop(session, None)
+            for key in [k for k in self.entries if k[0] == user]:
+                self._pop(key)
+            resources = [self.resources.pop(k) for k in [k for k in self.resources if k[1] == user]]
+        for resource in resources:
+            _close(resource)
+        if self.disk is not None:
+            self.disk.drop(user)
+        if self.backend is not None:
+            for name in [user] + aliases:
+                self.backend.delete("verified", name)
+
+    def _live_entry(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and entry.expires_at < time.monotonic():
+            self._pop(key)
+            return None
+        return entry
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        now = time.monotonic()
+        for held in list(self.leases.values()):
+            for key in [k for k, expires_at in held.items() if expires_at <= now]:
+                del held[key]
+        in_use = {key for held in self.leases.values() for key in held}
+        # Só datasets sem nenhuma sessão usando (LRU). Os em uso ficam mesmo acima do limite:
+        # saem quando o lease expira ou a sessão sai.
+        for key in [k for k in self.entries if k not in in_use]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._pop(key)
+
+    def _pop(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.nbytes
+
+
+@st.cache_resource
+def get_dataset_store():
+    backend = get_state_backend()
+    return DatasetStore(
+        max_bytes=int(os.getenv("DATASET_STORE_MAX_MB", "256")) * 1024 * 1024,
+        default_ttl=float(os.getenv("API_CACHE_TTL", DEFAULT_TTL)),
+        shared=os.getenv("DATASET_SCOPE", "user") == SHARED,
+        disk=_disk_cache(),
+        # Backend só em memória não é compartilhado: guardar os frames nele só dobraria a memória.
+        backend=backend if backend.shared else None,
+        backend_max_bytes=int(os.getenv("STATE_BACKEND_DATASET_MAX_MB", "64")) * 1024 * 1024,
+        max_resources=int(os.getenv("DATASET_STORE_MAX_RESOURCES", "192")),
+    )
+
+
+def _disk_cache():
+    # DATASET_DISK_CACHE_DIR vazio desliga o cache em disco.
+    directory = os.getenv("DATASET_DISK_CACHE_DIR", ".dataset_cache")
+    if not directory:
+        return None
+    return DiskCache(directory, max_bytes=int(os.getenv("DATASET_DISK_CACHE_MB", "1024")) * 1024 * 1024)
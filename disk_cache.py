@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# Marca, em df.attrs, um dataset servido do disco porque a API não respondeu (timestamp do arquivo).
+STALE_ATTR = "stale_at"
+# attrs que sobrevivem ao disco (ex.: total das respostas paginadas).
+PERSISTED_ATTRS = ("total",)
+
+
+class DiskCache:
+    # Segunda camada do DatasetStore: um arquivo por dataset, sobrevive a reinícios do processo.
+    # Arrow IPC (lido com memory map) quando o pyarrow está instalado; pickle caso contrário.
+    def __init__(self, directory, max_bytes=1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, key):
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def meta(self, key):
+        try:
+            with open(self._meta_path(key), encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, key, meta=None):
+        meta = meta or self.meta(key)
+        if meta is None:
+            return None
+        data_path = os.path.join(self.directory, meta["file"])
+        try:
+            if meta["format"] == "arrow":
+                import pyarrow as pa
+
+                # O arquivo é mapeado em memória: a tabela Arrow não é copiada para o heap;
+                # só a conversão para pandas (tipos do esquema) aloca.
+                with pa.memory_map(data_path, "r") as source:
+                    df = pa.ipc.open_file(source).read_all().to_pandas()
+            else:
+                import pandas as pd
+
+                df = pd.read_pickle(data_path)
+        except (OSError, ValueError, ImportError):
+            # Arquivo substituído/removido por outra escrita, ou formato ilegível: busca completa.
+            return None
+        df.attrs.update(meta.get("attrs", {}))
+        return df
+
+    def save(self, key, df, etag=None, last_modified=None):
+        token = uuid.uuid4().hex
+        base = os.path.basename(self._meta_path(key))[:-5]
+        fmt, file_name = self._write_frame(df, base, token)
+        meta = {
+            "scope": key[0],
+            "file": file_name,
+            "format": fmt,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "attrs": {name: df.attrs[name] for name in PERSISTED_ATTRS if name in df.attrs},
+        }
+        meta_path = self._meta_path(key)
+        previous = self.meta(key)
+        tmp = f"{meta_path}.{token}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+        os.replace(tmp, meta_path)
+        if previous and previous.get("file") != file_name:
+            self._remove(previous["file"])
+        self._prune()
+
+    def drop(self, scope):
+        # Logout: apaga os datasets gravados no escopo do usuário.
+        with self.lock:
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path, encoding="utf-8") as file:
+                        meta = json.load(file)
+                except (OSError, ValueError):
+                    continue
+                if meta.get("scope") != scope:
+                    continue
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+                self._remove(meta["file"])
+
+    def _write_frame(self, df, base, token):
+        try:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            file_name = f"{base}-{token}.arrow"
+            tmp = os.path.join(self.directory, f"{file_name}.tmp")
+            with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, os.path.join(self.directory, file_name))
+            return "arrow", file_name
+        except (ImportError, ValueError, TypeError):
+            # Sem pyarrow, ou colunas que o Arrow não representa (objetos mistos).
+            pass
+        file_name = f"{base}-{token}.pkl"
+        tmp = os.path.join(self.directory, f"{file_name}.tmp")
+        df.to_pickle(tmp)
+        os.replace(tmp, os.path.join(self.directory, file_name))
+        return "pickle", file_name
+
+    def _remove(self, file_name):
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except OSError:
+            pass
+
+    def _prune(self):
+        # Acima do limite, descarta os datasets gravados há mais tempo.
+        with self.lock:
+            metas = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    with open(entry.path, encoding="utf-8") as file:
+                        meta = json.load(file)
+                    size = os.path.getsize(os.path.join(self.directory, meta["file"]))
+                except (OSError, ValueError, KeyError):
+                    continue
+                metas.append((meta["stored_at"], entry.path, meta["file"], size))
+                total += size
+            for _, meta_path, file_name, size in sorted(metas):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(meta_path)
+                except OSError:
+                    pass
+                self._remove(file_name)
+                total -= size
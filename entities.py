@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class Field:
+    name: str
+    kind: str
+    required: bool = True
+    min: Optional[float] = None
+    max: Optional[float] = None
+    # Chave estrangeira: entidade cujo id o campo referencia (ver indexes.reference_checker).
+    ref: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Entity:
+    key: str
+    label: str
+    path: str
+    id_field: str
+    fields: tuple
+
+
+# Mesmas regras dos widgets dos formulários de "Gerenciar" (ver limits()).
+ENTITIES = {
+    "empresas": Entity("empresas", "Empresas", "/api/empresas/", "id_empresa", (
+        Field("nome_empresa", "str"),
+        Field("diretor_empresa", "str"),
+    )),
+    "detalhes_produtos": Entity("detalhes_produtos", "Detalhes Prod.", "/api/detalhes_produtos/", "id_produto", (
+        Field("id_empresa", "int", min=1, ref="empresas"),
+        Field("nome_produto", "str"),
+        Field("categoria", "str"),
+        Field("preco_unitario", "float", min=0.01),
+        Field("margem_lucro_percentual", "float", min=0.0, max=100.0),
+        Field("data_lancamento", "date"),
+    )),
+    "produtos_vendidos": Entity("produtos_vendidos", "Prod. Vendidos", "/api/produtos_vendidos/", "id_venda", (
+        Field("id_faturamento", "int", min=1, ref="faturamento"),
+        Field("nome_produto", "str"),
+        Field("produtos_vendidos", "int", min=1),
+    )),
+    "avaliacoes": Entity("avaliacoes", "Avaliações", "/api/avaliacoes/", "id_avaliacao", (
+        Field("id_empresa", "int", min=1, ref="empresas"),
+        Field("nota_diretor", "int", min=0, max=10),
+        Field("nota_geral_empresa", "int", min=0, max=10),
+        Field("comentario", "str", required=False),
+    )),
+    "faturamento": Entity("faturamento", "Faturamento", "/api/faturamento/", "id_faturamento", (
+        Field("id_empresa", "int", min=1, ref="empresas"),
+        Field("faturamento_mensal", "float", min=0.01),
+        Field("faturamento_anual", "float", min=0.01),
+    )),
+}
+
+
+def get_field(entity_key, name):
+    return next(field for field in ENTITIES[entity_key].fields if field.name == name)
+
+
+def limits(entity_key, name):
+    # kwargs de min/max para st.number_input/st.slider, a partir da regra do campo.
+    field = get_field(entity_key, name)
+    cast = int if field.kind == "int" else float
+    kwargs = {}
+    if field.min is not None:
+        kwargs["min_value"] = cast(field.min)
+    if field.max is not None:
+        kwargs["max_value"] = cast(field.max)
+    return kwargs
+
+
+def _parse_number(text, kind):
+    try:
+        value = float(text)
+    except ValueError:
+        # Formato brasileiro: 1.234,56
+        value = float(text.replace(".", "").replace(",", "."))
+    if kind == "int":
+        if not value.is_integer():
+            raise ValueError("deve ser um número inteiro")
+        return int(value)
+    return value
+
+
+def _parse_date(text):
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text[:10], fmt).date()
+        except ValueError:
+            pass
+    raise ValueError("data inválida (use AAAA-MM-DD ou DD/MM/AAAA)")
+
+
+def parse_field(field, raw):
+    if isinstance(raw, (datetime, date)) and field.kind == "date":
+        return str(raw.date() if isinstance(raw, datetime) else raw)
+    text = "" if raw is None else str(raw).strip()
+    if text in ("", "nan", "None"):
+        if field.required:
+            raise ValueError("campo obrigatório")
+        return "" if field.kind == "str" else None
+
+    if field.kind == "str":
+        return text
+    if field.kind == "date":
+        return str(_parse_date(text))
+
+    value = _parse_number(text, field.kind)
+    if field.min is not None and value < field.min:
+        raise ValueError(f"deve ser maior ou igual a {field.min:g}")
+    if field.max is not None and value > field.max:
+        raise ValueError(f"deve ser menor ou igual a {field.max:g}")
+    return value
+
+
+def validate_record(entity, raw):
+    # Retorna (payload, erros); payload só é válido se erros estiver vazio.
+    payload, errors = {}, []
+    for field in entity.fields:
+        try:
+            payload[field.name] = parse_field(field, raw.get(field.name))
+        except ValueError as exc:
+            errors.append(f"{field.name}: {exc}")
+    return payload, errors
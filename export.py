@@ -0,0 +1,281 @@
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Optional
+import pandas as pd
+import streamlit as st
+from data_fetcher import fetch_one
+from dataset_store import user_key
+from entities import ENTITIES
+
+
+# Rótulo -> (endpoint, coluna de ordenação estável para paginar; None se não houver id).
+EXPORT_DATASETS = {
+    **{entity.label: (entity.path, entity.id_field) for entity in ENTITIES.values()},
+    "Insights por empresa": ("/api/insights/", None),
+    "Média de notas por diretor": ("/api/media_notas_diretor/", None),
+    "Piores diretores": ("/api/pioresdiretores/", None),
+    "Melhores diretores": ("/api/melhoresdiretores/", None),
+    "Produtos de maior lucro": ("/api/insights/maior_lucro/", None),
+    "Faturamento mensal por empresa": ("/api/faturamento_mensal_por_empresa/", None),
+}
+FORMATS = ["CSV", "Parquet"]
+
+PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "50000"))
+# O download_button não transmite em streaming: a parte clicada é lida inteira para a memória e fica no
+# media manager do Streamlit até a limpeza seguinte. Partes pequenas limitam esse custo por clique.
+PART_BYTES = int(os.getenv("EXPORT_PART_MB", "16")) * 1024 * 1024
+EXPORT_TTL = int(os.getenv("EXPORT_TTL", "3600"))
+# Intervalo da limpeza das exportações vencidas (segundos).
+CLEANUP_INTERVAL = int(os.getenv("EXPORT_CLEANUP_INTERVAL", "300"))
+
+# Fora de qualquer pasta servida pelo Streamlit: os arquivos só saem pelo download_button da sessão dona.
+EXPORT_DIR = os.getenv("EXPORT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".exports"))
+
+
+@dataclass
+class ExportJob:
+    id: str
+    label: str
+    fmt: str
+    owner: str
+    rows: int = 0
+    total: Optional[int] = None
+    parts: list = field(default_factory=list)
+    status: str = "running"
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def progress(self):
+        if self.status != "running":
+            return 1.0
+        return min(1.0, self.rows / self.total) if self.total else 0.0
+
+
+def iter_pages(client, path, headers, order_by, page_size=PAGE_SIZE):
+    # Uma página por vez (limit/offset): só uma página fica em memória. Um backend que ignora
+    # offset repete a primeira linha, e aí a exportação falha em vez de sair truncada.
+    offset, first_row = 0, None
+    while True:
+        params = {"limit": page_size, "offset": offset}
+        if order_by:
+            params["order_by"] = order_by
+        result = fetch_one(client, path, headers, params)
+        if not result.ok:
+            raise RuntimeError(result.error)
+        frame = result.data
+        if frame.empty:
+            return
+        if len(frame) > page_size:
+            # A API ignorou o limit e devolveu a lista inteira: ela sai em fatias de page_size, e cada
+            # escrita (e cada parte) continua do tamanho de uma página. Não há mais nada a pedir.
+            for start in range(0, len(frame), page_size):
+                yield frame.iloc[start:start + page_size], len(frame)
+            return
+        row = tuple(frame.iloc[0].astype(str))
+        if offset and row == first_row:
+            raise RuntimeError(f"A API ignorou o offset em {path}: a exportação sairia incompleta.")
+        first_row = first_row or row
+        yield frame, frame.attrs.get("total")
+        offset += len(frame)
+        total = frame.attrs.get("total")
+        if len(frame) != page_size or (total is not None and offset >= total):
+            return
+
+
+class PartWriter:
+    # Grava páginas em arquivos de até part_bytes; cada parte é um CSV/Parquet completo.
+    # A parte só ganha o nome final ao ser fechada: o link nunca aponta para um arquivo pela metade.
+    def __init__(self, directory, base, fmt, part_bytes=PART_BYTES):
+        self.directory = directory
+        self.base = base
+        self.fmt = fmt
+        self.part_bytes = part_bytes
+        self.parts = []
+        self.file = None
+        self.writer = None
+        self.schema = None
+
+    def _name(self):
+        extension = "parquet" if self.fmt == "Parquet" else "csv"
+        return f"{self.base}-parte{len(self.parts) + 1}.{extension}"
+
+    def _tmp(self):
+        return os.path.join(self.directory, self._name() + ".tmp")
+
+    def write(self, frame):
+        if self.fmt == "Parquet":
+            self._write_parquet(frame)
+        else:
+            if self.file is None:
+                self.file = open(self._tmp(), "w", encoding="utf-8", newline="")
+                frame.to_csv(self.file, index=False)
+            else:
+                frame.to_csv(self.file, index=False, header=False)
+        if os.path.getsize(self._tmp()) >= self.part_bytes:
+            self._close_part()
+
+    def _write_parquet(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Categorias viram texto: o dicionário de cada página seria diferente do esquema da parte.
+        frame = frame.astype({column: "string" for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)})
+        if self.schema is None:
+            self.schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self._tmp(), self.schema)
+        self.writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def _close_part(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        elif self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        else:
+            return
+        name = self._name()
+        os.replace(os.path.join(self.directory, name + ".tmp"), os.path.join(self.directory, name))
+        self.parts.append(name)
+
+    def close(self):
+        self._close_part()
+        return self.parts
+
+
+class ExportManager:
+    def __init__(self, directory=EXPORT_DIR, max_workers=2, ttl=EXPORT_TTL, cleanup_interval=CLEANUP_INTERVAL):
+        self.directory = directory
+        self.ttl = ttl
+        self.jobs = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        threading.Thread(target=self._clean_periodically, args=(cleanup_interval,), daemon=True, name="export-cleanup").start()
+
+    def _clean_periodically(self, interval):
+        # Exportações vencidas são apagadas mesmo que ninguém inicie outra.
+        while not self.stopped.wait(interval):
+            self.cleanup()
+
+    def start(self, client, headers, label, fmt):
+        job = ExportJob(uuid.uuid4().hex, label, fmt, user_key(headers))
+        with self.lock:
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, client, dict(headers))
+        return job
+
+    def _run(self, job, client, headers):
+        path, order_by = EXPORT_DATASETS[job.label]
+        directory = os.path.join(self.directory, job.id)
+        os.makedirs(directory, exist_ok=True)
+        base = path.strip("/").replace("api/", "").replace("/", "_")
+        writer = PartWriter(directory, base, job.fmt)
+        try:
+            for frame, total in iter_pages(client, path, headers, order_by):
+                writer.write(frame)
+                job.rows += len(frame)
+                job.total = total
+            job.parts = writer.close()
+            job.status = "done"
+        except Exception as exc:
+            writer.close()
+            job.status, job.error = "error", str(exc) or type(exc).__name__
+
+    def for_user(self, owner):
+        with self.lock:
+            return [job for job in self.jobs.values() if job.owner == owner]
+
+    def cleanup(self):
+        # Arquivos expiram depois de EXPORT_TTL, inclusive os que sobraram de um processo anterior.
+        now = time.time()
+        with self.lock:
+            expired = [job for job in self.jobs.values() if job.status != "running" and now - job.started_at > self.ttl]
+            for job in expired:
+                del self.jobs[job.id]
+            known = set(self.jobs)
+        for job in expired:
+            shutil.rmtree(os.path.join(self.directory, job.id), ignore_errors=True)
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.name not in known and entry.is_dir() and now - entry.stat().st_mtime > self.ttl:
+                shutil.rmtree(entry.path, ignore_errors=True)
+
+    def part_path(self, job, name):
+        return os.path.join(self.directory, job.id, name)
+
+
+@st.cache_resource
+def get_export_manager():
+    return ExportManager(max_workers=int(os.getenv("EXPORT_WORKERS", "2")))
+
+
+def _download(manager, job, name):
+    # O arquivo só é lido no clique (data como função), não a cada execução da lista.
+    path = manager.part_path(job, name)
+    st.download_button(f"⬇ {name}", lambda: _read(path), file_name=name, key=f"export_{job.id}_{name}", on_click="ignore")
+
+
+def _read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def export_section(client, headers):
+    manager = get_export_manager()
+    st.caption(f"O arquivo é gerado em segundo plano, página por página, e fica disponível por {EXPORT_TTL // 60} minutos.")
+    col_dataset, col_format, col_button = st.columns([3, 1, 1])
+    with col_dataset:
+        label = st.selectbox("Dataset", list(EXPORT_DATASETS), key="export_dataset")
+    with col_format:
+        formats = FORMATS if _has_pyarrow() else FORMATS[:1]
+        fmt = st.selectbox("Formato", formats, key="export_format")
+    with col_button:
+        st.write("")
+        if st.button("Exportar", key="export_start"):
+            manager.start(client, headers, label, fmt)
+
+    owner = user_key(headers)
+    _jobs_list(manager, owner, any(job.status == "running" for job in manager.for_user(owner)))
+
+
+def _jobs_list(manager, owner, polling):
+    # Enquanto houver exportação em andamento, só esta lista é reexecutada (a cada segundo).
+    @st.fragment(run_every=1 if polling else None)
+    def render():
+        jobs = sorted(manager.for_user(owner), key=lambda job: job.started_at, reverse=True)
+        if polling and not any(job.status == "running" for job in jobs):
+            # Tudo terminou: uma execução completa recria a lista sem o intervalo, e ela para de rodar.
+            st.rerun()
+        for job in jobs:
+            started = time.strftime("%H:%M:%S", time.localtime(job.started_at))
+            st.markdown(f"**{job.label}** ({job.fmt}) · iniciada às {started} · {job.rows:,} linhas".replace(",", "."))
+            if job.status == "running":
+                st.progress(job.progress)
+            elif job.status == "error":
+                st.error(f"Falha na exportação: {job.error}")
+            else:
+                for name in job.parts:
+                    _download(manager, job, name)
+        if not jobs:
+            st.caption("Nenhuma exportação nesta sessão.")
+
+    render()
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
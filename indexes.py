@@ -0,0 +1,280 @@
+import bisect
+import os
+import threading
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import requests
+import streamlit as st
+from data_fetcher import fetch_cached
+from dataset_store import get_dataset_store, user_key
+from entities import ENTITIES
+from ranking import dataset_version
+
+
+# Coluna de nome buscável; entidades sem nome próprio são buscadas pelo nome da empresa.
+NAME_FIELDS = {"empresas": "nome_empresa", "detalhes_produtos": "nome_produto", "produtos_vendidos": "nome_produto"}
+# Colunas mostradas em cada opção dos seletores, além do id (e da empresa, quando houver).
+LABEL_FIELDS = {
+    "empresas": ["nome_empresa", "diretor_empresa"],
+    "detalhes_produtos": ["nome_produto", "categoria"],
+    "produtos_vendidos": ["nome_produto", "produtos_vendidos"],
+    "faturamento": ["faturamento_mensal", "faturamento_anual"],
+    "avaliacoes": ["nota_geral_empresa", "comentario"],
+}
+PICKER_LIMIT = int(os.getenv("PICKER_LIMIT", "50"))
+# GETs de registro por entidade numa validação antes de baixar a lista inteira.
+RECORD_LOOKUPS = int(os.getenv("RECORD_LOOKUPS", "20"))
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class EntityIndex:
+    # Índices sobre um dataset do DatasetStore: id -> linha (pd.Index, hash), nome -> linhas,
+    # id_empresa -> linhas e trigramas/prefixos dos nomes distintos. refresh() refaz os mapas
+    # vetorizados e só indexa os trigramas dos nomes que entraram ou saíram.
+    def __init__(self, entity_key):
+        self.entity = ENTITIES[entity_key]
+        self.name_field = NAME_FIELDS.get(entity_key)
+        self.version = None
+        self.frame = None
+        self.ids = pd.Index([])
+        self.names = {}
+        self.sorted_names = []
+        self.grams = defaultdict(set)
+        self.by_company = {}
+
+    def refresh(self, frame):
+        frame = frame.drop_duplicates(self.entity.id_field, keep="last").reset_index(drop=True)
+        self.frame = frame
+        self.ids = pd.Index(frame[self.entity.id_field])
+        if "id_empresa" in frame.columns and self.entity.key != "empresas":
+            self.by_company = frame.groupby("id_empresa", sort=False).indices
+        if self.name_field:
+            names = frame[self.name_field].astype("string").str.lower()
+            self.names = names.groupby(names, sort=False).indices
+            current, previous = set(self.names), set(self.sorted_names)
+            for name in current - previous:
+                for gram in trigrams(name):
+                    self.grams[gram].add(name)
+            for name in previous - current:
+                for gram in trigrams(name):
+                    self.grams[gram].discard(name)
+            self.sorted_names = sorted(current)
+        self.version = dataset_version(frame)
+
+    def __contains__(self, record_id):
+        return record_id in self.ids
+
+    def positions(self, ids):
+        return self.ids.get_indexer(pd.Index(ids))
+
+    def lookup(self, column, ids):
+        # Valor de `column` para cada id (NA para ids inexistentes), sem varrer o dataset.
+        ids = pd.Series(ids)
+        positions = self.positions(ids)
+        values = self.frame[column].take(np.maximum(positions, 0)).reset_index(drop=True)
+        return values.where(positions >= 0).set_axis(ids.index)
+
+    def match_names(self, text):
+        if len(text) < 3:
+            start = bisect.bisect_left(self.sorted_names, text)
+            end = bisect.bisect_right(self.sorted_names, text + "\uffff")
+            return self.sorted_names[start:end]
+        candidates = set.intersection(*(self.grams.get(gram, set()) for gram in trigrams(text)))
+        return sorted(name for name in candidates if text in name)
+
+    def search(self, text, limit=PICKER_LIMIT):
+        positions = []
+        for name in self.match_names(text):
+            positions.extend(self.names[name][:limit - len(positions)])
+            if len(positions) >= limit:
+                break
+        return positions
+
+    def record_id(self, position):
+        return int(self.ids[position])
+
+
+class IndexRegistry:
+    def __init__(self):
+        self.indexes = {}
+        self.lock = threading.Lock()
+
+    def get(self, entity_key, frame):
+        with self.lock:
+            index = self.indexes.setdefault(entity_key, EntityIndex(entity_key))
+            version = dataset_version(frame)
+            if version is None or index.version != version:
+                index.refresh(frame)
+            return index
+
+
+def get_index_registry(store, user):
+    # Um registro por escopo, guardado no store: limitado e descartado no logout (drop_user).
+    return store.resource("index_registry", user, IndexRegistry)
+
+
+def _registry(headers):
+    return get_index_registry(get_dataset_store(), user_key(headers))
+
+
+def load_index(client, headers, entity_key, force_refresh=False, cached_only=False):
+    # cached_only: só usa o dataset se já estiver no store, sem baixar a lista inteira.
+    if cached_only:
+        data = get_dataset_store().get(user_key(headers), ENTITIES[entity_key].path)
+        return _registry(headers).get(entity_key, data) if data is not None else None
+    result = fetch_cached(client, ENTITIES[entity_key].path, headers, force_refresh=force_refresh)
+    return _registry(headers).get(entity_key, result.data) if result.ok else None
+
+
+def _format(value):
+    if pd.isna(value):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%d/%m/%Y")
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def search(client, headers, entity_key, query, limit=PICKER_LIMIT):
+    # Devolve [(id, rótulo)], ou None se o dataset não puder ser carregado. A busca por nome usa o
+    # índice da lista inteira; um id, com a lista fora do cache, é conferido com um GET do registro.
+    text = query.strip().lower()
+    index = load_index(client, headers, entity_key, cached_only=True)
+    if index is None and text.isdigit():
+        found = fetch_record(client, headers, entity_key, int(text))
+        if found is not None:
+            return [(int(text), f"#{int(text)}")] if found else []
+    if index is None:
+        index = load_index(client, headers, entity_key)
+    if index is None:
+        return None
+    positions = []
+    if text.isdigit() and int(text) in index:
+        positions.append(index.positions([int(text)])[0])
+    empresas = load_index(client, headers, "empresas") if "id_empresa" in index.frame.columns and entity_key != "empresas" else None
+    if index.name_field:
+        positions.extend(index.search(text, limit))
+    elif empresas is not None:
+        for position in empresas.search(text, limit):
+            positions.extend(index.by_company.get(empresas.record_id(position), [])[:limit - len(positions)])
+            if len(positions) >= limit:
+                break
+
+    positions = list(dict.fromkeys(int(position) for position in positions))[:limit]
+    rows = index.frame.iloc[positions]
+    companies = empresas.lookup("nome_empresa", rows["id_empresa"]) if empresas is not None else None
+    options = []
+    for number, (_, row) in enumerate(rows.iterrows()):
+        parts = [f"#{row[index.entity.id_field]}"] + [_format(row[field]) for field in LABEL_FIELDS[entity_key] if field in row]
+        if companies is not None:
+            parts.append(_format(companies.iloc[number]))
+        options.append((int(row[index.entity.id_field]), " · ".join(part for part in parts if part)))
+    return options
+
+
+def _pick(target_key):
+    choice = st.session_state.get(f"{target_key}_pick")
+    if choice is not None:
+        st.session_state[target_key] = choice
+
+
+def id_picker(client, headers, entity_key, target_key, label):
+    # Busca fora do formulário (o st.form só reexecuta ao enviar); a escolha preenche o campo de id.
+    query = st.text_input(f"Buscar {label}", key=f"{target_key}_search", placeholder="Parte do nome ou o ID")
+    if not query.strip():
+        return
+    options = search(client, headers, entity_key, query)
+    if options is None:
+        st.caption("Não foi possível carregar os dados para a busca.")
+    elif not options:
+        st.caption("Nenhum resultado.")
+    else:
+        labels = dict(options)
+        st.selectbox(f"Resultados ({len(labels)})", list(labels), index=None, format_func=labels.get,
+                     key=f"{target_key}_pick", on_change=_pick, args=(target_key,), placeholder="Selecione para preencher o ID")
+
+
+def fetch_record(client, headers, entity_key, record_id):
+    # GET do próprio registro: confere um id sem baixar a lista inteira.
+    # True/False se a API respondeu 200/404; None se não deu para saber (erro, rota inexistente).
+    try:
+        response = client.get(f"{ENTITIES[entity_key].path}{record_id}", headers=headers)
+    except requests.exceptions.RequestException:
+        return None
+    return {200: True, 404: False}.get(response.status_code)
+
+
+def reference_checker(client, headers, entity_key):
+    # check(payload, record_id=None) -> erros das chaves estrangeiras (e do próprio id, em updates),
+    # conferidas antes de qualquer POST/PUT: no índice do dataset se ele já estiver em cache, senão
+    # com um GET do registro. Só depois de RECORD_LOOKUPS GETs numa entidade (ex.: importação em
+    # lote), ou se a API não tiver a rota do registro, a lista inteira é baixada e indexada; um id
+    # ausente dela recarrega o dataset uma vez, para não recusar registros criados depois da busca.
+    entity = ENTITIES[entity_key]
+    refs = {field.name: field.ref for field in entity.fields if field.ref}
+    loaded, refreshed, known, lookups = {}, set(), set(), defaultdict(int)
+
+    def exists(key, record_id):
+        if (key, record_id) in known:
+            return True
+        if key not in loaded:
+            cached = load_index(client, headers, key, cached_only=True)
+            if cached is not None and record_id in cached:
+                return True
+            if lookups[key] < RECORD_LOOKUPS:
+                lookups[key] += 1
+                found = fetch_record(client, headers, key, record_id)
+                if found is not None:
+                    if found:
+                        known.add((key, record_id))
+                    return found
+            loaded[key] = load_index(client, headers, key)
+        if loaded[key] is None or record_id in loaded[key]:
+            return True
+        if key not in refreshed:
+            refreshed.add(key)
+            loaded[key] = load_index(client, headers, key, force_refresh=True)
+            return loaded[key] is None or record_id in loaded[key]
+        return False
+
+    def check(payload, record_id=None):
+        errors = []
+        if record_id is not None and not exists(entity_key, record_id):
+            errors.append(f"{entity.id_field}: {record_id} não existe em {entity.label}")
+        for name, ref in refs.items():
+            value = payload.get(name)
+            if value is not None and not exists(ref, value):
+                errors.append(f"{name}: {value} não existe em {ENTITIES[ref].label}")
+        return errors
+
+    return check
+
+
+def company_names(client, headers, via_faturamento=False):
+    # Decorador para paginated_table: junta nome_empresa às linhas da página exibida usando os
+    # datasets do store (os mesmos das abas Listar/Faturamento), sem requisição por linha.
+    # Vendas chegam à empresa pelo faturamento, que só é usado se já estiver em cache: baixar o
+    # faturamento inteiro só para rotular uma página de vendas custaria mais que a própria página.
+    def decorate(rows):
+        empresas = load_index(client, headers, "empresas")
+        if empresas is None or "nome_empresa" in rows.columns:
+            return rows
+        if via_faturamento:
+            faturamento = load_index(client, headers, "faturamento", cached_only=True)
+            if faturamento is None or "id_faturamento" not in rows.columns:
+                return rows
+            anchor, company_ids = "id_faturamento", faturamento.lookup("id_empresa", rows["id_faturamento"])
+        elif "id_empresa" in rows.columns:
+            anchor, company_ids = "id_empresa", rows["id_empresa"]
+        else:
+            return rows
+        rows = rows.copy(deep=False)
+        rows.insert(rows.columns.get_loc(anchor) + 1, "nome_empresa", empresas.lookup("nome_empresa", company_ids).to_numpy())
+        return rows
+
+    return decorate
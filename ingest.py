@@ -0,0 +1,151 @@
+import io
+import json
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # Com copy-on-write, cópias rasas entregues às sessões não alteram o frame armazenado.
+    pd.set_option("mode.copy_on_write", True)
+
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+# Tipos explícitos por endpoint; colunas fora do esquema mantêm o tipo inferido.
+SCHEMAS = {
+    "/api/empresas/": {
+        "id_empresa": "Int64",
+        "nome_empresa": "string",
+        "diretor_empresa": "string",
+    },
+    "/api/faturamento/": {
+        "id_faturamento": "Int64",
+        "id_empresa": "Int64",
+        "faturamento_mensal": "float64",
+        "faturamento_anual": "float64",
+    },
+    "/api/produtos_vendidos/": {
+        "id_venda": "Int64",
+        "id_faturamento": "Int64",
+        "nome_produto": "category",
+        "produtos_vendidos": "Int32",
+    },
+    "/api/detalhes_produtos/": {
+        "id_produto": "Int64",
+        "id_empresa": "Int64",
+        "nome_produto": "string",
+        "categoria": "category",
+        "preco_unitario": "float64",
+        "margem_lucro_percentual": "float32",
+        "data_lancamento": "datetime64[ns]",
+    },
+    "/api/avaliacoes/": {
+        "id_avaliacao": "Int64",
+        "id_empresa": "Int64",
+        "nota_diretor": "Int8",
+        "nota_geral_empresa": "Int8",
+        "comentario": "string",
+    },
+    "/api/insights/": {
+        "nome_empresa": "string",
+        "faturamento_total_anual": "float64",
+        "media_nota_empresa": "float32",
+    },
+    "/api/media_notas_diretor/": {
+        "diretor_empresa": "string",
+        "media_nota": "float32",
+    },
+    "/api/pioresdiretores/": {
+        "diretor_empresa": "string",
+        "faturamento_anual": "float64",
+    },
+    "/api/melhoresdiretores/": {
+        "diretor_empresa": "string",
+        "faturamento_anual": "float64",
+    },
+    "/api/insights/maior_lucro/": {
+        "nome_produto": "string",
+        "nome_empresa": "category",
+        "faturamento_total": "float64",
+    },
+    "/api/faturamento_mensal_por_empresa/": {
+        "nome_empresa": "string",
+        "faturamento_mensal": "float64",
+    },
+}
+
+
+def accept_header():
+    if pa is None:
+        return "application/json"
+    return f"{ARROW_STREAM}, {PARQUET};q=0.9, application/json;q=0.8"
+
+
+def decode_json(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _typed_column(values, dtype):
+    if dtype.startswith("datetime"):
+        return pd.to_datetime(values, errors="coerce")
+    if dtype in ("string", "category"):
+        return pd.Series(values, dtype="string").astype(dtype)
+    return pd.to_numeric(pd.Series(values), errors="coerce").astype(dtype)
+
+
+def apply_schema(df, schema):
+    for column, dtype in schema.items():
+        if column in df.columns and str(df[column].dtype) != dtype:
+            df[column] = _typed_column(df[column], dtype).values
+    return df
+
+
+def frame_from_records(records, schema):
+    # Só as colunas que vieram na resposta são tipadas; sem registros, o frame vazio mantém as do esquema.
+    columns = list(records[0]) if records else list(schema)
+
+    data = {}
+    for column in columns:
+        # Uma coluna por vez: só existe uma lista Python intermediária de cada vez.
+        values = [record.get(column) for record in records]
+        data[column] = _typed_column(values, schema[column]) if column in schema else values
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_frame(path, content, content_type=""):
+    # Devolve um DataFrame tipado. Respostas paginadas ({"items", "total"}) guardam o total em attrs.
+    schema = SCHEMAS.get(path, {})
+    content_type = content_type.split(";")[0].strip()
+
+    if content_type == ARROW_STREAM and pa is not None:
+        with pa.ipc.open_stream(content) as reader:
+            return apply_schema(reader.read_all().to_pandas(), schema)
+    if content_type == PARQUET:
+        return apply_schema(pd.read_parquet(io.BytesIO(content)), schema)
+
+    payload = decode_json(content)
+    total = None
+    if isinstance(payload, dict) and "items" in payload:
+        total = payload.get("total")
+        payload = payload["items"]
+    if not isinstance(payload, list) or not all(isinstance(record, dict) for record in payload[:1]):
+        raise ValueError(f"Resposta sem lista de registros em {path}")
+    df = frame_from_records(payload, schema)
+    if total is not None:
+        df.attrs["total"] = total
+    return df
+
+
+def frame_nbytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
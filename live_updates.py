@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+import pandas as pd
+import requests
+import streamlit as st
+from aggregations import get_insights_engine
+from api_client import match_prefix
+from data_fetcher import fetch_cached, fetch_one
+from dataset_store import WRITE_INVALIDATES, get_dataset_store, user_key
+from entities import ENTITIES
+from ingest import SCHEMAS, apply_schema, frame_from_records
+from metrics import metric_path, record
+from review_analytics import REVIEWS_PATH, get_review_analytics
+from table_view import paginated_table
+
+
+# Tabelas que recebem linhas novas com frequência: endpoint -> campo id (cursor do delta).
+LIVE_PATHS = {ENTITIES[key].path: ENTITIES[key].id_field for key in ("produtos_vendidos", "faturamento", "avaliacoes")}
+
+# GET {path}?since_id=<maior id em cache> deve devolver só as linhas com id maior.
+DELTA_PARAM = os.getenv("LIVE_DELTA_PARAM", "since_id")
+# Stream SSE opcional; cada evento: data: {"path": "/api/avaliacoes/", "rows": [{...}, ...]}
+EVENTS_PATH = os.getenv("LIVE_EVENTS_PATH", "")
+SSE_RECONNECT = 5
+# Sem nenhum evento nesse tempo a conexão é refeita: é quando o stream percebe o logout, a falta
+# de sessões ativas e um token renovado.
+SSE_READ_TIMEOUT = 30
+
+
+class LiveFeed:
+    # Um por processo: as sessões abertas compartilham o mesmo polling (no máximo uma busca por
+    # tabela e escopo a cada intervalo) e, se configurado, uma conexão SSE por escopo (EventStream).
+    def __init__(self, store, events_path=EVENTS_PATH):
+        self.store = store
+        self.events_path = events_path
+        self.polled = {}
+        self.cursors = {}
+        # Caminhos cujo backend ignora o parâmetro de delta (devolve a lista inteira).
+        self.no_delta = set()
+        self.lock = threading.Lock()
+
+    def poll(self, client, path, headers, interval, paged=False):
+        user = user_key(headers)
+        scope = self.store.scope_for(user)
+        if self._listening(client, user, headers, interval):
+            return
+        now = time.monotonic()
+        with self.lock:
+            if now - self.polled.get((scope, path), float("-inf")) < interval:
+                return
+            self.polled[(scope, path)] = now
+
+        id_field = LIVE_PATHS[path]
+        current = self.store.get(user, path)
+        if current is None:
+            # Lista inteira expirada: a própria tabela recarrega. Paginada no servidor: sonda o maior id.
+            if paged:
+                self._probe(client, path, headers, scope, id_field)
+        elif path in self.no_delta:
+            # Sem delta no backend: recarga condicional (com o cache em disco, 304 se nada mudou).
+            fetch_cached(client, path, headers, force_refresh=True)
+        else:
+            cursor = current[id_field].max()
+            result = fetch_one(client, path, headers, {DELTA_PARAM: int(cursor)} if pd.notna(cursor) else None)
+            if not result.ok:
+                return
+            if pd.notna(cursor) and (result.data[id_field] <= cursor).any():
+                # O parâmetro foi ignorado: a resposta já é a lista completa.
+                self.no_delta.add(path)
+                self.store.put(user, path, result.data)
+                return
+            self.apply(user, path, result.data)
+
+    def _probe(self, client, path, headers, scope, id_field):
+        # Só há páginas em cache: basta saber se o maior id mudou para descartá-las.
+        result = fetch_one(client, path, headers, {"order_by": f"-{id_field}", "limit": 1, "offset": 0})
+        if not result.ok or result.data.empty or len(result.data) > 1:
+            # len > 1: o backend ignorou o limit, então a tabela não é paginada no servidor.
+            return
+        latest = result.data[id_field].max()
+        with self.lock:
+            previous = self.cursors.get((scope, path))
+            self.cursors[(scope, path)] = latest
+        if previous is not None and latest > previous:
+            self.store.invalidate([path])
+
+    def apply(self, user, path, delta):
+        # Linhas novas ou alteradas entram no frame em cache; sem frame, as páginas são descartadas.
+        if delta.empty:
+            return
+        id_field = LIVE_PATHS[path]
+        current = self.store.get(user, path)
+        if current is None:
+            self.store.invalidate([path])
+        else:
+            merged = pd.concat([current[~current[id_field].isin(delta[id_field])], delta], ignore_index=True)
+            merged.attrs = {}
+            self.store.put(user, path, apply_schema(merged, SCHEMAS.get(path, {})))
+        # Agregados do servidor ficam desatualizados; o motor local recebe as linhas uma a uma.
+        self.store.invalidate([p for p in match_prefix(WRITE_INVALIDATES, path, []) if p != path])
+        engine = get_insights_engine(self.store, user)
+        for row in delta.to_dict("records"):
+            engine.apply_write(path, row, row[id_field])
+        if path == REVIEWS_PATH:
+            get_review_analytics(self.store, user).apply_rows(delta)
+        record("live", path=metric_path(path), rows=len(delta))
+
+    # --- Server-sent events -----------------------------------------------------
+
+    def _listening(self, client, user, headers, interval):
+        # A conexão do escopo fica no store: sai no logout (drop_user) junto com o resto do usuário.
+        if not self.events_path:
+            return False
+        stream = self.store.resource("live_events", user, lambda: EventStream(self, client))
+        return stream.touch(headers, interval)
+
+    def _on_event(self, user, data):
+        try:
+            event = json.loads(data)
+        except ValueError:
+            return
+        path = event.get("path")
+        if path in LIVE_PATHS and event.get("rows"):
+            self.apply(user, path, frame_from_records(event["rows"], SCHEMAS.get(path, {})))
+
+
+class EventStream:
+    # Conexão SSE de um escopo. Usa o token mais recente das sessões que fazem poll e fecha no
+    # logout (close, via drop_user) ou quando nenhuma sessão a usa há três intervalos.
+    def __init__(self, feed, client):
+        self.feed = feed
+        self.client = client
+        self.headers = {}
+        self.expires_at = 0.0
+        self.thread = None
+        self.closed = threading.Event()
+        self.lock = threading.Lock()
+
+    def touch(self, headers, interval):
+        # Devolve True se a conexão já estava aberta: a sessão não precisa fazer polling.
+        with self.lock:
+            self.headers = headers
+            self.expires_at = time.monotonic() + 3 * interval
+            if self.thread is not None and self.thread.is_alive():
+                return True
+            self.thread = threading.Thread(target=self.run, daemon=True, name="live-sse")
+            self.thread.start()
+            return False
+
+    def close(self):
+        # A thread para no próximo evento ou, no máximo, em SSE_READ_TIMEOUT; nada é aplicado depois disso.
+        self.closed.set()
+
+    def active(self):
+        return bool(self.feed.events_path) and not self.closed.is_set() and time.monotonic() < self.expires_at
+
+    def run(self):
+        while self.active():
+            headers = self.headers
+            try:
+                # Direto na Session: ApiClient.request lê o corpo inteiro, o que travaria no stream.
+                with self.client.session.get(f"{self.client.base_url}{self.feed.events_path}", headers={**headers, "Accept": "text/event-stream"},
+                                             stream=True, timeout=(self.client.timeout_for(self.feed.events_path)[0], SSE_READ_TIMEOUT)) as response:
+                    if response.status_code in (404, 405):
+                        # O backend não tem stream: polling para todos, sem novas tentativas.
+                        self.feed.events_path = ""
+                        return
+                    # Outro status (ex.: 401 com o token vencido): tenta de novo com o token da próxima sessão.
+                    if response.status_code == 200:
+                        self._read(response, headers)
+            except requests.exceptions.RequestException:
+                pass
+            self.closed.wait(SSE_RECONNECT)
+
+    def _read(self, response, headers):
+        user = user_key(headers)
+        for line in response.iter_lines(chunk_size=None):
+            if not self.active() or self.headers.get("Authorization") != headers.get("Authorization"):
+                return
+            if line.startswith(b"data:"):
+                self.feed._on_event(user, line[5:])
+
+
+@st.cache_resource
+def get_live_feed():
+    return LiveFeed(get_dataset_store())
+
+
+def live_table(client, path, headers, key, interval=None, decorate=None):
+    # Com intervalo, só a tabela (um fragmento) é reexecutada a cada `interval` segundos.
+    if not interval:
+        return paginated_table(client, path, headers, key=key, decorate=decorate)
+
+    @st.fragment(run_every=interval)
+    def render():
+        # Na primeira renderização a tabela acabou de ser buscada (e ainda não sabemos se é paginada).
+        if st.session_state.get(f"{key}_live_started"):
+            paged = not st.session_state.get(f"{key}_client_paging", False)
+            get_live_feed().poll(client, path, headers, interval, paged)
+        st.session_state[f"{key}_live_started"] = True
+        return paginated_table(client, path, headers, key=key, decorate=decorate)
+
+    return render()
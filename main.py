@@ -1,15 +1,51 @@
 import streamlit as st
 import requests
 import os
+import sys
 from dotenv import load_dotenv
-from app_manager import manage_companies, manage_product_details, manage_reviews, manage_sold_products, manage_faturamento
-import pandas as pd
-import altair as alt
+from api_client import get_api_client
+from auth import SESSION_COOKIE, SESSION_IDLE_TTL, get_auth_manager
+from data_fetcher import fetch_all, show_offline_notice
+from dataset_store import get_dataset_store, session_id, user_key
+from metrics import panel_enabled, perf_panel, start_trace
+from resilience import show_api_health
+
+# pandas, numpy e altair só são importados depois do login, na seção que os usa
+# (ver os imports dentro do bloco do usuário logado): a tela de login abre sem eles.
 
 
 load_dotenv()
 
 API_BASE_URL = os.getenv("API_BASE_URL")
+LIVE_INTERVAL = int(os.getenv("LIVE_REFRESH_SECONDS", "15"))
+
+# Cada seção só busca os endpoints de que precisa; só a seção aberta é carregada.
+# As tabelas paginadas buscam suas próprias páginas (ver table_view).
+SECTION_ENDPOINTS = {
+    "Listar": ["/api/empresas/"],
+    "Faturamento": [],
+    "Prod. Vendidos": [],
+    "Detalhes Prod.": [],
+    "Avaliações": [],
+    "Insights": [
+        "/api/insights/",
+        "/api/media_notas_diretor/",
+        "/api/empresas/",
+        "/api/insights/maior_lucro/",
+        "/api/faturamento_mensal_por_empresa/",
+    ],
+    "Gerenciar": [],
+    "Exportar": [],
+}
+
+# Funções de app_manager, importado só quando "Gerenciar" é aberto.
+MANAGE_SECTIONS = {
+    "Empresas": "manage_companies",
+    "Detalhes Prod.": "manage_product_details",
+    "Prod. Vendidos": "manage_sold_products",
+    "Avaliações": "manage_reviews",
+    "Faturamento": "manage_faturamento",
+}
 
 st.set_page_config(
     page_title="Dashboard de Empresas",
@@ -17,57 +53,76 @@ st.set_page_config(
     layout="wide",
 )
 
+trace = start_trace()
+client = get_api_client(API_BASE_URL)
+auth = get_auth_manager(API_BASE_URL)
+
 st.title("📊 Dashboard Integrado de Empresas")
 
 
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
-if "access_token" not in st.session_state:
-    st.session_state.access_token = ""
-if "refresh_token" not in st.session_state:
-    st.session_state.refresh_token = ""
 if "user_email" not in st.session_state:
     st.session_state.user_email = ""
 
 
-def check_login_state():
-    query_params = st.query_params
-    if "logged_in" in query_params and query_params["logged_in"] == "true":
-        st.session_state.logged_in = True
-        st.session_state.access_token = query_params["access_token"]
-        st.session_state.user_email = query_params["user_email"]
+def _session_cookie(value, max_age):
+    # O Streamlit não expõe a resposta HTTP: o cookie é gravado pelo navegador (sem HttpOnly), só
+    # para este site (SameSite=Strict) e, em HTTPS, só em conexões seguras. O handle é url-safe.
+    st.html(f"""<script>document.cookie = "{SESSION_COOKIE}={value}; Max-Age={max_age}; Path=/; SameSite=Strict"
+        + (location.protocol === "https:" ? "; Secure" : "");</script>""", unsafe_allow_javascript=True)
 
-check_login_state()
+
+def check_login_state():
+    # O handle da sessão fica em session_state e, para sobreviver a um recarregamento, no cookie
+    # SESSION_COOKIE; os tokens ficam no servidor. A URL não autentica: parâmetros antigos
+    # (inclusive ?sid=) são só removidos.
+    for legacy in ("logged_in", "access_token", "user_email", "sid"):
+        if legacy in st.query_params:
+            del st.query_params[legacy]
+    session = auth.resume(st.session_state.get("auth_handle") or st.context.cookies.get(SESSION_COOKIE))
+    if session is None:
+        st.session_state.logged_in = False
+        return None
+    st.session_state.logged_in = True
+    st.session_state.auth_handle = session.handle
+    st.session_state.user_email = session.email
+    return session
+
+auth_session = check_login_state()
 
 def login(email, password):
-    url = f"{API_BASE_URL}/auth/token"
-    data = {"username": email, "password": password}
-    
     try:
-        response = requests.post(url, data=data)
-        if response.status_code == 200:
-            tokens = response.json()
+        session, response = auth.login(email, password)
+        if session is not None:
             st.session_state.logged_in = True
-            st.session_state.access_token = tokens["access_token"]
-            st.session_state.refresh_token = tokens["refresh_token"]
+            st.session_state.auth_handle = session.handle
             st.session_state.user_email = email
             st.success("Login realizado com sucesso!")
-            st.query_params.logged_in = "true"
-            st.query_params.access_token = st.session_state.access_token
-            st.query_params.user_email = st.session_state.user_email
             st.rerun()
         else:
             st.error("Credenciais inválidas. Verifique seu e-mail e senha.")
-    except requests.exceptions.ConnectionError:
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
         st.error("Erro de conexão. Verifique se a sua API está rodando.")
 
 def logout():
+    if auth_session is not None:
+        get_dataset_store().drop_user(auth.logout(auth_session), session_id())
     st.session_state.clear()
-    st.query_params.clear()
+    st.session_state.forget_session_cookie = True
     st.rerun()
 
 
+if auth_session is not None and not auth.ensure_fresh(auth_session):
+    get_dataset_store().drop_user(auth.logout(auth_session), session_id())
+    auth_session = None
+    st.session_state.logged_in = False
+    st.session_state.forget_session_cookie = True
+    st.warning("Sua sessão expirou. Faça login novamente.")
+
 if not st.session_state.logged_in:
+    if st.session_state.pop("forget_session_cookie", False):
+        _session_cookie("", 0)
     st.subheader("Faça login para continuar")
     with st.form(key="login_form"):
         email = st.text_input("E-mail")
@@ -82,104 +137,121 @@ if not st.session_state.logged_in:
         register_password = st.text_input("Senha para cadastro", type="password")
         register_button = st.form_submit_button("Cadastrar")
         if register_button:
-            register_url = f"{API_BASE_URL}/auth/register"
             register_data = {"email": register_email, "password": register_password}
             try:
-                response = requests.post(register_url, json=register_data)
+                response = client.post("/auth/register", json=register_data)
                 if response.status_code == 200:
                     st.success("Usuário cadastrado com sucesso! Agora você pode fazer o login.")
                 else:
                     st.error(f"Erro ao cadastrar: {response.json().get('detail', 'Erro desconhecido')}")
-            except requests.exceptions.ConnectionError:
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
                 st.error("Erro de conexão. Verifique se a sua API está rodando.")
 
 
 else:
     st.sidebar.header(f"Bem-vindo, {st.session_state.user_email}!")
     st.sidebar.button("Sair", on_click=logout)
+    if st.session_state.get("session_cookie") != auth_session.handle:
+        # Uma vez por sessão do navegador (após o login ou ao retomar): o recarregamento acha o cookie.
+        _session_cookie(auth_session.handle, int(SESSION_IDLE_TTL))
+        st.session_state.session_cookie = auth_session.handle
     
     st.header("Dashboard e Gerenciamento de Dados")
     
-    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    headers = auth_session.headers
+
+    from aggregations import LOCAL_ENDPOINTS, engine_for, local_aggregation_default, local_insights
+    from table_view import paginated_table
     
+    st.sidebar.checkbox("Calcular insights localmente", value=local_aggregation_default(), key="local_insights")
+    live = st.sidebar.checkbox("Atualização automática", key="live_updates", help="Busca só as linhas novas de faturamento, vendas e avaliações.")
+    live_interval = st.sidebar.number_input("Intervalo (segundos)", min_value=2, value=LIVE_INTERVAL, step=1, key="live_interval", disabled=not live)
+    live_interval = live_interval if live else None
+
     if st.button("Atualizar Dados"):
-        st.rerun()
+        get_dataset_store().refresh_user(user_key(headers))
+        from review_analytics import analytics_for
+
+        engine_for(headers).invalidate()
+        analytics_for(headers).invalidate()
+
+    section = st.radio("Seção", list(SECTION_ENDPOINTS), horizontal=True, key="section", label_visibility="collapsed")
 
-    tab_list, tab_faturamento, tab_produtos_vendidos, tab_detalhes_produtos, tab_avaliacoes, tab_insights, tab_gerenciar = st.tabs(["Listar", "Faturamento", "Prod. Vendidos", "Detalhes Prod.", "Avaliações", "Insights", "Gerenciar"])
+    if section == "Insights" and st.session_state.local_insights:
+        results = fetch_all(client, [path for path in SECTION_ENDPOINTS[section] if path not in LOCAL_ENDPOINTS], headers)
+        results.update(local_insights(client, headers))
+    else:
+        results = fetch_all(client, SECTION_ENDPOINTS[section], headers)
+    show_offline_notice(results.values())
 
-    with tab_list:
+    if section == "Listar":
         st.subheader("Lista de Empresas")
-        url = f"{API_BASE_URL}/api/empresas/"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            empresas = response.json()
-            if empresas:
-                st.dataframe(empresas)
+        result = results["/api/empresas/"]
+        if result.ok:
+            empresas = result.data
+            if not empresas.empty:
+                st.dataframe(empresas, hide_index=True)
             else:
                 st.warning("Nenhuma empresa cadastrada. Use a aba 'Gerenciar' para adicionar uma.")
         else:
-            st.error("Não foi possível carregar os dados das empresas. Tente fazer o login novamente.")
+            st.error(f"Não foi possível carregar os dados das empresas. Tente fazer o login novamente. ({result.error})")
 
-    with tab_faturamento:
+    elif section == "Faturamento":
         st.subheader("Faturamento Geral")
-        url = f"{API_BASE_URL}/api/faturamento/"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            st.dataframe(response.json())
-        else:
-            st.error("Não foi possível carregar os dados de faturamento. Tente fazer o login novamente.")
+        from live_updates import live_table
+
+        result = live_table(client, "/api/faturamento/", headers, key="faturamento", interval=live_interval)
+        if not result.ok:
+            st.error(f"Não foi possível carregar os dados de faturamento. Tente fazer o login novamente. ({result.error})")
 
-    with tab_produtos_vendidos:
+    elif section == "Prod. Vendidos":
         st.subheader("Produtos Vendidos")
-        url = f"{API_BASE_URL}/api/produtos_vendidos/"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            st.dataframe(response.json())
-        else:
-            st.error("Não foi possível carregar os dados de produtos vendidos. Tente fazer o login novamente.")
+        from indexes import company_names
+        from live_updates import live_table
+
+        result = live_table(client, "/api/produtos_vendidos/", headers, key="produtos_vendidos", interval=live_interval, decorate=company_names(client, headers, via_faturamento=True))
+        if not result.ok:
+            st.error(f"Não foi possível carregar os dados de produtos vendidos. Tente fazer o login novamente. ({result.error})")
     
-    with tab_detalhes_produtos:
+    elif section == "Detalhes Prod.":
         st.subheader("Detalhes dos Produtos")
-        url = f"{API_BASE_URL}/api/detalhes_produtos/"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            st.dataframe(response.json())
-        else:
-            st.error("Não foi possível carregar os detalhes dos produtos. Tente fazer o login novamente.")
+        result = paginated_table(client, "/api/detalhes_produtos/", headers, key="detalhes_produtos")
+        if not result.ok:
+            st.error(f"Não foi possível carregar os detalhes dos produtos. Tente fazer o login novamente. ({result.error})")
     
-    with tab_avaliacoes:
+    elif section == "Avaliações":
         st.subheader("Avaliações de Diretores e Empresas")
-        url = f"{API_BASE_URL}/api/avaliacoes/"
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            st.dataframe(response.json())
-        else:
-            st.error("Não foi possível carregar as avaliações. Tente fazer o login novamente.")
+        from indexes import company_names
+        from live_updates import live_table
+
+        result = live_table(client, "/api/avaliacoes/", headers, key="avaliacoes", interval=live_interval, decorate=company_names(client, headers))
+        if not result.ok:
+            st.error(f"Não foi possível carregar as avaliações. Tente fazer o login novamente. ({result.error})")
+
+        st.subheader("Análise das Avaliações")
+        # Histogramas, percentis e índice dos comentários são montados só quando a análise é aberta.
+        if st.checkbox("Mostrar análise", key="review_analytics"):
+            from review_analytics import review_analytics_view
+
+            review_analytics_view(client, headers)
+
+    elif section == "Insights":
+        from charts import bar_chart
+        from ranking import best_row, director_revenue, top_rows
 
-    with tab_insights:
         st.subheader("Insights de Negócio")
 
         col1, col2, col3 = st.columns(3)
         
-      
-        url_insights = f"{API_BASE_URL}/api/insights/"
-        response_insights = requests.get(url_insights, headers=headers)
-        
+        result_insights = results["/api/insights/"]
+        result_notas_diretores = results["/api/media_notas_diretor/"]
 
-        url_notas_diretores = f"{API_BASE_URL}/api/media_notas_diretor/"
-        response_notas_diretores = requests.get(url_notas_diretores, headers=headers)
-
-        if response_insights.status_code == 200 and response_notas_diretores.status_code == 200:
-            insights_data = response_insights.json()
-            notas_data = response_notas_diretores.json()
+        if result_insights.ok and result_notas_diretores.ok:
+            df_insights = result_insights.data
+            df_notas_diretores = result_notas_diretores.data
             
-            if insights_data and notas_data:
-                df_insights = pd.DataFrame(insights_data)
-                df_notas_diretores = pd.DataFrame(notas_data)
-                
-
-                df_sorted_faturamento = df_insights.sort_values(by="faturamento_total_anual", ascending=False)
-                empresa_maior_faturamento = df_sorted_faturamento.iloc[0]
+            if not df_insights.empty and not df_notas_diretores.empty:
+                empresa_maior_faturamento = best_row(df_insights, "faturamento_total_anual")
                 with col1:
                     st.metric(
                         label=f" Empresa com Maior Faturamento Anual", 
@@ -188,7 +260,7 @@ else:
                     )
                 
 
-                melhor_diretor_info = df_notas_diretores.sort_values(by="media_nota", ascending=False).iloc[0]
+                melhor_diretor_info = best_row(df_notas_diretores, "media_nota")
                 with col2:
                     st.metric(
                         label=" Melhor Diretor (por Nota)",
@@ -211,135 +283,107 @@ else:
                 
                 with col1_anual:
                     st.subheader("Faturamento Total Anual por Empresa")
-                    chart1 = alt.Chart(df_insights).mark_bar().encode(
-                        x=alt.X('nome_empresa', title='Empresa'),
-                        y=alt.Y('faturamento_total_anual', title='Faturamento Anual (R$)'),
-                        tooltip=['nome_empresa', alt.Tooltip('faturamento_total_anual', format=',.2f')]
-                    ).properties(
-                        title='Faturamento Total Anual por Empresa'
-                    )
+                    chart1 = bar_chart(df_insights, "nome_empresa", "faturamento_total_anual", "Empresa", "Faturamento Anual (R$)", "Faturamento Total Anual por Empresa")
                     st.altair_chart(chart1, use_container_width=True)
 
                 with col2_anual:
                     st.subheader("Média da Nota por Empresa")
-                    chart2 = alt.Chart(df_insights).mark_bar().encode(
-                        x=alt.X('nome_empresa', title='Empresa'),
-                        y=alt.Y('media_nota_empresa', title='Média da Nota'),
-                        tooltip=['nome_empresa', alt.Tooltip('media_nota_empresa', format='.2f')]
-                    ).properties(
-                        title='Média da Nota por Empresa'
-                    )
+                    chart2 = bar_chart(df_insights, "nome_empresa", "media_nota_empresa", "Empresa", "Média da Nota", "Média da Nota por Empresa", y_format=".2f", agg="mean")
                     st.altair_chart(chart2, use_container_width=True)
             else:
                 st.warning("Nenhum insight de empresa disponível.")
         else:
-            st.warning("Não foi possível carregar os insights. Tente fazer o login novamente.")
+            failed = [f"{r.path}: {r.error}" for r in (result_insights, result_notas_diretores) if not r.ok]
+            st.warning(f"Não foi possível carregar os insights. Tente fazer o login novamente. ({'; '.join(failed)})")
         
         st.markdown("---")
         
         col1_piores, col2_lucro, col3_melhores = st.columns(3)
         
+        # Melhores/piores diretores saem do mesmo ranking sobre insights + empresas,
+        # sem chamar /api/melhoresdiretores/ e /api/pioresdiretores/.
+        result_empresas = results["/api/empresas/"]
+        result_lucro = results["/api/insights/maior_lucro/"]
 
-        url_piores = f"{API_BASE_URL}/api/pioresdiretores/"
-        response_piores = requests.get(url_piores, headers=headers)
-        
-
-        url_lucro = f"{API_BASE_URL}/api/insights/maior_lucro/"
-        response_lucro = requests.get(url_lucro, headers=headers)
-
-
-        url_melhores = f"{API_BASE_URL}/api/melhoresdiretores/"
-        response_melhores = requests.get(url_melhores, headers=headers)
-        
-        url_faturamento_mensal = f"{API_BASE_URL}/api/faturamento_mensal_por_empresa/"
-        response_faturamento_mensal = requests.get(url_faturamento_mensal, headers=headers)
-
-        if response_piores.status_code == 200 and response_lucro.status_code == 200 and response_melhores.status_code == 200 and response_faturamento_mensal.status_code == 200:
-            piores_data = response_piores.json()
-            lucro_data = response_lucro.json()
-            melhores_data = response_melhores.json()
-            faturamento_mensal_data = response_faturamento_mensal.json()
+        if result_insights.ok and result_empresas.ok and result_lucro.ok:
+            df_diretores = director_revenue(result_insights.data, result_empresas.data)
+            df_piores = top_rows(df_diretores, "faturamento_anual", largest=False)
+            df_lucro = result_lucro.data
+            df_melhores = top_rows(df_diretores, "faturamento_anual")
 
             with col1_piores:
                 st.subheader("Piores Diretores")
-                if piores_data:
-                    df_piores = pd.DataFrame(piores_data)
-                    chart3 = alt.Chart(df_piores).mark_bar().encode(
-                        x=alt.X('diretor_empresa', title='Diretor'),
-                        y=alt.Y('faturamento_anual', title='Faturamento Anual (R$)'),
-                        tooltip=['diretor_empresa', alt.Tooltip('faturamento_anual', format=',.2f')]
-                    ).properties(
-                        title='Piores Diretores (Pelo Faturamento)'
-                    )
+                if not df_piores.empty:
+                    chart3 = bar_chart(df_piores, "diretor_empresa", "faturamento_anual", "Diretor", "Faturamento Anual (R$)", "Piores Diretores (Pelo Faturamento)")
                     st.altair_chart(chart3, use_container_width=True)
                 else:
                     st.warning("Nenhum dado de piores diretores disponível.")
 
             with col2_lucro:
                 st.subheader("Produtos de Maior Lucro")
-                if lucro_data:
-                    df_lucro = pd.DataFrame(lucro_data)
-                    chart4 = alt.Chart(df_lucro).mark_bar().encode(
-                        x=alt.X('nome_produto', title='Produto'),
-                        y=alt.Y('faturamento_total', title='Faturamento Total (R$)'),
-                        tooltip=['nome_produto', 'nome_empresa', alt.Tooltip('faturamento_total', format=',.2f')]
-                    ).properties(
-                        title='Produtos de Maior Lucro'
-                    )
+                if not df_lucro.empty:
+                    chart4 = bar_chart(df_lucro, "nome_produto", "faturamento_total", "Produto", "Faturamento Total (R$)", "Produtos de Maior Lucro", extra_tooltip=["nome_empresa"])
                     st.altair_chart(chart4, use_container_width=True)
                 else:
                     st.warning("Nenhum dado de maior lucro disponível.")
 
             with col3_melhores:
                 st.subheader("Melhores Diretores")
-                if melhores_data:
-                    df_melhores = pd.DataFrame(melhores_data)
-                    chart5 = alt.Chart(df_melhores).mark_bar().encode(
-                        x=alt.X('diretor_empresa', title='Diretor'),
-                        y=alt.Y('faturamento_anual', title='Faturamento Anual (R$)'),
-                        tooltip=['diretor_empresa', alt.Tooltip('faturamento_anual', format=',.2f')]
-                    ).properties(
-                        title='Melhores Diretores (Pelo Faturamento)'
-                    )
+                if not df_melhores.empty:
+                    chart5 = bar_chart(df_melhores, "diretor_empresa", "faturamento_anual", "Diretor", "Faturamento Anual (R$)", "Melhores Diretores (Pelo Faturamento)")
                     st.altair_chart(chart5, use_container_width=True)
                 else:
                     st.warning("Nenhum dado de melhores diretores disponível.")
         else:
-            st.warning("Não foi possível carregar os dados de diretores e lucros. Tente fazer o login novamente.")
+            failed = [f"{r.path}: {r.error}" for r in (result_insights, result_empresas, result_lucro) if not r.ok]
+            st.warning(f"Não foi possível carregar os dados de diretores e lucros. Tente fazer o login novamente. ({'; '.join(failed)})")
 
         st.markdown("---")
         
         st.subheader("Análise de Faturamento Mensal")
-        if faturamento_mensal_data:
-            df_faturamento_mensal = pd.DataFrame(faturamento_mensal_data)
-            chart_mensal = alt.Chart(df_faturamento_mensal).mark_bar().encode(
-                x=alt.X('nome_empresa', title='Empresa'),
-                y=alt.Y('faturamento_mensal', title='Faturamento Mensal (R$)'),
-                tooltip=['nome_empresa', alt.Tooltip('faturamento_mensal', format=',.2f')]
-            ).properties(
-                title='Faturamento Mensal por Empresa'
-            )
+        result_faturamento_mensal = results["/api/faturamento_mensal_por_empresa/"]
+        if not result_faturamento_mensal.ok:
+            st.warning(f"Não foi possível carregar o faturamento mensal. Tente fazer o login novamente. ({result_faturamento_mensal.error})")
+        elif not result_faturamento_mensal.data.empty:
+            df_faturamento_mensal = result_faturamento_mensal.data
+            chart_mensal = bar_chart(df_faturamento_mensal, "nome_empresa", "faturamento_mensal", "Empresa", "Faturamento Mensal (R$)", "Faturamento Mensal por Empresa")
             st.altair_chart(chart_mensal, use_container_width=True)
         else:
             st.warning("Nenhum dado de faturamento mensal disponível.")
 
+        st.subheader("Faturamento ao Longo do Tempo")
+        # Os dados brutos de faturamento e vendas só são baixados quando a série é aberta.
+        if st.checkbox("Mostrar série temporal", key="timeseries"):
+            from timeseries import revenue_timeseries
+
+            result_empresas_ts = results["/api/empresas/"]
+            if result_empresas_ts.ok:
+                revenue_timeseries(client, headers, result_empresas_ts.data)
+            else:
+                st.warning(f"Não foi possível carregar as empresas. ({result_empresas_ts.error})")
 
-    with tab_gerenciar:
+    elif section == "Gerenciar":
         st.header("Gerenciamento de Dados")
         
-        gerenciar_empresas_tab, gerenciar_detalhes_produtos_tab, gerenciar_produtos_vendidos_tab, gerenciar_avaliacoes_tab, gerenciar_faturamento_tab = st.tabs(["Empresas", "Detalhes Prod.", "Prod. Vendidos", "Avaliações", "Faturamento"])
+        manage_section = st.radio("Entidade", list(MANAGE_SECTIONS), horizontal=True, key="manage_section", label_visibility="collapsed")
+        import app_manager
 
-        with gerenciar_empresas_tab:
-            manage_companies(API_BASE_URL, headers)
-        
-        with gerenciar_detalhes_produtos_tab:
-            manage_product_details(API_BASE_URL, headers)
-        
-        with gerenciar_produtos_vendidos_tab:
-            manage_sold_products(API_BASE_URL, headers)
+        getattr(app_manager, MANAGE_SECTIONS[manage_section])(API_BASE_URL, headers)
 
-        with gerenciar_avaliacoes_tab:
-            manage_reviews(API_BASE_URL, headers)
-            
-        with gerenciar_faturamento_tab:
-            manage_faturamento(API_BASE_URL, headers)
+    elif section == "Exportar":
+        st.header("Exportar Dados")
+        from export import export_section
+
+        export_section(client, headers)
+
+    if client.resilience is not None:
+        show_api_health(client.resilience)
+    # Depois das seções: o envio feito num formulário nesta execução já aparece na fila. A fila
+    # só existe depois que algum formulário importou write_queue; antes disso não há o que mostrar.
+    if "write_queue" in sys.modules:
+        from write_queue import write_queue_sidebar
+
+        write_queue_sidebar(headers)
+
+    if panel_enabled(st.session_state.user_email):
+        perf_panel(trace)
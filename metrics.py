@@ -0,0 +1,177 @@
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import streamlit as st
+
+
+# Painel visível para todos (PERF_PANEL=1) ou só para os e-mails em PERF_ADMINS.
+PANEL_ENABLED = os.getenv("PERF_PANEL", "0") == "1"
+PANEL_ADMINS = {email.strip() for email in os.getenv("PERF_ADMINS", "").split(",") if email.strip()}
+# Quantas execuções do script ficam guardadas por sessão para exportação.
+HISTORY = int(os.getenv("PERF_HISTORY", "20"))
+
+# Execução atual do script; as threads do pool recebem a mesma via bind_trace().
+_current = contextvars.ContextVar("perf_trace", default=None)
+
+
+def metric_path(path):
+    # "/api/empresas/12" -> "/api/empresas/{id}": evita uma série por registro no Prometheus.
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path.split("?", 1)[0])
+
+
+class MetricsRegistry:
+    # Contadores acumulados do processo, exportados no formato de texto do Prometheus.
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.lock = threading.Lock()
+
+    def observe(self, event):
+        kind = event["kind"]
+        with self.lock:
+            if kind == "http":
+                labels = (("method", event["method"]), ("path", event["path"]), ("status", str(event["status"])))
+                self.counters[("api_requests_total", labels)] += 1
+                self.counters[("api_request_seconds_total", labels)] += event["seconds"]
+                self.counters[("api_response_bytes_total", labels)] += event["bytes"]
+            elif kind == "cache":
+                name = "dataset_cache_hits_total" if event["hit"] else "dataset_cache_misses_total"
+                self.counters[(name, (("path", event["path"]),))] += 1
+            elif kind == "stage":
+                labels = (("stage", event["stage"]),)
+                self.counters[("stage_calls_total", labels)] += 1
+                self.counters[("stage_seconds_total", labels)] += event["seconds"]
+            elif kind == "live":
+                self.counters[("live_rows_merged_total", (("path", event["path"]),))] += event["rows"]
+            elif kind == "resilience":
+                self.counters[("api_resilience_events_total", (("event", event["event"]), ("path", event["path"])))] += 1
+
+    def prometheus(self):
+        with self.lock:
+            items = sorted(self.counters.items())
+        lines, typed = [], set()
+        for (name, labels), value in items:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE dashboard_{name} counter")
+            label_text = ",".join(f'{key}="{value_}"' for key, value_ in labels)
+            lines.append(f"dashboard_{name}{{{label_text}}} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    # Eventos de uma execução do script: chamadas à API, acertos de cache e etapas caras.
+    def __init__(self, registry, rerun):
+        self.registry = registry
+        self.rerun = rerun
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.events = []
+        self.lock = threading.Lock()
+
+    def record(self, kind, **fields):
+        event = {"rerun": self.rerun, "kind": kind, "at": round(time.perf_counter() - self.start, 4), **fields}
+        with self.lock:
+            self.events.append(event)
+        self.registry.observe(event)
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.start
+
+    def frame(self):
+        import pandas as pd
+
+        with self.lock:
+            return pd.DataFrame(self.events)
+
+
+def record(kind, **fields):
+    trace = _current.get()
+    if trace is not None:
+        trace.record(kind, **fields)
+
+
+@contextmanager
+def timed(stage, name=""):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record("stage", stage=stage, name=name, seconds=round(time.perf_counter() - start, 6))
+
+
+def timed_call(stage, name, fn):
+    with timed(stage, name):
+        return fn()
+
+
+def bind_trace(fn):
+    # Para tarefas enviadas ao pool: o ThreadPoolExecutor não propaga contextvars.
+    trace = _current.get()
+
+    def run(*args, **kwargs):
+        token = _current.set(trace)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+
+    return run
+
+
+@st.cache_resource
+def get_metrics_registry():
+    return MetricsRegistry()
+
+
+def start_trace():
+    runs = st.session_state.setdefault("_perf_runs", deque(maxlen=HISTORY))
+    st.session_state._perf_rerun = st.session_state.get("_perf_rerun", 0) + 1
+    trace = Trace(get_metrics_registry(), st.session_state._perf_rerun)
+    runs.append(trace)
+    _current.set(trace)
+    return trace
+
+
+def panel_enabled(email):
+    return PANEL_ENABLED or email in PANEL_ADMINS
+
+
+def export_jsonl(traces):
+    lines = []
+    for trace in traces:
+        lines.extend(json.dumps(event, default=str) for event in list(trace.events))
+        if trace.elapsed is not None:
+            lines.append(json.dumps({"rerun": trace.rerun, "kind": "rerun", "started_at": trace.started_at, "seconds": round(trace.elapsed, 6)}))
+    return "\n".join(lines) + "\n"
+
+
+def perf_panel(trace):
+    # Chamado no fim do script, para incluir tudo o que a execução atual fez.
+    trace.finish()
+    events = trace.frame()
+    with st.sidebar.expander("⏱️ Desempenho"):
+        st.metric("Execução do script", f"{trace.elapsed * 1000:.0f} ms")
+        if events.empty:
+            st.caption("Nenhuma chamada registrada nesta execução.")
+        else:
+            http = events[events["kind"] == "http"] if "method" in events else events.iloc[0:0]
+            cache = events[events["kind"] == "cache"] if "hit" in events else events.iloc[0:0]
+            stages = events[events["kind"] == "stage"] if "stage" in events else events.iloc[0:0]
+            col_api, col_cache = st.columns(2)
+            col_api.metric("Chamadas à API", len(http), f"{http['bytes'].sum() / 1024:.0f} KB" if not http.empty else None, delta_color="off")
+            col_cache.metric("Cache", f"{int(cache['hit'].sum())}/{len(cache)}" if not cache.empty else "-")
+            if not http.empty:
+                st.caption("API")
+                st.dataframe(http[["method", "path", "status", "seconds", "bytes"]].sort_values("seconds", ascending=False), hide_index=True, use_container_width=True)
+            if not stages.empty:
+                st.caption("Etapas")
+                summary = stages.groupby("stage")["seconds"].agg(["count", "sum", "max"]).sort_values("sum", ascending=False)
+                st.dataframe(summary, use_container_width=True)
+        st.download_button("Exportar execuções (JSONL)", export_jsonl(st.session_state._perf_runs), file_name="desempenho.jsonl", key="perf_export_jsonl")
+        st.download_button("Exportar métricas (Prometheus)", trace.registry.prometheus(), file_name="metrics.prom", key="perf_export_prom")
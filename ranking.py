@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from dataset_store import VERSION_ATTR
+from metrics import timed_call
+
+
+TOP_N = 5
+
+
+class VersionedCache:
+    # Resultados derivados (rankings, gráficos) por versão de dataset; a versão vem do DatasetStore.
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        if key is None:
+            return compute()
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+
+@st.cache_resource
+def get_ranking_cache():
+    return VersionedCache()
+
+
+def dataset_version(df):
+    # A versão é única por put no store e não muda depois: a chave sai em O(1), sem ler as linhas.
+    # Frames derivados herdam os attrs, então quem deriva dá uma versão própria ao resultado
+    # (top_rows, director_revenue, InsightsEngine) ou limpa os attrs (live_updates, write_queue).
+    return df.attrs.get(VERSION_ATTR)
+
+
+def versioned_key(name, frames, *args):
+    versions = tuple(dataset_version(df) for df in frames)
+    if any(version is None for version in versions):
+        return None
+    return (name, versions) + args
+
+
+def top_rows(df, column, n=TOP_N, largest=True):
+    # Seleção O(n) (argmax/heap) em vez de ordenar o frame inteiro.
+    key = versioned_key("top_rows", [df], column, n, largest)
+
+    def compute():
+        values = pd.to_numeric(df[column], errors="coerce")
+        if n == 1:
+            if values.notna().sum() == 0:
+                return df.iloc[0:0]
+            array = values.to_numpy(dtype="float64", na_value=np.nan)
+            position = np.nanargmax(array) if largest else np.nanargmin(array)
+            result = df.iloc[[position]]
+        else:
+            ranked = values.nlargest(n) if largest else values.nsmallest(n)
+            result = df.loc[ranked.index]
+        # O resultado herdaria a versão do frame de origem; recebe uma versão própria.
+        result.attrs = {**result.attrs, VERSION_ATTR: key}
+        return result
+
+    return get_ranking_cache().get_or_compute(key, lambda: timed_call("ranking", f"top_rows:{column}", compute))
+
+
+def best_row(df, column, largest=True):
+    rows = top_rows(df, column, n=1, largest=largest)
+    return rows.iloc[0] if not rows.empty else None
+
+
+def director_revenue(df_insights, df_empresas):
+    # Faturamento anual por diretor: junta insights (por empresa) com o diretor de cada empresa.
+    key = versioned_key("director_revenue", [df_insights, df_empresas])
+
+    def compute():
+        diretores = df_empresas[["nome_empresa", "diretor_empresa"]].drop_duplicates("nome_empresa")
+        merged = df_insights[["nome_empresa", "faturamento_total_anual"]].merge(diretores, on="nome_empresa", how="inner")
+        grouped = merged.groupby("diretor_empresa", observed=True, sort=False)["faturamento_total_anual"].sum()
+        result = pd.DataFrame({"diretor_empresa": grouped.index.astype("string"), "faturamento_anual": grouped.values})
+        if key is not None:
+            # Versão derivada, para que top_rows também cacheie o ranking de diretores.
+            result.attrs[VERSION_ATTR] = key
+        return result
+
+    return get_ranking_cache().get_or_compute(key, lambda: timed_call("ranking", "director_revenue", compute))
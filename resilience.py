@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+import requests
+import streamlit as st
+from metrics import metric_path, record
+from state_backend import LockTimeout
+
+
+# Token bucket: requisições por segundo e rajada, para o processo todo e por usuário (token); 0 desliga.
+GLOBAL_RATE = float(os.getenv("API_RATE_LIMIT", "100"))
+GLOBAL_BURST = int(os.getenv("API_RATE_BURST", "200"))
+USER_RATE = float(os.getenv("API_USER_RATE_LIMIT", "20"))
+USER_BURST = int(os.getenv("API_USER_RATE_BURST", "40"))
+# Espera máxima por um token; acima disso a chamada é recusada (backpressure).
+MAX_WAIT = float(os.getenv("API_RATE_MAX_WAIT", "2"))
+
+# Chamadas simultâneas à API no processo e por endpoint: um endpoint lento ocupa no máximo
+# PER_ENDPOINT threads, e quem passar de QUEUE_TIMEOUT esperando uma vaga desiste.
+MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))
+PER_ENDPOINT = int(os.getenv("API_ENDPOINT_CONCURRENCY", "4"))
+QUEUE_TIMEOUT = float(os.getenv("API_QUEUE_TIMEOUT", "5"))
+
+# Circuit breaker por endpoint: abre após FAILURES falhas seguidas (conexão, timeout, 5xx) e
+# recusa chamadas por COOLDOWN segundos; depois deixa passar uma chamada de teste.
+FAILURES = int(os.getenv("API_BREAKER_FAILURES", "5"))
+COOLDOWN = float(os.getenv("API_BREAKER_COOLDOWN", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class ApiUnavailable(requests.exceptions.ConnectionError):
+    # Chamada recusada antes de sair do processo. Subclasse de ConnectionError: os tratamentos
+    # existentes ("Erro de conexão") e o fallback offline do data_fetcher continuam valendo.
+    pass
+
+
+class CircuitOpen(ApiUnavailable):
+    pass
+
+
+class RateLimited(ApiUnavailable):
+    pass
+
+
+class Overloaded(ApiUnavailable):
+    pass
+
+
+def endpoint_for(path):
+    # "/api/empresas/12" e "/api/empresas/" dividem o mesmo breaker e o mesmo limite.
+    return metric_path(path).replace("{id}", "").rstrip("/") + "/"
+
+
+def _reserve(state, now, rate, burst):
+    # Devolve (estado novo, espera em segundos). O token é descontado já: quem espera fica na fila.
+    tokens, updated_at = state or (burst, now)
+    tokens = min(burst, tokens + (now - updated_at) * rate) - 1
+    return (tokens, now), (0.0 if tokens >= 0 else -tokens / rate)
+
+
+class RateLimiter:
+    # Com backend compartilhado (STATE_BACKEND), os baldes valem para todas as réplicas.
+    def __init__(self, backend=None, rate=GLOBAL_RATE, burst=GLOBAL_BURST, user_rate=USER_RATE, user_burst=USER_BURST, max_wait=MAX_WAIT):
+        self.backend = backend if backend is not None and backend.shared else None
+        self.limits = {"global": (rate, burst), "user": (user_rate, user_burst)}
+        self.max_wait = max_wait
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, user=None):
+        # Espera o token (até max_wait) ou levanta RateLimited sem consumir nada.
+        keys = [("global", "global")] + ([("user", user)] if user else [])
+        waits = []
+        for kind, key in keys:
+            wait = self._take(kind, key)
+            if wait is None:
+                for taken in keys[:len(waits)]:
+                    self._give_back(*taken)
+                record("resilience", event="rate_limited", path=kind)
+                raise RateLimited("Muitas requisições à API; tente novamente em instantes.")
+            waits.append(wait)
+        if max(waits) > 0:
+            time.sleep(max(waits))
+
+    def _take(self, kind, key):
+        rate, burst = self.limits[kind]
+        if rate <= 0:
+            return 0.0
+
+        def update(state):
+            new_state, wait = _reserve(state, time.time(), rate, burst)
+            return (new_state, wait) if wait <= self.max_wait else (state, None)
+
+        return self._update(kind, key, update, ttl=burst / rate + 60)
+
+    def _give_back(self, kind, key):
+        rate, burst = self.limits[kind]
+        if rate > 0:
+            self._update(kind, key, lambda state: ((min(burst, state[0] + 1), state[1]) if state else state, None), ttl=burst / rate + 60)
+
+    def _update(self, kind, key, fn, ttl):
+        name = f"{kind}:{key}"
+        if self.backend is None:
+            with self.lock:
+                self.buckets[name], result = fn(self.buckets.get(name))
+                return result
+        try:
+            with self.backend.lock("ratelimit_lock", name, ttl=1, timeout=1):
+                stored = self.backend.get("ratelimit", name)
+                state, result = fn(tuple(json.loads(stored)) if stored else None)
+                if state is not None:
+                    self.backend.set("ratelimit", name, json.dumps(state).encode(), ttl=ttl)
+                return result
+        except LockTimeout:
+            # Balde ocupado demais para atualizar: a chamada fica sem token (RateLimited) e um
+            # token a devolver se perde, o que só deixa o limite mais conservador.
+            return None
+
+
+class CircuitBreaker:
+    def __init__(self, failures=FAILURES, cooldown=COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.count = 0
+        self.opened_at = None
+        self.last_error = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                # Uma chamada de teste por vez; as demais continuam falhando rápido.
+                self.probing = True
+                return True
+            return False
+
+    def success(self):
+        with self.lock:
+            self.state, self.count, self.probing, self.last_error = CLOSED, 0, False, None
+
+    def failure(self, error):
+        with self.lock:
+            self.count += 1
+            self.last_error = error
+            if self.state == HALF_OPEN or self.count >= self.failures:
+                self.state, self.opened_at, self.probing = OPEN, time.monotonic(), False
+                return True
+            return False
+
+    def release_probe(self):
+        with self.lock:
+            self.probing = False
+
+    def retry_in(self):
+        with self.lock:
+            return 0.0 if self.state != OPEN else max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+
+class Resilience:
+    # Envolve cada chamada do ApiClient: breaker do endpoint, rate limit e vagas de concorrência.
+    def __init__(self, backend=None, max_concurrency=MAX_CONCURRENCY, per_endpoint=PER_ENDPOINT, queue_timeout=QUEUE_TIMEOUT,
+                 failures=FAILURES, cooldown=COOLDOWN, limiter=None):
+        self.limiter = limiter or RateLimiter(backend)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.endpoint_slots = defaultdict(lambda: threading.BoundedSemaphore(per_endpoint))
+        self.queue_timeout = queue_timeout
+        self.breakers = defaultdict(lambda: CircuitBreaker(failures, cooldown))
+        self.lock = threading.Lock()
+
+    def _breaker(self, endpoint):
+        with self.lock:
+            return self.breakers[endpoint]
+
+    def _endpoint_slot(self, endpoint):
+        with self.lock:
+            return self.endpoint_slots[endpoint]
+
+    def call(self, path, headers, send):
+        endpoint = endpoint_for(path)
+        breaker = self._breaker(endpoint)
+        if not breaker.allow():
+            record("resilience", event="circuit_open", path=endpoint)
+            raise CircuitOpen(f"API instável em {endpoint}: chamadas suspensas por {breaker.retry_in():.0f} s.")
+        try:
+            authorization = (headers or {}).get("Authorization")
+            self.limiter.acquire(hashlib.sha256(authorization.encode()).hexdigest() if authorization else None)
+            response = self._send(endpoint, send)
+        except ApiUnavailable:
+            # Recusada antes de chegar à API: não diz nada sobre a saúde do endpoint.
+            breaker.release_probe()
+            raise
+        except requests.exceptions.RequestException as exc:
+            self._failed(breaker, endpoint, type(exc).__name__)
+            raise
+        if response.status_code >= 500:
+            self._failed(breaker, endpoint, f"HTTP {response.status_code}")
+        else:
+            breaker.success()
+        return response
+
+    def _send(self, endpoint, send):
+        endpoint_slot = self._endpoint_slot(endpoint)
+        if not endpoint_slot.acquire(timeout=self.queue_timeout):
+            record("resilience", event="overloaded", path=endpoint)
+            raise Overloaded(f"Muitas chamadas em andamento para {endpoint}.")
+        try:
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                record("resilience", event="overloaded", path="global")
+                raise Overloaded("Muitas chamadas à API em andamento.")
+            try:
+                return send()
+            finally:
+                self.slots.release()
+        finally:
+            endpoint_slot.release()
+
+    def _failed(self, breaker, endpoint, error):
+        if breaker.failure(error):
+            record("resilience", event="circuit_opened", path=endpoint)
+
+    def status(self):
+        # Endpoints com breaker aberto ou em teste: [(endpoint, estado, segundos até testar, último erro)].
+        with self.lock:
+            breakers = list(self.breakers.items())
+        return [(endpoint, breaker.state, breaker.retry_in(), breaker.last_error) for endpoint, breaker in sorted(breakers) if breaker.state != CLOSED]
+
+
+def show_api_health(resilience):
+    # Na barra lateral, só quando algum endpoint estiver com o breaker aberto ou em teste.
+    for endpoint, state, retry_in, error in resilience.status():
+        if state == OPEN:
+            st.sidebar.error(f"🔌 {endpoint} suspenso após falhas ({error}). Nova tentativa em {retry_in:.0f} s; exibindo dados em cache.")
+        else:
+            st.sidebar.warning(f"🔌 {endpoint} instável: testando a recuperação.")
@@ -0,0 +1,478 @@
+import itertools
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import streamlit as st
+from data_fetcher import fetch_cached
+from dataset_store import get_dataset_store, user_key
+from entities import ENTITIES, get_field
+from indexes import load_index
+from metrics import timed, timed_call
+from ranking import VersionedCache
+
+
+REVIEWS_PATH = ENTITIES["avaliacoes"].path
+SCORES = {"Nota geral da empresa": "nota_geral_empresa", "Nota do diretor": "nota_diretor"}
+# Notas são inteiros de 0 a MAX_SCORE: histogramas são contagens por valor, e percentis e médias saem deles.
+MAX_SCORE = int(get_field("avaliacoes", "nota_geral_empresa").max)
+PERCENTILES = (25, 50, 75, 90)
+
+REBUILD_INTERVAL = float(os.getenv("REVIEWS_REBUILD_INTERVAL", "600"))
+TOP_KEYWORDS = int(os.getenv("REVIEWS_TOP_KEYWORDS", "20"))
+ROLLING_MAX_POINTS = int(os.getenv("REVIEWS_ROLLING_MAX_POINTS", "600"))
+# Avaliações reindexadas desde o build (fração do total, com um mínimo) a partir das quais o índice é refeito.
+COMPACT_RATIO = 0.1
+COMPACT_MIN = 1000
+# Versões únicas entre todas as instâncias: chave dos resultados em cache (get_review_cache).
+VERSIONS = itertools.count(1)
+
+# Termo = sequência de 3+ letras; o texto é quebrado em tudo que não for letra (mesma regra
+# no build, via Arrow/RE2, e nas escritas incrementais, via re).
+SEPARATOR = r"[^\p{L}]+"
+SEPARATOR_RE = re.compile(r"[\W\d_]+")
+MIN_TERM = 3
+STOPWORDS = frozenset("""
+    que com uma para por dos das nos nas não mais mas foi ser são tem muito muita pelo pela
+    isso esse essa este esta aos como sem seu sua ele ela eles elas está estão bem the and
+""".split())
+
+
+def _text(value):
+    return value if isinstance(value, str) else None
+
+
+def terms_of(text):
+    if not isinstance(text, str):
+        return []
+    return sorted({term for term in SEPARATOR_RE.split(text.lower()) if len(term) >= MIN_TERM and term not in STOPWORDS})
+
+
+def _grown(buffer, size):
+    # Buffer com espaço para mais uma linha: a capacidade dobra quando enche, e inserir n linhas
+    # custa O(n) no total (np.append/np.vstack copiariam o array inteiro a cada linha).
+    if size < len(buffer):
+        return buffer
+    grown = np.zeros((max(16, 2 * len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:size] = buffer[:size]
+    return grown
+
+
+def _split_arrow(uniques):
+    # (comentário, código do termo) para cada termo, e o vocabulário; None sem o pyarrow.
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return None
+    parts = pc.split_pattern_regex(pa.array(np.asarray(uniques, dtype=object), type=pa.string()), SEPARATOR)
+    words, parents = pc.list_flatten(parts), pc.list_parent_indices(parts)
+    keep = pc.and_(pc.greater_equal(pc.utf8_length(words), MIN_TERM), pc.invert(pc.is_in(words, pa.array(sorted(STOPWORDS)))))
+    encoded = pc.dictionary_encode(pc.filter(words, keep))
+    parents = pc.filter(parents, keep).to_numpy().astype(np.int64)
+    return parents, encoded.indices.to_numpy().astype(np.int64), encoded.dictionary.to_pylist()
+
+
+def _split_pandas(uniques):
+    words = pd.Series(np.asarray(uniques, dtype=object)).str.split(SEPARATOR_RE).explode()
+    words = words[(words.str.len() >= MIN_TERM) & ~words.isin(STOPWORDS)]
+    term_codes, vocabulary = pd.factorize(words)
+    return words.index.to_numpy(dtype=np.int64), term_codes.astype(np.int64), list(vocabulary)
+
+
+def tokenize(comments):
+    # Termos distintos de cada comentário em CSR: (termos por avaliação, códigos, vocabulário).
+    # A quebra roda uma vez por comentário distinto (no Arrow, se houver); o resto é numpy.
+    codes, uniques = pd.factorize(pd.Series(comments, dtype="string").fillna("").str.lower())
+    parents, term_codes, vocabulary = _split_arrow(uniques) or _split_pandas(uniques)
+    distinct = ~pd.Series(parents * max(len(vocabulary), 1) + term_codes).duplicated().to_numpy()
+    term_codes, parents = term_codes[distinct], parents[distinct]
+    unique_lengths = np.bincount(parents, minlength=len(uniques))
+    lengths = unique_lengths[codes]
+    # Posição, na lista por comentário distinto, de cada termo de cada avaliação.
+    offsets = np.repeat((np.cumsum(unique_lengths) - unique_lengths)[codes] - (np.cumsum(lengths) - lengths), lengths)
+    offsets += np.arange(int(lengths.sum()))
+    return lengths, term_codes[offsets].astype(np.int32), vocabulary
+
+
+class ReviewAnalytics:
+    # Histogramas de notas por empresa, índice invertido dos comentários e as notas em ordem de
+    # cadastro, construídos uma vez a partir de /api/avaliacoes/. Escritas (formulário, live)
+    # entram incrementalmente; o índice é refeito a cada rebuild_interval para reconciliar.
+    def __init__(self, rebuild_interval=REBUILD_INTERVAL):
+        self.rebuild_interval = rebuild_interval
+        self.built_at = None
+        # Muda a cada build/escrita; chave dos resultados em cache.
+        self.version = next(VERSIONS)
+        self.lock = threading.RLock()
+
+    def needs_build(self):
+        return self.built_at is None or time.monotonic() - self.built_at > self.rebuild_interval
+
+    def invalidate(self):
+        self.built_at = None
+
+    def build(self, avaliacoes):
+        df = avaliacoes.dropna(subset=["id_avaliacao"]).drop_duplicates("id_avaliacao", keep="last")
+        df = df.sort_values("id_avaliacao", kind="stable", ignore_index=True)
+        ids = df["id_avaliacao"].to_numpy("int64")
+        company_codes, company_ids = pd.factorize(df["id_empresa"].astype("Int64"), use_na_sentinel=True)
+        scores = {column: self._scores(df[column]) for column in SCORES.values()}
+        hist = {column: self._histogram(company_codes, values, len(company_ids)) for column, values in scores.items()}
+
+        comments = df["comentario"].reset_index(drop=True) if "comentario" in df else pd.Series([None] * len(df), dtype="string")
+        lengths, tokens, vocabulary = tokenize(comments)
+        rows = np.repeat(np.arange(len(df), dtype=np.int64), lengths)
+        order = np.argsort(tokens, kind="stable")
+        term_counts = np.bincount(tokens, minlength=len(vocabulary)).astype(np.int64)
+
+        with self.lock:
+            self.ids = ids
+            self.base_positions = pd.Index(ids)
+            self.new_positions = {}
+            self.company = company_codes.astype(np.int32)
+            self.company_ids = [int(company) for company in company_ids]
+            self.company_code = {company: code for code, company in enumerate(self.company_ids)}
+            self.scores = scores
+            self.hist = hist
+            # Índice direto (avaliação -> termos) e invertido (termo -> avaliações), ambos CSR.
+            self.lengths = lengths
+            self.tokens = tokens
+            self.token_ptr = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+            self.postings = rows[order]
+            self.term_ptr = np.concatenate([[0], np.cumsum(term_counts)]).astype(np.int64)
+            self.terms = vocabulary
+            self.vocabulary = {term: code for code, term in enumerate(self.terms)}
+            self.term_counts = term_counts
+            self.comments = comments
+            # Arrays que crescem com as escritas: os atributos acima são fatias destes buffers.
+            self.buffers = {"ids": ids, "company": self.company, "term_counts": term_counts,
+                            **{("scores", column): values for column, values in scores.items()},
+                            **{("hist", column): values for column, values in hist.items()}}
+            # Camada incremental: avaliações novas ou com comentário alterado desde o build.
+            self.stale = set()
+            self.new_tokens = {}
+            self.new_postings = defaultdict(list)
+            self.new_comments = {}
+            self.built_at = time.monotonic()
+            self.version = next(VERSIONS)
+
+    @staticmethod
+    def _scores(column):
+        values = pd.to_numeric(column, errors="coerce").to_numpy("float64", na_value=np.nan)
+        valid = (values >= 0) & (values <= MAX_SCORE)
+        return np.where(valid, values, -1).astype(np.int8)
+
+    @staticmethod
+    def _histogram(company_codes, values, n_companies):
+        valid = (company_codes >= 0) & (values >= 0)
+        flat = company_codes[valid].astype(np.int64) * (MAX_SCORE + 1) + values[valid]
+        return np.bincount(flat, minlength=n_companies * (MAX_SCORE + 1)).reshape(n_companies, MAX_SCORE + 1)
+
+    # --- Atualização incremental -------------------------------------------------
+
+    def apply_write(self, record, record_id=None):
+        record_id = record.get("id_avaliacao", record_id)
+        if record_id is None:
+            # POST sem o id na resposta: não há como indexar; refaz no próximo uso.
+            self.invalidate()
+            return
+        self.apply_rows(pd.DataFrame([dict(record, id_avaliacao=record_id)]))
+
+    def apply_rows(self, rows):
+        if self.built_at is None or rows.empty:
+            return
+        with self.lock:
+            try:
+                # Notas convertidas uma vez para o lote inteiro, não uma Series por linha.
+                scores = {column: self._scores(rows[column]) for column in self.scores if column in rows}
+                for i, row in enumerate(rows.to_dict("records")):
+                    self._upsert(row, {column: values[i] for column, values in scores.items()})
+            except (KeyError, TypeError, ValueError):
+                self.invalidate()
+            if len(self.stale) + len(self.new_tokens) > max(COMPACT_MIN, COMPACT_RATIO * len(self.ids)):
+                self.invalidate()
+            self.version = next(VERSIONS)
+
+    def _position(self, record_id):
+        position = self.new_positions.get(record_id)
+        if position is None and record_id in self.base_positions:
+            position = self.base_positions.get_loc(record_id)
+        return position
+
+    def _extend(self, name, values, fill):
+        # `values` com uma linha a mais (= fill), no buffer de mesmo nome.
+        buffer = self.buffers[name] = _grown(self.buffers[name], len(values))
+        buffer[len(values)] = fill
+        return buffer[:len(values) + 1]
+
+    def _company(self, company_id):
+        if company_id is None or pd.isna(company_id):
+            return -1
+        company_id = int(company_id)
+        if company_id not in self.company_code:
+            self.company_code[company_id] = len(self.company_ids)
+            self.company_ids.append(company_id)
+            for column in self.hist:
+                self.hist[column] = self._extend(("hist", column), self.hist[column], 0)
+        return self.company_code[company_id]
+
+    def _count(self, position, sign):
+        company = self.company[position]
+        if company < 0:
+            return
+        for column, values in self.scores.items():
+            if values[position] >= 0:
+                self.hist[column][company, values[position]] += sign
+
+    def _upsert(self, row, scores):
+        record_id = int(row["id_avaliacao"])
+        position = self._position(record_id)
+        if position is None:
+            position = len(self.ids)
+            self.new_positions[record_id] = position
+            self.ids = self._extend("ids", self.ids, record_id)
+            self.company = self._extend("company", self.company, -1)
+            for column in self.scores:
+                self.scores[column] = self._extend(("scores", column), self.scores[column], -1)
+            old_comment, changed = None, True
+        else:
+            self._count(position, -1)
+            old_comment = self.comment(position)
+            changed = "comentario" in row and _text(row["comentario"]) != _text(old_comment)
+
+        if "id_empresa" in row:
+            self.company[position] = self._company(row["id_empresa"])
+        for column, value in scores.items():
+            self.scores[column][position] = value
+        self._count(position, 1)
+
+        if changed:
+            for code in self._tokens(position):
+                self.term_counts[code] -= 1
+            if position < len(self.comments):
+                self.stale.add(position)
+            codes = np.array([self._term(term) for term in terms_of(row.get("comentario"))], dtype=np.int32)
+            self.new_tokens[position] = codes
+            self.new_comments[position] = row.get("comentario")
+            for code in codes:
+                self.term_counts[code] += 1
+                self.new_postings[code].append(position)
+
+    def _term(self, term):
+        if term not in self.vocabulary:
+            self.vocabulary[term] = len(self.terms)
+            self.terms.append(term)
+            self.term_counts = self._extend("term_counts", self.term_counts, 0)
+        return self.vocabulary[term]
+
+    def _tokens(self, position):
+        if position in self.new_tokens:
+            return self.new_tokens[position]
+        if position < len(self.lengths):
+            return self.tokens[self.token_ptr[position]:self.token_ptr[position + 1]]
+        return np.zeros(0, dtype=np.int32)
+
+    def comment(self, position):
+        if position in self.new_comments:
+            return self.new_comments[position]
+        return self.comments.iat[position] if position < len(self.comments) else None
+
+    # --- Consultas -----------------------------------------------------------------
+
+    def _codes(self, companies):
+        return [self.company_code[company] for company in companies if company in self.company_code]
+
+    def _mask(self, companies):
+        return np.isin(self.company, self._codes(companies)) if companies else None
+
+    def histogram(self, column, companies=None):
+        with self.lock:
+            hist = self.hist[column][self._codes(companies)] if companies else self.hist[column]
+            return pd.DataFrame({"nota": np.arange(MAX_SCORE + 1), "avaliacoes": hist.sum(axis=0)})
+
+    def summary(self, column, companies=None):
+        # Por empresa: quantidade, média e percentis, direto das linhas do histograma.
+        with self.lock:
+            codes = self._codes(companies) if companies else list(range(len(self.company_ids)))
+            hist = self.hist[column][codes]
+            ids = np.array(self.company_ids, dtype=np.int64)[codes]
+        counts = hist.sum(axis=1)
+        keep = counts > 0
+        hist, counts, ids = hist[keep], counts[keep], ids[keep]
+        cumulative = hist.cumsum(axis=1)
+        summary = pd.DataFrame({"id_empresa": ids, "avaliacoes": counts, "media": (hist @ np.arange(MAX_SCORE + 1)) / counts})
+        for q in PERCENTILES:
+            summary[f"p{q}"] = (cumulative >= np.ceil(counts * q / 100)[:, None]).argmax(axis=1)
+        return summary.sort_values(["avaliacoes", "id_empresa"], ascending=[False, True], ignore_index=True)
+
+    def rolling(self, column, window, companies=None):
+        # Média móvel das últimas `window` notas, na ordem de cadastro (id).
+        with self.lock:
+            values, ids, mask = self.scores[column], self.ids, self._mask(companies)
+        valid = values >= 0 if mask is None else (values >= 0) & mask
+        series, ids = values[valid].astype("float64"), ids[valid]
+        window = max(1, min(window, len(series)))
+        if not len(series):
+            return pd.DataFrame({"id_avaliacao": [], "media_movel": []})
+        total = np.cumsum(series)
+        total[window:] = total[window:] - total[:-window]
+        return pd.DataFrame({"id_avaliacao": ids[window - 1:], "media_movel": total[window - 1:] / window})
+
+    def keywords(self, companies=None, n=TOP_KEYWORDS):
+        with self.lock:
+            if not companies:
+                counts = self.term_counts.copy()
+            else:
+                mask = self._mask(companies)
+                base = mask[:len(self.lengths)].copy()
+                base[list(self.stale)] = False
+                counts = np.bincount(self.tokens[np.repeat(base, self.lengths)], minlength=len(self.terms)).astype(np.int64)
+                for position, codes in self.new_tokens.items():
+                    if mask[position] and len(codes):
+                        np.add.at(counts, codes, 1)
+            terms = self.terms
+        top = np.argpartition(-counts, min(n, len(counts)) - 1)[:n] if len(counts) else np.zeros(0, dtype=np.int64)
+        top = top[counts[top] > 0]
+        top = top[np.argsort(-counts[top], kind="stable")]
+        return pd.DataFrame({"termo": [terms[code] for code in top], "avaliacoes": counts[top]})
+
+    def matches(self, term):
+        # Posições das avaliações cujo comentário contém o termo (índice invertido + camada nova).
+        with self.lock:
+            code = self.vocabulary.get(term.strip().lower())
+            if code is None:
+                return np.zeros(0, dtype=np.int64)
+            base = self.postings[self.term_ptr[code]:self.term_ptr[code + 1]] if code + 1 < len(self.term_ptr) else np.zeros(0, dtype=np.int64)
+            if self.stale:
+                base = base[~np.isin(base, list(self.stale))]
+            recent = [position for position in dict.fromkeys(self.new_postings.get(code, [])) if code in self.new_tokens.get(position, ())]
+            return np.concatenate([base, np.array(recent, dtype=np.int64)])
+
+    def search(self, term, companies=None, sample=10):
+        positions = self.matches(term)
+        with self.lock:
+            if companies:
+                positions = positions[np.isin(self.company[positions], self._codes(companies))]
+            stats = {}
+            for label, column in SCORES.items():
+                values = self.scores[column][positions]
+                values = values[values >= 0]
+                stats[label] = values.mean() if len(values) else None
+            latest = np.sort(positions)[-sample:][::-1]
+            rows = pd.DataFrame({
+                "id_avaliacao": self.ids[latest],
+                "id_empresa": [self.company_ids[code] if code >= 0 else None for code in self.company[latest]],
+                **{column: self.scores[column][latest] for column in SCORES.values()},
+                "comentario": [self.comment(position) for position in latest],
+            })
+        return len(positions), stats, rows
+
+
+def get_review_analytics(store, user):
+    # Uma instância por escopo, guardada no store: limitada e descartada no logout (drop_user).
+    return store.resource("review_analytics", user, lambda: ReviewAnalytics(rebuild_interval=REBUILD_INTERVAL))
+
+
+@st.cache_resource
+def get_review_cache():
+    return VersionedCache(max_entries=64)
+
+
+def analytics_for(headers):
+    return get_review_analytics(get_dataset_store(), user_key(headers))
+
+
+def cached(analytics, name, compute, *args):
+    key = ("reviews", analytics.version, name) + args
+    return get_review_cache().get_or_compute(key, lambda: timed_call("aggregation", f"reviews:{name}", compute))
+
+
+def _company_names(client, headers):
+    empresas = load_index(client, headers, "empresas")
+    if empresas is None:
+        return {}
+    frame = empresas.frame.dropna(subset=["id_empresa"])
+    return dict(zip(frame["id_empresa"].astype("int64"), frame["nome_empresa"].astype(str)))
+
+
+def review_analytics_view(client, headers):
+    # altair (charts) só é carregado quando a análise é aberta.
+    from charts import bar_chart
+
+    analytics = analytics_for(headers)
+    if analytics.needs_build():
+        result = fetch_cached(client, REVIEWS_PATH, headers)
+        if not result.ok:
+            st.warning(f"Não foi possível carregar as avaliações. ({result.error})")
+            return
+        with timed("aggregation", "review_analytics"):
+            analytics.build(result.data)
+
+    names = _company_names(client, headers)
+
+    def label(company):
+        return "" if company is None else names.get(company, f"Empresa #{company}")
+
+    col_companies, col_score = st.columns([3, 1])
+    with col_companies:
+        companies = st.multiselect("Empresas", sorted(analytics.company_ids, key=label), format_func=label, key="reviews_companies",
+                                   placeholder="Todas as empresas")
+    with col_score:
+        score_label = st.radio("Nota", list(SCORES), key="reviews_score")
+    column = SCORES[score_label]
+    scope = tuple(sorted(companies))
+
+    summary = cached(analytics, "summary", lambda: analytics.summary(column, companies), column, scope)
+    if summary.empty:
+        st.info("Nenhuma avaliação com nota para as empresas selecionadas.")
+        return
+    histogram = cached(analytics, "histogram", lambda: analytics.histogram(column, companies), column, scope)
+    total = int(histogram["avaliacoes"].sum())
+    mean = float((histogram["nota"] * histogram["avaliacoes"]).sum() / total)
+    cumulative = histogram["avaliacoes"].cumsum().to_numpy()
+    median = int(np.searchsorted(cumulative, np.ceil(total / 2)))
+    col_total, col_mean, col_median = st.columns(3)
+    col_total.metric("Avaliações", f"{total:,}".replace(",", "."))
+    col_mean.metric("Média", f"{mean:.2f}")
+    col_median.metric("Mediana", median)
+    st.altair_chart(bar_chart(histogram, "nota", "avaliacoes", score_label, "Avaliações", f"Distribuição da {score_label.lower()}", y_format=",d",
+                              max_points=MAX_SCORE + 1), use_container_width=True)
+
+    shown = summary.assign(empresa=summary["id_empresa"].map(label)).set_index("empresa").drop(columns="id_empresa")
+    st.dataframe(shown.rename(columns={"avaliacoes": "Avaliações", "media": "Média"}), column_config={"Média": st.column_config.NumberColumn(format="%.2f")})
+
+    window = st.number_input("Janela da média móvel (avaliações)", min_value=1, value=100, step=10, key="reviews_window")
+    rolling = cached(analytics, "rolling", lambda: _downsample(analytics.rolling(column, int(window), companies)), column, int(window), scope)
+    if not rolling.empty:
+        st.line_chart(rolling, x="id_avaliacao", y="media_movel", x_label="Avaliação (ordem de cadastro)", y_label=f"Média móvel da {score_label.lower()}")
+
+    st.subheader("Palavras mais frequentes nos comentários")
+    keywords = cached(analytics, "keywords", lambda: analytics.keywords(companies, TOP_KEYWORDS), scope, TOP_KEYWORDS)
+    if keywords.empty:
+        st.caption("Nenhum comentário com texto.")
+    else:
+        st.altair_chart(bar_chart(keywords, "termo", "avaliacoes", "Termo", "Avaliações", "Termos por número de avaliações", y_format=",d",
+                                  max_points=TOP_KEYWORDS), use_container_width=True)
+
+    term = st.text_input("Buscar palavra nos comentários", key="reviews_term", placeholder="Ex.: atendimento")
+    if term.strip():
+        count, means, rows = cached(analytics, "search", lambda: analytics.search(term, companies), term.strip().lower(), scope)
+        if not count:
+            st.caption("Nenhuma avaliação com essa palavra.")
+            return
+        cols = st.columns(len(means) + 1)
+        cols[0].metric("Avaliações com o termo", f"{count:,}".replace(",", "."))
+        for col, (name, value) in zip(cols[1:], means.items()):
+            col.metric(name, "-" if value is None else f"{value:.2f}")
+        st.dataframe(rows.assign(id_empresa=rows["id_empresa"].map(label)).rename(columns={"id_empresa": "empresa"}), hide_index=True)
+
+
+def _downsample(rolling):
+    from timeseries import lttb
+
+    keep = lttb(rolling["id_avaliacao"].to_numpy(), rolling["media_movel"].to_numpy(), ROLLING_MAX_POINTS)
+    return rolling.iloc[keep].reset_index(drop=True)
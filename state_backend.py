@@ -0,0 +1,228 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+import streamlit as st
+
+
+# Estado compartilhado entre sessões: em memória (um processo) ou num backend externo, para
+# várias réplicas do Streamlit dividirem datasets, sessões de login e contadores.
+#   STATE_BACKEND=memory                      (padrão)
+#   STATE_BACKEND=sqlite:///caminho/state.db  (processos do mesmo nó)
+#   STATE_BACKEND=redis://host:6379/0         (vários nós; requer o pacote redis)
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory")
+LOCK_POLL = 0.05
+
+
+class LockTimeout(TimeoutError):
+    pass
+
+
+class StateBackend:
+    # Chave/valor com TTL em segundos (None = sem expiração), separado por namespace.
+    # Valores são bytes; incr() guarda contadores inteiros.
+    shared = False
+
+    def get(self, namespace, key):
+        raise NotImplementedError
+
+    def set(self, namespace, key, value, ttl=None):
+        raise NotImplementedError
+
+    def add(self, namespace, key, value, ttl=None):
+        # Grava só se a chave não existir; devolve True se gravou.
+        raise NotImplementedError
+
+    def delete(self, namespace, key, value=None):
+        # Com value, só apaga se o valor atual for esse (liberar um lock próprio).
+        raise NotImplementedError
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        # Soma e devolve o novo valor; o TTL vale a partir da criação do contador.
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, namespace, key, ttl=30, timeout=30):
+        # Lock entre processos. Levanta LockTimeout se não conseguir em timeout segundos.
+        token = uuid.uuid4().hex.encode()
+        deadline = time.monotonic() + timeout
+        while not self.add(namespace, key, token, ttl):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"{namespace}:{key}")
+            time.sleep(LOCK_POLL)
+        try:
+            yield
+        finally:
+            self.delete(namespace, key, token)
+
+
+class MemoryBackend(StateBackend):
+    def __init__(self):
+        self.values = {}
+        self.mutex = threading.Lock()
+
+    def _live(self, item):
+        value, expires_at = self.values.get(item, (None, None))
+        if expires_at is not None and expires_at <= time.time():
+            del self.values[item]
+            return None
+        return value
+
+    @staticmethod
+    def _expiry(ttl):
+        return None if ttl is None else time.time() + ttl
+
+    def get(self, namespace, key):
+        with self.mutex:
+            return self._live((namespace, key))
+
+    def set(self, namespace, key, value, ttl=None):
+        with self.mutex:
+            self.values[(namespace, key)] = (value, self._expiry(ttl))
+
+    def add(self, namespace, key, value, ttl=None):
+        with self.mutex:
+            if self._live((namespace, key)) is not None:
+                return False
+            self.values[(namespace, key)] = (value, self._expiry(ttl))
+            return True
+
+    def delete(self, namespace, key, value=None):
+        with self.mutex:
+            if value is None or self._live((namespace, key)) == value:
+                self.values.pop((namespace, key), None)
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        with self.mutex:
+            current = self._live((namespace, key))
+            if current is None:
+                self.values[(namespace, key)] = (amount, self._expiry(ttl))
+                return amount
+            self.values[(namespace, key)] = (current + amount, self.values[(namespace, key)][1])
+            return current + amount
+
+
+class SQLiteBackend(StateBackend):
+    # Um arquivo SQLite (WAL) compartilhado pelos processos do nó. Não use em sistema de
+    # arquivos de rede: entre nós, use o Redis.
+    shared = True
+    PURGE_EVERY = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db().execute("CREATE TABLE IF NOT EXISTS state (namespace TEXT, key TEXT, value BLOB, expires_at REAL, PRIMARY KEY (namespace, key))")
+
+    def _db(self):
+        # Uma conexão por thread (as threads do pool de busca também usam o backend).
+        db = getattr(self.local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self.local.db = db
+        return db
+
+    @staticmethod
+    def _expiry(ttl):
+        return None if ttl is None else time.time() + ttl
+
+    def _written(self):
+        self.writes += 1
+        if self.writes % self.PURGE_EVERY == 0:
+            self._db().execute("DELETE FROM state WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, namespace, key):
+        row = self._db().execute("SELECT value FROM state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                                 (namespace, key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace, key, value, ttl=None):
+        self._db().execute("INSERT INTO state VALUES (?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                           (namespace, key, value, self._expiry(ttl)))
+        self._written()
+
+    def add(self, namespace, key, value, ttl=None):
+        # Só sobrescreve uma chave já expirada; rowcount 0 = outra chave viva.
+        cursor = self._db().execute(
+            "INSERT INTO state VALUES (?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+            "WHERE state.expires_at IS NOT NULL AND state.expires_at <= ?",
+            (namespace, key, value, self._expiry(ttl), time.time()))
+        self._written()
+        return cursor.rowcount == 1
+
+    def delete(self, namespace, key, value=None):
+        if value is None:
+            self._db().execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+        else:
+            self._db().execute("DELETE FROM state WHERE namespace = ? AND key = ? AND value = ?", (namespace, key, value))
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        now = time.time()
+        row = self._db().execute(
+            "INSERT INTO state VALUES (?, ?, ?, ?) ON CONFLICT (namespace, key) DO UPDATE SET "
+            "value = CASE WHEN state.expires_at <= ? THEN excluded.value ELSE state.value + excluded.value END, "
+            "expires_at = CASE WHEN state.expires_at <= ? THEN excluded.expires_at ELSE state.expires_at END RETURNING value",
+            (namespace, key, amount, self._expiry(ttl), now, now)).fetchone()
+        self._written()
+        return int(row[0])
+
+
+class RedisBackend(StateBackend):
+    shared = True
+    RELEASE = "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    INCR = ("local value = redis.call('incrby', KEYS[1], ARGV[1]) "
+            "if value == tonumber(ARGV[1]) and ARGV[2] ~= '' then redis.call('pexpire', KEYS[1], ARGV[2]) end return value")
+
+    def __init__(self, url, prefix="streamlit_integration:"):
+        import redis
+
+        self.redis = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.release = self.redis.register_script(self.RELEASE)
+        self.increment = self.redis.register_script(self.INCR)
+
+    def _key(self, namespace, key):
+        return f"{self.prefix}{namespace}:{key}"
+
+    @staticmethod
+    def _ms(ttl):
+        return None if ttl is None else max(1, int(ttl * 1000))
+
+    def get(self, namespace, key):
+        return self.redis.get(self._key(namespace, key))
+
+    def set(self, namespace, key, value, ttl=None):
+        self.redis.set(self._key(namespace, key), value, px=self._ms(ttl))
+
+    def add(self, namespace, key, value, ttl=None):
+        return bool(self.redis.set(self._key(namespace, key), value, px=self._ms(ttl), nx=True))
+
+    def delete(self, namespace, key, value=None):
+        if value is None:
+            self.redis.delete(self._key(namespace, key))
+        else:
+            self.release(keys=[self._key(namespace, key)], args=[value])
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        return int(self.increment(keys=[self._key(namespace, key)], args=[amount, self._ms(ttl) or ""]))
+
+
+def create_backend(url):
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    if url in ("", "memory"):
+        return MemoryBackend()
+    raise ValueError(f"STATE_BACKEND inválido: {url}")
+
+
+@st.cache_resource
+def get_state_backend():
+    return create_backend(STATE_BACKEND)
@@ -0,0 +1,114 @@
+import streamlit as st
+import pandas as pd
+from data_fetcher import fetch_cached, prefetch, show_offline_notice
+from dataset_store import get_dataset_store, user_key
+from metrics import timed
+
+
+PAGE_SIZES = [50, 100, 500, 1000]
+DEFAULT_ORDER = "(padrão)"
+
+
+def _set_page(key, page):
+    st.session_state[f"{key}_page"] = page
+
+
+def _reset_page(key):
+    _set_page(key, 1)
+
+
+def filter_and_sort(df, text_filter, order_by, descending):
+    if text_filter:
+        mask = pd.Series(False, index=df.index)
+        for column in df.columns:
+            mask |= df[column].astype("string").str.contains(text_filter, case=False, regex=False, na=False)
+        df = df[mask]
+    if order_by != DEFAULT_ORDER:
+        df = df.sort_values(order_by, ascending=not descending, na_position="last", kind="stable")
+    return df
+
+
+def page_params(page, page_size, text_filter, order_by, descending):
+    params = {"limit": page_size, "offset": (page - 1) * page_size}
+    if order_by != DEFAULT_ORDER:
+        params["order_by"] = f"-{order_by}" if descending else order_by
+    if text_filter:
+        params["q"] = text_filter
+    return params
+
+
+def parse_page(df, params):
+    # Retorna (linhas, total, paginado_no_servidor).
+    if "total" in df.attrs:
+        return df, df.attrs["total"], True
+    if len(df) > params["limit"]:
+        return df, len(df), False
+    total = params["offset"] + len(df) if len(df) < params["limit"] else None
+    return df, total, True
+
+
+def paginated_table(client, path, headers, key, empty_message="Nenhum registro encontrado.", decorate=None):
+    columns = st.session_state.get(f"{key}_columns", [])
+    client_paging = st.session_state.get(f"{key}_client_paging", False)
+
+    col_filter, col_order, col_desc, col_size = st.columns([3, 2, 1, 1])
+    with col_filter:
+        text_filter = st.text_input("Filtrar", key=f"{key}_filter", on_change=_reset_page, args=(key,))
+    with col_order:
+        order_by = st.selectbox("Ordenar por", [DEFAULT_ORDER] + columns, key=f"{key}_order", on_change=_reset_page, args=(key,))
+    with col_desc:
+        descending = st.checkbox("Decrescente", key=f"{key}_desc", on_change=_reset_page, args=(key,))
+    with col_size:
+        page_size = st.selectbox("Linhas por página", PAGE_SIZES, index=1, key=f"{key}_page_size", on_change=_reset_page, args=(key,))
+
+    page = st.session_state.get(f"{key}_page", 1)
+    params = page_params(page, page_size, text_filter, order_by, descending)
+
+    if client_paging:
+        result = fetch_cached(client, path, headers)
+    else:
+        result = fetch_cached(client, path, headers, params)
+    if not result.ok:
+        return result
+    show_offline_notice([result])
+
+    if client_paging:
+        rows, total, server_paged = result.data, len(result.data), False
+    else:
+        rows, total, server_paged = parse_page(result.data, params)
+    if not server_paged:
+        # A API devolveu a lista inteira: paginamos aqui, sobre a resposta em cache.
+        if not client_paging:
+            # Ela fica também na chave sem parâmetros, que as próximas execuções leem: a lista
+            # não é baixada de novo.
+            get_dataset_store().put(user_key(headers), path, result.data)
+        st.session_state[f"{key}_client_paging"] = True
+        with timed("sort", path):
+            rows = filter_and_sort(rows, text_filter, order_by, descending)
+        total = len(rows)
+        rows = rows.iloc[params["offset"]:params["offset"] + page_size]
+
+    if not columns and len(rows.columns):
+        st.session_state[f"{key}_columns"] = list(rows.columns)
+
+    if not rows.empty:
+        # decorate (ex.: indexes.company_names) só vê a página exibida, não a tabela inteira.
+        st.dataframe(decorate(rows) if decorate else rows, use_container_width=True, hide_index=True)
+    else:
+        st.warning(empty_message)
+
+    last_page = max(1, -(-total // page_size)) if total is not None else None
+    if server_paged and (last_page is None or page < last_page):
+        prefetch(client, path, headers, page_params(page + 1, page_size, text_filter, order_by, descending))
+
+    col_prev, col_info, col_next = st.columns([1, 3, 1])
+    with col_prev:
+        st.button("Anterior", key=f"{key}_prev", disabled=page <= 1, on_click=_set_page, args=(key, page - 1))
+    with col_info:
+        if last_page is not None:
+            st.caption(f"Página {page} de {last_page} · {total} registros")
+        else:
+            st.caption(f"Página {page}")
+    with col_next:
+        st.button("Próxima", key=f"{key}_next", disabled=last_page is not None and page >= last_page, on_click=_set_page, args=(key, page + 1))
+    return result
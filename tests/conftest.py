@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Os módulos do app ficam na raiz do repositório, sem pacote.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Singletons (get_dataset_store etc.) sem cache em disco nem backend externo.
+os.environ["DATASET_DISK_CACHE_DIR"] = ""
+os.environ["STATE_BACKEND"] = "memory"
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+from aggregations import InsightsEngine
+
+
+def raw_frames(seed=0, n=200):
+    rng = np.random.default_rng(seed)
+    empresas = pd.DataFrame({
+        "id_empresa": range(1, 11),
+        "nome_empresa": [f"Empresa {i}" for i in range(1, 11)],
+        "diretor_empresa": [f"Diretor {i % 4}" for i in range(1, 11)],
+    })
+    faturamento = pd.DataFrame({
+        "id_faturamento": range(1, n + 1),
+        "id_empresa": rng.integers(1, 11, n),
+        "faturamento_mensal": rng.uniform(1, 100, n).round(2),
+        "faturamento_anual": rng.uniform(100, 1000, n).round(2),
+    })
+    produtos = np.array([f"P{i}" for i in range(6)], dtype=object)
+    vendas = pd.DataFrame({
+        "id_venda": range(1, n + 1),
+        "id_faturamento": rng.integers(1, n + 1, n),
+        "nome_produto": produtos[rng.integers(0, 6, n)],
+        "produtos_vendidos": rng.integers(1, 50, n),
+    })
+    detalhes = pd.DataFrame({
+        "id_produto": range(1, 61),
+        "id_empresa": np.repeat(np.arange(1, 11), 6),
+        "nome_produto": np.tile(produtos, 10),
+        "preco_unitario": rng.uniform(1, 500, 60).round(2),
+    })
+    avaliacoes = pd.DataFrame({
+        "id_avaliacao": range(1, n + 1),
+        "id_empresa": rng.integers(1, 11, n),
+        "nota_diretor": rng.integers(0, 11, n),
+        "nota_geral_empresa": rng.integers(0, 11, n),
+    })
+    return {"empresas": empresas, "faturamento": faturamento, "produtos_vendidos": vendas,
+            "detalhes_produtos": detalhes, "avaliacoes": avaliacoes}
+
+
+def upsert(frame, id_field, record):
+    mask = frame[id_field] == record[id_field]
+    if mask.any():
+        frame = frame.copy()
+        for column, value in record.items():
+            frame.loc[mask, column] = value
+        return frame
+    return pd.concat([frame, pd.DataFrame([record])], ignore_index=True)
+
+
+ID_FIELDS = {"empresas": "id_empresa", "faturamento": "id_faturamento", "produtos_vendidos": "id_venda",
+             "detalhes_produtos": "id_produto", "avaliacoes": "id_avaliacao"}
+ORDER = ["empresas", "faturamento", "produtos_vendidos", "detalhes_produtos", "avaliacoes"]
+
+WRITES = [
+    ("empresas", {"id_empresa": 11, "nome_empresa": "Empresa Nova", "diretor_empresa": "Diretor 1"}),
+    ("empresas", {"id_empresa": 3, "diretor_empresa": "Diretor 9"}),
+    ("faturamento", {"id_faturamento": 201, "id_empresa": 11, "faturamento_mensal": 5.0, "faturamento_anual": 9999.0}),
+    ("faturamento", {"id_faturamento": 7, "id_empresa": 2, "faturamento_anual": 1.5}),
+    ("avaliacoes", {"id_avaliacao": 201, "id_empresa": 11, "nota_diretor": 10, "nota_geral_empresa": 9}),
+    ("avaliacoes", {"id_avaliacao": 5, "id_empresa": 4, "nota_diretor": 0}),
+    ("produtos_vendidos", {"id_venda": 201, "id_faturamento": 201, "nome_produto": "P2", "produtos_vendidos": 400}),
+    ("produtos_vendidos", {"id_venda": 9, "produtos_vendidos": 1}),
+    ("detalhes_produtos", {"id_produto": 61, "id_empresa": 11, "nome_produto": "P2", "preco_unitario": 50.0}),
+    ("detalhes_produtos", {"id_produto": 2, "preco_unitario": 999.0}),
+]
+
+
+def built(frames):
+    engine = InsightsEngine(top_n=5)
+    engine.build(*(frames[name] for name in ORDER))
+    return engine
+
+
+def assert_same_results(engine, expected):
+    sort = {"insights": "nome_empresa", "media_notas_diretor": "diretor_empresa", "maior_lucro": "faturamento_total"}
+    for name, column in sort.items():
+        got = getattr(engine, name)().sort_values(column, ignore_index=True)
+        want = getattr(expected, name)().sort_values(column, ignore_index=True)
+        pd.testing.assert_frame_equal(got, want, check_dtype=False, check_exact=False)
+
+
+def test_incremental_writes_match_a_rebuild():
+    frames = raw_frames()
+    engine = built(frames)
+    for entity, record in WRITES:
+        engine.apply_write(f"/api/{entity}/", dict(record), record[ID_FIELDS[entity]])
+        frames[entity] = upsert(frames[entity], ID_FIELDS[entity], record)
+    assert not engine.needs_build()
+    assert_same_results(engine, built(frames))
+
+
+def test_every_write_bumps_the_version():
+    engine = built(raw_frames())
+    before = {path: frame.attrs["dataset_version"] for path, frame in engine.frames().items()}
+    engine.apply_write("/api/avaliacoes/", {"id_avaliacao": 1, "nota_diretor": 3}, 1)
+    after = {path: frame.attrs["dataset_version"] for path, frame in engine.frames().items()}
+    assert all(before[path] != after[path] for path in before)
+
+
+@pytest.mark.parametrize("record", [
+    {"nome_empresa": "Sem id"},
+    {"id_faturamento": 500, "faturamento_anual": 10.0},
+])
+def test_incomplete_write_schedules_a_rebuild(record):
+    engine = built(raw_frames())
+    path = "/api/empresas/" if "nome_empresa" in record else "/api/faturamento/"
+    engine.apply_write(path, record, None)
+    assert engine.needs_build()
+
+
+def test_writes_before_the_first_build_are_ignored():
+    engine = InsightsEngine()
+    engine.apply_write("/api/empresas/", {"id_empresa": 1}, 1)
+    assert engine.needs_build()
@@ -0,0 +1,89 @@
+import base64
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+import pytest
+from auth import AuthManager, token_expiry
+from dataset_store import DatasetStore, user_key
+
+
+def jwt(exp, n=0):
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode({'exp': exp, 'n': n})}.assinatura"
+
+
+class FakeApi:
+    # /auth/token e /auth/refresh emitem tokens que vencem em `ttl` segundos.
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self.posts = []
+        self.refresh_status = 200
+        self.reauthenticate = self.current_authorization = None
+
+    def post(self, path, **kwargs):
+        self.posts.append(path)
+        if path == "/auth/refresh" and self.refresh_status != 200:
+            return SimpleNamespace(status_code=self.refresh_status)
+        tokens = {"access_token": jwt(time.time() + self.ttl, len(self.posts)), "refresh_token": f"r{len(self.posts)}"}
+        return SimpleNamespace(status_code=200, json=lambda: tokens)
+
+
+@pytest.fixture
+def manager():
+    executor = ThreadPoolExecutor(max_workers=1)
+    yield AuthManager(FakeApi(), DatasetStore(), executor, margin=60)
+    executor.shutdown()
+
+
+def test_token_expiry_reads_the_exp_claim():
+    assert token_expiry(jwt(1234.5)) == 1234.5
+    assert token_expiry("opaco") is None
+    assert token_expiry("a.b.c") is None
+
+
+def test_expired_token_is_refreshed_before_the_run(manager):
+    session, _ = manager.login("ana@example.com", "senha")
+    old_user = user_key(session.headers)
+    session.expires_at = time.time() - 1
+    assert manager.ensure_fresh(session)
+    assert manager.client.posts == ["/auth/token", "/auth/refresh"]
+    assert session.expires_in() > 3000
+    # O token novo continua no mesmo escopo do store (mesmo cache).
+    assert manager.store.canonical(user_key(session.headers)) == manager.store.canonical(old_user)
+
+
+def test_token_near_expiry_is_refreshed_in_the_background(manager):
+    manager.client.ttl = 30
+    session, _ = manager.login("ana@example.com", "senha")
+    token = session.access_token
+    manager.client.ttl = 3600
+    assert manager.ensure_fresh(session)
+    session.pending.result(timeout=5)
+    assert session.access_token != token
+
+
+def test_401_refreshes_once_for_concurrent_requests(manager):
+    session, _ = manager.login("ana@example.com", "senha")
+    stale = session.headers["Authorization"]
+    first = manager.reauthenticate(stale)
+    second = manager.reauthenticate(stale)
+    assert first == second == session.headers["Authorization"] != stale
+    assert manager.client.posts.count("/auth/refresh") == 1
+    assert manager.current_authorization(stale) == first
+    assert manager.reauthenticate("Bearer desconhecido") is None
+
+
+def test_rejected_refresh_ends_an_expired_session(manager):
+    session, _ = manager.login("ana@example.com", "senha")
+    manager.client.refresh_status = 401
+    session.expires_at = time.time() - 1
+    assert not manager.ensure_fresh(session)
+
+
+def test_logout_forgets_the_session(manager):
+    session, _ = manager.login("ana@example.com", "senha")
+    assert manager.resume(session.handle) is session
+    manager.logout(session)
+    assert manager.resume(session.handle) is None
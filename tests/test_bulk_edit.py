@@ -0,0 +1,48 @@
+import pandas as pd
+from bulk_edit import diff_rows
+from entities import ENTITIES
+
+EMPRESAS = ENTITIES["empresas"]
+
+
+def original():
+    return pd.DataFrame({
+        "id_empresa": pd.array([1, 2, 3], dtype="Int64"),
+        "nome_empresa": pd.array(["A", "B", None], dtype="string"),
+        "diretor_empresa": pd.array(["X", "Y", "Z"], dtype="string"),
+    })
+
+
+def test_untouched_grid_sends_nothing():
+    assert diff_rows(EMPRESAS, original(), original().astype(object)) == ({}, [], {})
+
+
+def test_only_changed_fields_are_sent():
+    edited = original()
+    edited.loc[1, "diretor_empresa"] = "Novo"
+    edited.loc[2, "nome_empresa"] = "C"
+    updates, inserts, errors = diff_rows(EMPRESAS, original(), edited)
+    assert updates == {2: {"diretor_empresa": "Novo"}, 3: {"nome_empresa": "C"}}
+    assert inserts == [] and errors == {}
+
+
+def test_new_rows_are_validated_as_inserts():
+    edited = pd.concat([original(), pd.DataFrame({"id_empresa": [None, None], "nome_empresa": ["D", ""], "diretor_empresa": ["W", "V"]})],
+                       ignore_index=True)
+    updates, inserts, errors = diff_rows(EMPRESAS, original(), edited)
+    assert updates == {}
+    assert inserts == [{"nome_empresa": "D", "diretor_empresa": "W"}]
+    assert errors == {"Nova linha 2": "nome_empresa: campo obrigatório"}
+
+
+def test_invalid_edits_and_failed_checks_are_reported_per_row():
+    edited = original()
+    edited.loc[0, "nome_empresa"] = ""
+    edited.loc[1, "nome_empresa"] = "Duplicada"
+
+    def check(payload):
+        return ["nome duplicado"] if payload.get("nome_empresa") == "Duplicada" else []
+
+    updates, inserts, errors = diff_rows(EMPRESAS, original(), edited, check)
+    assert updates == {} and inserts == []
+    assert errors == {"ID 1": "nome_empresa: campo obrigatório", "ID 2": "nome duplicado"}
@@ -0,0 +1,164 @@
+import threading
+import time
+import pandas as pd
+import pytest
+from data_fetcher import FetchResult
+from dataset_store import DatasetStore
+from ingest import frame_nbytes
+from state_backend import MemoryBackend
+
+PATH = "/api/empresas/"
+
+
+def frame(n=1000):
+    return pd.DataFrame({"id_empresa": range(n), "valor": [float(i) for i in range(n)]})
+
+
+def slow_loader(calls, data, delay=0.2):
+    def loader():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return FetchResult(PATH, data=data, status_code=200)
+    return loader
+
+
+def run_threads(target, n):
+    results = [None] * n
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_loads_call_the_loader_once():
+    store, calls, data = DatasetStore(), [], frame()
+    results = run_threads(lambda: store.load("u", PATH, slow_loader(calls, data)), 8)
+    assert len(calls) == 1
+    assert all(result.data is results[0].data for result in results)
+    assert store.get("u", PATH) is not None
+
+
+def test_waiters_receive_the_loader_error():
+    store, calls = DatasetStore(), []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        raise RuntimeError("falhou")
+
+    def load():
+        try:
+            store.load("u", PATH, loader)
+        except RuntimeError as exc:
+            return str(exc)
+
+    assert run_threads(load, 4) == ["falhou"] * 4
+    assert len(calls) == 1
+    assert store.inflight == {}
+
+
+def test_users_do_not_share_loads_or_datasets():
+    store, calls = DatasetStore(), []
+    store.load("a", PATH, slow_loader(calls, frame(), delay=0))
+    assert store.get("b", PATH) is None
+    store.load("b", PATH, slow_loader(calls, frame(), delay=0))
+    assert len(calls) == 2
+
+
+def test_leased_dataset_is_not_evicted():
+    size = frame_nbytes(frame())
+    store = DatasetStore(max_bytes=int(size * 2.5), ttls={})
+    store.put("u", "/a/", frame())
+    store.lease("s1", "u", ["/a/"])
+    store.put("u", "/b/", frame())
+    store.put("u", "/c/", frame())
+    assert store.get("u", "/a/") is not None
+    assert store.get("u", "/b/") is None
+    assert store.get("u", "/c/") is not None
+
+    # Acima do limite só com datasets em uso: nenhum sai.
+    store.lease("s2", "u", ["/c/"])
+    store.put("u", "/d/", frame())
+    assert store.get("u", "/a/") is not None and store.get("u", "/c/") is not None
+
+
+def test_expired_or_dropped_lease_does_not_protect():
+    size = frame_nbytes(frame())
+    store = DatasetStore(max_bytes=int(size * 2.5), ttls={}, lease_ttl=0)
+    store.put("u", "/a/", frame())
+    store.lease("s1", "u", ["/a/"])
+    store.put("u", "/b/", frame())
+    store.put("u", "/c/", frame())
+    assert store.get("u", "/a/") is None
+
+    store = DatasetStore(max_bytes=int(size * 2.5), ttls={})
+    store.put("u", "/a/", frame())
+    store.lease("s1", "u", ["/a/"])
+    store.drop_user("v", "s1")
+    store.put("u", "/b/", frame())
+    store.put("u", "/c/", frame())
+    assert store.get("u", "/a/") is None
+
+
+class Resource:
+    def __init__(self, name, closed):
+        self.name = name
+        self.closed = closed
+
+    def close(self):
+        self.closed.append(self.name)
+
+
+def test_resources_are_reused_and_closed_on_eviction_or_logout():
+    store = DatasetStore(max_resources=2)
+    closed = []
+    first = store.resource("stream", "u", lambda: Resource("u", closed))
+    assert store.resource("stream", "u", lambda: Resource("outro", closed)) is first
+    store.resource("stream", "v", lambda: Resource("v", closed))
+    store.resource("stream", "w", lambda: Resource("w", closed))
+    # O mais antigo (u) sai do LRU e é fechado.
+    assert closed == ["u"]
+    store.drop_user("v")
+    assert closed == ["u", "v"]
+    assert list(store.resources) == [("stream", "w")]
+
+
+def test_replicas_fetch_once_through_the_shared_backend():
+    pytest.importorskip("pyarrow")
+    backend = MemoryBackend()
+    replicas = [DatasetStore(backend=backend), DatasetStore(backend=backend)]
+    calls, data = [], frame()
+
+    def fetch(store):
+        def loader():
+            shared = store.claim("u", PATH)
+            if shared is not None:
+                return FetchResult(PATH, data=shared, status_code=200, from_cache=True)
+            return slow_loader(calls, data, delay=0.3)()
+        return store.load("u", PATH, loader)
+
+    first = threading.Thread(target=fetch, args=(replicas[0],))
+    first.start()
+    time.sleep(0.05)
+    result = fetch(replicas[1])
+    first.join()
+    assert len(calls) == 1
+    assert result.from_cache
+    pd.testing.assert_frame_equal(result.data, data)
+
+
+def test_invalidate_bumps_the_generation_for_every_replica():
+    pytest.importorskip("pyarrow")
+    backend = MemoryBackend()
+    a, b = DatasetStore(backend=backend), DatasetStore(backend=backend)
+    a.put("u", PATH, frame())
+    assert b.get("u", PATH) is not None
+    b.invalidate([PATH])
+    assert a.get("u", PATH) is None
+    assert b.get("u", PATH) is None
@@ -0,0 +1,119 @@
+import json
+import os
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from data_fetcher import _load
+from dataset_store import DatasetStore, login_key, user_key
+from disk_cache import STALE_ATTR, DiskCache
+from ingest import SCHEMAS, frame_from_records
+
+PATH = "/api/empresas/"
+RECORDS = [{"id_empresa": 1, "nome_empresa": "A", "diretor_empresa": "X"}, {"id_empresa": 2, "nome_empresa": None, "diretor_empresa": "Y"}]
+
+
+def frame():
+    df = frame_from_records(RECORDS, SCHEMAS[PATH])
+    df.attrs["total"] = 2
+    return df
+
+
+def files(directory):
+    return sorted(name for name in os.listdir(directory) if not name.endswith(".tmp"))
+
+
+def test_roundtrip_keeps_types_attrs_and_validators(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    key = ("u", PATH, ())
+    disk.save(key, frame(), etag='"v1"', last_modified="Tue, 01 Oct 2024 10:00:00 GMT")
+    meta = disk.meta(key)
+    loaded = disk.load(key, meta)
+    pd.testing.assert_frame_equal(loaded, frame())
+    assert loaded.attrs == {"total": 2}
+    assert disk.conditional_headers(meta) == {"If-None-Match": '"v1"', "If-Modified-Since": "Tue, 01 Oct 2024 10:00:00 GMT"}
+
+
+def test_new_version_replaces_the_file(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    key = ("u", PATH, ())
+    disk.save(key, frame())
+    disk.save(key, frame().head(1))
+    assert len(files(tmp_path)) == 2
+    assert len(disk.load(key)) == 1
+
+
+def test_prune_drops_the_oldest_datasets(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    disk.save(("u", "/a/", ()), frame())
+    size = sum(os.path.getsize(tmp_path / name) for name in files(tmp_path) if not name.endswith(".json"))
+    disk.max_bytes = int(size * 1.5)
+    disk.save(("u", "/b/", ()), frame())
+    assert disk.meta(("u", "/a/", ())) is None
+    assert disk.load(("u", "/b/", ())) is not None
+
+
+def test_drop_removes_only_that_scope(tmp_path):
+    disk = DiskCache(str(tmp_path))
+    disk.save(("u", PATH, ()), frame())
+    disk.save(("v", PATH, ()), frame())
+    disk.drop("u")
+    assert disk.meta(("u", PATH, ())) is None
+    assert disk.load(("v", PATH, ())) is not None
+    assert len(files(tmp_path)) == 2
+
+
+class FakeApi:
+    def __init__(self):
+        self.calls = []
+        self.down = False
+
+    def get(self, path, headers=None, params=None):
+        self.calls.append(dict(headers))
+        if self.down:
+            return SimpleNamespace(status_code=503, content=b"", headers={})
+        if headers.get("If-None-Match") == '"v1"':
+            return SimpleNamespace(status_code=304, content=b"", headers={})
+        return SimpleNamespace(status_code=200, content=json.dumps(RECORDS).encode(), headers={"ETag": '"v1"'})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DatasetStore(disk=DiskCache(str(tmp_path)))
+
+
+def login(store, token, email="ana@example.com"):
+    headers = {"Authorization": f"Bearer {token}"}
+    store.identify(user_key(headers), email)
+    store.verify(user_key(headers))
+    return headers
+
+
+def test_new_login_revalidates_the_copy_saved_by_the_previous_one(store):
+    api = FakeApi()
+    first = login(store, "t1")
+    assert _load(store, api, PATH, first, None, user_key(first)).from_cache is False
+    second = login(store, "t2")
+    assert store.scope_for(user_key(second)) == login_key("ana@example.com")
+    result = _load(store, api, PATH, second, None, user_key(second))
+    assert api.calls[-1]["If-None-Match"] == '"v1"'
+    assert result.ok and result.from_cache
+    assert result.data["nome_empresa"].tolist()[0] == "A"
+
+
+def test_api_down_serves_the_copy_marked_stale(store):
+    api = FakeApi()
+    headers = login(store, "t1")
+    _load(store, api, PATH, headers, None, user_key(headers))
+    api.down = True
+    result = _load(store, api, PATH, headers, None, user_key(headers))
+    assert result.ok and result.stale_at == result.data.attrs[STALE_ATTR]
+
+
+def test_logout_prunes_the_login_copies(store):
+    api = FakeApi()
+    headers = login(store, "t1")
+    _load(store, api, PATH, headers, None, user_key(headers))
+    key = store.key_for(user_key(headers), PATH)
+    assert store.disk.meta(key) is not None
+    store.drop_user(user_key(headers))
+    assert store.disk.meta(key) is None
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from entities import ENTITIES, limits, validate_record
+
+
+def test_valid_record_is_converted_to_the_api_types():
+    payload, errors = validate_record(ENTITIES["detalhes_produtos"], {
+        "id_empresa": "3", "nome_produto": " Caneta ", "categoria": "Papelaria",
+        "preco_unitario": "1.234,50", "margem_lucro_percentual": 12, "data_lancamento": "05/02/2024",
+    })
+    assert errors == []
+    assert payload == {
+        "id_empresa": 3, "nome_produto": "Caneta", "categoria": "Papelaria",
+        "preco_unitario": 1234.5, "margem_lucro_percentual": 12.0, "data_lancamento": "2024-02-05",
+    }
+
+
+def test_every_invalid_field_is_reported():
+    _, errors = validate_record(ENTITIES["avaliacoes"], {"id_empresa": "2.5", "nota_diretor": 11, "nota_geral_empresa": None})
+    assert errors == [
+        "id_empresa: deve ser um número inteiro",
+        "nota_diretor: deve ser menor ou igual a 10",
+        "nota_geral_empresa: campo obrigatório",
+    ]
+
+
+def test_optional_text_and_spreadsheet_dates():
+    payload, errors = validate_record(ENTITIES["avaliacoes"], {"id_empresa": 1, "nota_diretor": 0, "nota_geral_empresa": 10, "comentario": float("nan")})
+    assert errors == [] and payload["comentario"] == ""
+    payload, errors = validate_record(ENTITIES["detalhes_produtos"], {
+        "id_empresa": 1, "nome_produto": "A", "categoria": "B", "preco_unitario": 1,
+        "margem_lucro_percentual": 1, "data_lancamento": datetime(2024, 3, 1, 12, 30),
+    })
+    assert errors == [] and payload["data_lancamento"] == str(date(2024, 3, 1))
+    _, errors = validate_record(ENTITIES["detalhes_produtos"], dict(payload, data_lancamento="2024-13-40"))
+    assert errors == ["data_lancamento: data inválida (use AAAA-MM-DD ou DD/MM/AAAA)"]
+
+
+def test_limits_follow_the_field_rules():
+    assert limits("avaliacoes", "nota_diretor") == {"min_value": 0, "max_value": 10}
+    assert limits("faturamento", "faturamento_mensal") == {"min_value": 0.01}
@@ -0,0 +1,85 @@
+import json
+import os
+from types import SimpleNamespace
+import pandas as pd
+import pytest
+from export import PartWriter, iter_pages
+from ingest import SCHEMAS, frame_from_records
+
+PATH = "/api/avaliacoes/"
+ROWS = [{"id_avaliacao": i, "id_empresa": i % 3, "nota_diretor": i % 11, "nota_geral_empresa": 5, "comentario": f"texto {i}"} for i in range(1, 26)]
+
+
+class FakeApi:
+    # paging: "server" (honra limit/offset), "none" (lista inteira) ou "no_offset" (sempre a primeira página).
+    def __init__(self, paging="server"):
+        self.paging = paging
+        self.calls = []
+
+    def get(self, path, headers=None, params=None):
+        self.calls.append(dict(params))
+        limit, offset = params["limit"], params["offset"]
+        if self.paging == "none":
+            body = ROWS
+        elif self.paging == "no_offset":
+            body = ROWS[:limit]
+        else:
+            body = ROWS[offset:offset + limit]
+        return SimpleNamespace(status_code=200, content=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+
+
+def ids(pages):
+    return [row for frame, _ in pages for row in frame["id_avaliacao"].tolist()]
+
+
+def test_pages_follow_limit_and_offset():
+    api = FakeApi()
+    pages = list(iter_pages(api, PATH, {}, "id_avaliacao", page_size=10))
+    assert [len(frame) for frame, _ in pages] == [10, 10, 5]
+    assert ids(pages) == list(range(1, 26))
+    assert [(call["offset"], call["order_by"]) for call in api.calls] == [(0, "id_avaliacao"), (10, "id_avaliacao"), (20, "id_avaliacao")]
+
+
+def test_ignored_limit_is_split_into_pages_without_asking_again():
+    api = FakeApi("none")
+    pages = list(iter_pages(api, PATH, {}, None, page_size=10))
+    assert [len(frame) for frame, _ in pages] == [10, 10, 5]
+    assert {total for _, total in pages} == {25}
+    assert ids(pages) == list(range(1, 26))
+    assert len(api.calls) == 1
+
+
+def test_ignored_offset_fails_instead_of_repeating_rows():
+    with pytest.raises(RuntimeError, match="offset"):
+        list(iter_pages(FakeApi("no_offset"), PATH, {}, None, page_size=10))
+
+
+def pages(n, size=500):
+    records = [dict(ROWS[i % 25], id_avaliacao=i + 1) for i in range(n * size)]
+    for start in range(0, n * size, size):
+        yield frame_from_records(records[start:start + size], SCHEMAS[PATH])
+
+
+def test_csv_parts_are_complete_files(tmp_path):
+    writer = PartWriter(str(tmp_path), "avaliacoes", "CSV", part_bytes=40_000)
+    for frame in pages(6):
+        writer.write(frame)
+    parts = writer.close()
+    assert len(parts) > 1 and parts[0] == "avaliacoes-parte1.csv"
+    assert sorted(os.listdir(tmp_path)) == sorted(parts)
+    read = [pd.read_csv(tmp_path / name) for name in parts]
+    assert all(list(part.columns) == list(SCHEMAS[PATH]) for part in read)
+    assert pd.concat(read)["id_avaliacao"].tolist() == list(range(1, 3001))
+
+
+def test_parquet_parts_share_the_schema_across_category_pages(tmp_path):
+    pytest.importorskip("pyarrow")
+    schema = SCHEMAS["/api/produtos_vendidos/"]
+    writer = PartWriter(str(tmp_path), "produtos_vendidos", "Parquet")
+    # Cada página tem outro dicionário de categorias.
+    for names in (["A", "B"], ["C"], ["B", "D"]):
+        records = [{"id_venda": i, "id_faturamento": 1, "nome_produto": name, "produtos_vendidos": 1} for i, name in enumerate(names)]
+        writer.write(frame_from_records(records, schema))
+    parts = writer.close()
+    assert parts == ["produtos_vendidos-parte1.parquet"]
+    assert pd.read_parquet(tmp_path / parts[0])["nome_produto"].tolist() == ["A", "B", "C", "B", "D"]
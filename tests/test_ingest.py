@@ -0,0 +1,61 @@
+import io
+import json
+import pandas as pd
+import pytest
+from ingest import ARROW_STREAM, PARQUET, read_frame
+
+PATH = "/api/detalhes_produtos/"
+RECORDS = [
+    {"id_produto": 1, "id_empresa": 2, "nome_produto": "A", "categoria": "x", "preco_unitario": "9.5",
+     "margem_lucro_percentual": 10, "data_lancamento": "2024-01-02", "extra": "livre"},
+    {"id_produto": 2, "id_empresa": None, "nome_produto": None, "categoria": "y", "preco_unitario": 3,
+     "margem_lucro_percentual": None, "data_lancamento": "sem data", "extra": None},
+]
+
+
+def test_json_records_get_the_endpoint_schema():
+    df = read_frame(PATH, json.dumps(RECORDS).encode())
+    assert df.dtypes.drop(["data_lancamento", "extra"]).astype(str).to_dict() == {
+        "id_produto": "Int64", "id_empresa": "Int64", "nome_produto": "string", "categoria": "category",
+        "preco_unitario": "float64", "margem_lucro_percentual": "float32",
+    }
+    assert pd.api.types.is_datetime64_dtype(df["data_lancamento"])
+    # Colunas fora do esquema mantêm o tipo inferido.
+    assert df["extra"].tolist()[0] == "livre"
+    assert df["id_empresa"].isna().tolist() == [False, True]
+    assert df["data_lancamento"].isna().tolist() == [False, True]
+    assert df["preco_unitario"].tolist() == [9.5, 3.0]
+
+
+def test_paged_envelope_keeps_the_total():
+    df = read_frame(PATH, json.dumps({"items": RECORDS[:1], "total": 40}).encode())
+    assert len(df) == 1
+    assert df.attrs["total"] == 40
+
+
+def test_empty_list_keeps_the_schema_columns():
+    df = read_frame("/api/empresas/", b"[]")
+    assert list(df.columns) == ["id_empresa", "nome_empresa", "diretor_empresa"]
+    assert df.empty
+
+
+@pytest.mark.parametrize("body", [b'{"detail": "erro"}', b"[1, 2]", b"nao e json"])
+def test_body_without_records_is_rejected(body):
+    with pytest.raises(ValueError):
+        read_frame(PATH, body)
+
+
+def test_arrow_and_parquet_match_json():
+    pa = pytest.importorskip("pyarrow")
+    expected = read_frame(PATH, json.dumps(RECORDS).encode())
+    source = pd.DataFrame(RECORDS).astype({"preco_unitario": "float64"})
+    table = pa.Table.from_pandas(source, preserve_index=False)
+    stream = io.BytesIO()
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+    parquet = io.BytesIO()
+    source.to_parquet(parquet, index=False)
+    for content, content_type in ((stream.getvalue(), ARROW_STREAM), (parquet.getvalue(), f"{PARQUET}; charset=binary")):
+        df = read_frame(PATH, content, content_type)
+        pd.testing.assert_frame_equal(df.drop(columns="extra"), expected.drop(columns="extra"), check_dtype=False)
+        assert df.dtypes.drop("extra").astype(str).to_dict() == expected.dtypes.drop("extra").astype(str).to_dict()
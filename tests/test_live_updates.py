@@ -0,0 +1,140 @@
+import json
+import uuid
+from contextlib import contextmanager
+import pandas as pd
+import pytest
+import live_updates
+from aggregations import get_insights_engine
+from dataset_store import DatasetStore
+from ingest import SCHEMAS, frame_from_records
+from live_updates import EventStream, LiveFeed
+from review_analytics import get_review_analytics
+from test_aggregations import ORDER, built, raw_frames, upsert
+
+REVIEWS = "/api/avaliacoes/"
+SALES = "/api/produtos_vendidos/"
+
+
+@pytest.fixture
+def feed():
+    # Usuário novo a cada teste: o motor e as análises são por escopo (cache_resource).
+    user = uuid.uuid4().hex
+    store = DatasetStore()
+    frames = raw_frames()
+    for name in ORDER:
+        store.put(user, f"/api/{name}/", frame_from_records(frames[name].to_dict("records"), SCHEMAS[f"/api/{name}/"]))
+    engine = get_insights_engine(store, user)
+    engine.build(*(frames[name] for name in ORDER))
+    analytics = get_review_analytics(store, user)
+    analytics.build(frames["avaliacoes"].assign(comentario="ok"))
+    return LiveFeed(store, events_path="/api/events"), store, user, frames
+
+
+def event(path, rows):
+    return json.dumps({"path": path, "rows": rows}).encode()
+
+
+def test_events_update_the_cached_frame_engine_and_reviews(feed):
+    feed, store, user, frames = feed
+    store.put(user, "/api/insights/", pd.DataFrame({"nome_empresa": ["x"]}))
+    rows = [
+        {"id_avaliacao": 201, "id_empresa": 1, "nota_diretor": 10, "nota_geral_empresa": 10, "comentario": "excelente gestão"},
+        {"id_avaliacao": 3, "id_empresa": 2, "nota_diretor": 0, "nota_geral_empresa": 0, "comentario": "ruim"},
+    ]
+    feed._on_event(user, event(REVIEWS, rows))
+
+    cached = store.get(user, REVIEWS).set_index("id_avaliacao")
+    assert len(cached) == 201
+    assert cached.loc[3, "nota_diretor"] == 0 and cached.loc[201, "comentario"] == "excelente gestão"
+    # Agregados do servidor ficam desatualizados; o próprio dataset não.
+    assert store.get(user, "/api/insights/") is None
+
+    for row in rows:
+        frames["avaliacoes"] = upsert(frames["avaliacoes"], "id_avaliacao", {k: v for k, v in row.items() if k != "comentario"})
+    expected = built(frames)
+    pd.testing.assert_frame_equal(get_insights_engine(store, user).insights().sort_values("nome_empresa", ignore_index=True),
+                                  expected.insights().sort_values("nome_empresa", ignore_index=True), check_dtype=False)
+    assert get_review_analytics(store, user).search("excelente")[0] == 1
+
+
+def test_event_without_cached_frame_invalidates_the_pages(feed):
+    feed, store, user, _ = feed
+    store.invalidate([SALES])
+    store.put(user, SALES, pd.DataFrame({"id_venda": [1]}), params={"offset": 0})
+    feed._on_event(user, event(SALES, [{"id_venda": 999, "id_faturamento": 1, "nome_produto": "P1", "produtos_vendidos": 3}]))
+    assert store.get(user, SALES) is None
+    assert store.get(user, SALES, params={"offset": 0}) is None
+
+
+def test_malformed_or_unknown_events_are_ignored(feed):
+    feed, store, user, _ = feed
+    version = store.get(user, REVIEWS).attrs["dataset_version"]
+    for data in (b"{nao e json", event("/api/empresas/", [{"id_empresa": 1}]), event(REVIEWS, [])):
+        feed._on_event(user, data)
+    assert store.get(user, REVIEWS).attrs["dataset_version"] == version
+
+
+class StreamResponse:
+    def __init__(self, status_code, lines=()):
+        self.status_code = status_code
+        self.lines = lines
+
+    def iter_lines(self, chunk_size=None):
+        return iter(self.lines)
+
+
+class StreamClient:
+    base_url = "http://api"
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.session = self
+
+    def timeout_for(self, path):
+        return (1, 1)
+
+    @contextmanager
+    def get(self, url, **kwargs):
+        yield self.responses.pop(0)
+
+
+def test_listener_applies_the_event_stream(feed, monkeypatch):
+    feed, store, user, _ = feed
+    monkeypatch.setattr(live_updates, "SSE_RECONNECT", 0)
+    monkeypatch.setattr(live_updates, "user_key", lambda headers: user)
+    stream = [
+        b": keep-alive",
+        b"data: " + event(REVIEWS, [{"id_avaliacao": 300, "id_empresa": 1, "nota_diretor": 7}]),
+        b"",
+        b"data: " + event(REVIEWS, [{"id_avaliacao": 301, "id_empresa": 2, "nota_diretor": 8}]),
+    ]
+    # Depois que o stream termina, a reconexão recebe 404: o feed volta ao polling e a thread sai.
+    events = EventStream(feed, StreamClient([StreamResponse(200, stream), StreamResponse(404)]))
+    events.expires_at = float("inf")
+    events.run()
+    assert {300, 301} <= set(store.get(user, REVIEWS)["id_avaliacao"].tolist())
+    assert get_review_analytics(store, user).histogram("nota_diretor", [2])["avaliacoes"][8] >= 1
+    assert feed.events_path == ""
+
+
+def test_stream_stops_on_logout_and_after_a_token_change(feed, monkeypatch):
+    feed, store, user, _ = feed
+    monkeypatch.setattr(live_updates, "user_key", lambda headers: user)
+    events = store.resource("live_events", user, lambda: EventStream(feed, StreamClient([])))
+    events.headers, events.expires_at = {"Authorization": "a"}, float("inf")
+    rows = [{"id_avaliacao": 400 + i, "id_empresa": 1, "nota_diretor": 7} for i in range(3)]
+    lines = iter(b"data: " + event(REVIEWS, [row]) for row in rows)
+
+    class Lines:
+        def iter_lines(self, chunk_size=None):
+            yield next(lines)
+            # Uma sessão renovou o token: a conexão é refeita com o novo, sem ler mais nada desta.
+            events.headers = {"Authorization": "b"}
+            yield next(lines)
+
+    events._read(Lines(), {"Authorization": "a"})
+    ids = set(store.get(user, REVIEWS)["id_avaliacao"].tolist())
+    assert 400 in ids and 401 not in ids
+
+    store.drop_user(user)
+    assert events.closed.is_set() and not events.active()
@@ -0,0 +1,108 @@
+import time
+from types import SimpleNamespace
+import pytest
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpen, RateLimited, RateLimiter, Resilience
+from state_backend import MemoryBackend
+
+
+def shared_backend():
+    backend = MemoryBackend()
+    backend.shared = True
+    return backend
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, cooldown=60)
+    for _ in range(2):
+        assert breaker.allow()
+        assert not breaker.failure("HTTP 503")
+    breaker.success()
+    for _ in range(2):
+        breaker.failure("HTTP 503")
+    assert breaker.state == CLOSED
+    assert breaker.failure("timeout")
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_in() > 59
+
+
+def test_breaker_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker(failures=1, cooldown=0.05)
+    breaker.failure("HTTP 500")
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.failure("HTTP 500")
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_circuit_fails_fast_without_calling_the_api():
+    resilience = Resilience(failures=2, cooldown=60, limiter=RateLimiter(rate=0, user_rate=0))
+    calls = []
+
+    def send():
+        calls.append(1)
+        return SimpleNamespace(status_code=503)
+
+    for _ in range(2):
+        resilience.call("/api/empresas/1", {}, send)
+    with pytest.raises(CircuitOpen):
+        resilience.call("/api/empresas/2", {}, send)
+    assert len(calls) == 2
+    # Outro endpoint tem o próprio breaker.
+    resilience.call("/api/faturamento/", {}, send)
+    assert len(calls) == 3
+
+
+def test_bucket_allows_the_burst_then_refuses():
+    limiter = RateLimiter(rate=20, burst=3, user_rate=0, max_wait=0)
+    for _ in range(3):
+        limiter.acquire()
+    with pytest.raises(RateLimited):
+        limiter.acquire()
+    time.sleep(0.06)
+    limiter.acquire()
+
+
+def test_bucket_waits_up_to_max_wait():
+    limiter = RateLimiter(rate=20, burst=1, user_rate=0, max_wait=1)
+    limiter.acquire()
+    start = time.monotonic()
+    limiter.acquire()
+    assert 0.03 < time.monotonic() - start < 0.5
+
+
+def test_user_bucket_is_per_user_and_gives_back_the_global_token():
+    limiter = RateLimiter(rate=100, burst=3, user_rate=1, user_burst=1, max_wait=0)
+    limiter.acquire("a")
+    with pytest.raises(RateLimited):
+        limiter.acquire("a")
+    # A recusa de "a" devolveu o token global: ainda cabem dois.
+    limiter.acquire("b")
+    limiter.acquire("c")
+
+
+def test_bucket_is_shared_between_replicas():
+    backend = shared_backend()
+    replicas = [RateLimiter(backend, rate=0.01, burst=4, user_rate=0, max_wait=0) for _ in range(2)]
+    for i in range(4):
+        replicas[i % 2].acquire()
+    for replica in replicas:
+        with pytest.raises(RateLimited):
+            replica.acquire()
+
+
+def test_bucket_lock_timeout_refuses_instead_of_skipping_the_lock():
+    backend = shared_backend()
+    limiter = RateLimiter(backend, rate=100, burst=100, user_rate=0, max_wait=0)
+    backend.add("ratelimit_lock", "global:global", b"outra-replica", ttl=60)
+    with pytest.raises(RateLimited):
+        limiter.acquire()
+    assert backend.get("ratelimit", "global:global") is None
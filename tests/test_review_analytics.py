@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from review_analytics import ReviewAnalytics, SCORES, terms_of
+
+
+def reviews(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    phrases = ["ótimo atendimento", "péssimo diretor", "bom ambiente de trabalho", None, "salário baixo", "gestão excelente"]
+    return pd.DataFrame({
+        "id_avaliacao": np.arange(1, n + 1),
+        "id_empresa": rng.integers(1, 40, n),
+        "nota_diretor": rng.integers(0, 11, n),
+        "nota_geral_empresa": rng.integers(0, 11, n),
+        "comentario": pd.Series(rng.choice(np.array(phrases, dtype=object), n), dtype="string"),
+    })
+
+
+def apply(frame, record):
+    mask = frame["id_avaliacao"] == record["id_avaliacao"]
+    if not mask.any():
+        return pd.concat([frame, pd.DataFrame([record])], ignore_index=True)
+    frame = frame.copy()
+    for column, value in record.items():
+        frame.loc[mask, column] = value
+    return frame
+
+
+WRITES = [
+    {"id_avaliacao": 5, "id_empresa": 7, "nota_diretor": 3, "nota_geral_empresa": 9, "comentario": "atendimento horrível xyzterm"},
+    {"id_avaliacao": 3001, "id_empresa": 500, "nota_diretor": 10, "nota_geral_empresa": 1, "comentario": "atendimento ótimo"},
+    {"id_avaliacao": 9, "nota_diretor": 0},
+    {"id_avaliacao": 5, "comentario": None},
+    {"id_avaliacao": 12, "id_empresa": 500, "comentario": "Gestão EXCELENTE, ótimo!"},
+]
+
+
+@pytest.fixture
+def pair():
+    frame = reviews()
+    incremental = ReviewAnalytics()
+    incremental.build(frame)
+    for record in WRITES:
+        incremental.apply_write(dict(record))
+        frame = apply(frame, record)
+    rebuilt = ReviewAnalytics()
+    rebuilt.build(frame)
+    return incremental, rebuilt
+
+
+def test_incremental_scores_match_a_rebuild(pair):
+    incremental, rebuilt = pair
+    assert not incremental.needs_build()
+    for column in SCORES.values():
+        pd.testing.assert_frame_equal(incremental.summary(column), rebuilt.summary(column))
+        pd.testing.assert_frame_equal(incremental.histogram(column, [7, 500]), rebuilt.histogram(column, [7, 500]))
+        pd.testing.assert_frame_equal(incremental.rolling(column, 50, [7]), rebuilt.rolling(column, 50, [7]))
+
+
+@pytest.mark.parametrize("companies", [None, [7, 500]])
+def test_incremental_keywords_match_a_rebuild(pair, companies):
+    incremental, rebuilt = pair
+    got, want = incremental.keywords(companies, n=50), rebuilt.keywords(companies, n=50)
+    assert dict(zip(got["termo"], got["avaliacoes"])) == dict(zip(want["termo"], want["avaliacoes"]))
+
+
+@pytest.mark.parametrize("term", ["atendimento", "xyzterm", "horrível", "ótimo", "excelente"])
+def test_incremental_search_matches_a_rebuild(pair, term):
+    incremental, rebuilt = pair
+    count, means, rows = incremental.search(term)
+    expected_count, expected_means, expected_rows = rebuilt.search(term)
+    assert (count, means) == (expected_count, expected_means)
+    assert rows["id_avaliacao"].tolist() == expected_rows["id_avaliacao"].tolist()
+
+
+def test_terms_are_lowercase_letters_without_stopwords():
+    assert terms_of("Gestão EXCELENTE, ótimo! 10x sem ar") == ["excelente", "gestão", "ótimo"]
+    assert terms_of(None) == []
+
+
+def test_write_without_id_schedules_a_rebuild():
+    analytics = ReviewAnalytics()
+    analytics.build(reviews(10))
+    analytics.apply_write({"nota_diretor": 5})
+    assert analytics.needs_build()
+
+
+def test_many_writes_compact_into_a_rebuild():
+    analytics = ReviewAnalytics()
+    analytics.build(reviews(10))
+    analytics.apply_rows(pd.DataFrame({"id_avaliacao": np.arange(100, 1200), "id_empresa": 1, "nota_diretor": 5, "comentario": "x"}))
+    assert analytics.needs_build()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from table_view import DEFAULT_ORDER, filter_and_sort, page_params, parse_page
+
+
+def rows(n):
+    return pd.DataFrame({"id": range(n)})
+
+
+def test_page_params_map_the_page_to_limit_and_offset():
+    assert page_params(3, 50, "", DEFAULT_ORDER, False) == {"limit": 50, "offset": 100}
+    assert page_params(1, 10, "abc", "nome", True) == {"limit": 10, "offset": 0, "order_by": "-nome", "q": "abc"}
+
+
+def test_envelope_total_is_used():
+    page = rows(10)
+    page.attrs["total"] = 95
+    assert parse_page(page, {"limit": 10, "offset": 0})[1:] == (95, True)
+
+
+def test_more_rows_than_the_limit_means_the_api_ignored_it():
+    assert parse_page(rows(30), {"limit": 10, "offset": 0})[1:] == (30, False)
+
+
+def test_short_page_is_the_last_one():
+    assert parse_page(rows(4), {"limit": 10, "offset": 20})[1:] == (24, True)
+
+
+def test_full_page_without_total_leaves_the_total_unknown():
+    assert parse_page(rows(10), {"limit": 10, "offset": 0})[1:] == (None, True)
+
+
+def test_filter_matches_any_column_and_sort_keeps_missing_values_last():
+    df = pd.DataFrame({"nome": ["Alfa", "beta", "Gama", "Alfabeto"], "valor": [3.0, np.nan, 1.0, 2.0]})
+    assert filter_and_sort(df, "ALFA", DEFAULT_ORDER, False)["nome"].tolist() == ["Alfa", "Alfabeto"]
+    assert filter_and_sort(df, "", "valor", True)["nome"].tolist() == ["Alfa", "Alfabeto", "Gama", "beta"]
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from timeseries import RevenueRollups, TOTAL_LABEL, downsample, lttb
+
+
+def test_lttb_returns_everything_below_the_threshold():
+    assert lttb(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(np.arange(5), np.arange(5), 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_keeps_endpoints_order_and_size():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    selected = lttb(x, y, 100)
+    assert len(selected) == 100
+    assert selected[0] == 0 and selected[-1] == 999
+    assert (np.diff(selected) > 0).all()
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(10_000)
+    y = np.zeros(10_000)
+    y[[1234, 5678, 8765]] = [100, -80, 50]
+    selected = lttb(x, y, 50)
+    assert {1234, 5678, 8765} <= set(selected.tolist())
+
+
+def test_lttb_matches_reference_on_a_small_series():
+    # Buckets de 2 pontos entre as pontas: escolhe o vértice do maior triângulo em cada um.
+    x = np.arange(8)
+    y = np.array([0, 5, 1, 1, 9, 1, 1, 0])
+    assert lttb(x, y, 5).tolist() == [0, 1, 4, 5, 7]
+
+
+def test_downsample_splits_the_budget_between_series():
+    periods = pd.date_range("2024-01-01", periods=500, freq="D").to_numpy()
+    data = pd.DataFrame({
+        "periodo": np.concatenate([periods, periods]),
+        "serie": ["A"] * 500 + ["B"] * 500,
+        "valor": np.random.default_rng(0).normal(size=1000),
+    })
+    shown = downsample(data, max_points=100)
+    assert shown["serie"].value_counts().to_dict() == {"A": 50, "B": 50}
+
+
+def test_rollups_use_the_configured_date_field():
+    faturamento = pd.DataFrame({
+        "id_faturamento": [1, 2, 3, 4],
+        "id_empresa": [1, 1, 2, 2],
+        "faturamento_mensal": [10.0, 20.0, 30.0, 40.0],
+        "emitido_em": ["2024-01-05", "2024-02-10", "2024-02-11", "sem data"],
+    })
+    vendas = pd.DataFrame({"id_faturamento": [1, 3, 9], "produtos_vendidos": [2, 5, 7]})
+    rollups = RevenueRollups(faturamento, vendas, "emitido_em")
+    months = rollups.query("M", pd.Timestamp("2024-01-01").date(), pd.Timestamp("2024-12-31").date(), "faturamento")
+    assert months["valor"].tolist() == [10.0, 50.0]
+    assert set(months["serie"]) == {TOTAL_LABEL}
+    units = rollups.query("Y", pd.Timestamp("2024-01-01").date(), pd.Timestamp("2024-12-31").date(), "unidades", {2: "B"})
+    assert units[["serie", "valor"]].values.tolist() == [["B", 5.0]]
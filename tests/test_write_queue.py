@@ -0,0 +1,173 @@
+import threading
+import time
+import pytest
+from dataset_store import DatasetStore, user_key
+from ingest import SCHEMAS, frame_from_records
+from write_queue import IDEMPOTENCY_HEADER, WriteQueue, retry_after
+
+PATH = "/api/empresas/"
+HEADERS = {"Authorization": "Bearer t1"}
+ROWS = [{"id_empresa": i, "nome_empresa": f"E{i}", "diretor_empresa": f"D{i}"} for i in (1, 2, 3)]
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class FakeClient:
+    # respond(method, path, payload, attempt) -> FakeResponse; gate segura as respostas até ser liberado.
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.current_authorization = None
+        self.lock = threading.Lock()
+
+    def request(self, method, path, headers=None, json=None):
+        self.gate.wait(5)
+        with self.lock:
+            attempt = sum(1 for call in self.calls if call[1] == path and call[3] == json) + 1
+            self.calls.append((method, path, dict(headers), json, time.monotonic()))
+        return self.respond(method, path, json, attempt)
+
+
+def accept(method, path, payload, attempt):
+    if method == "POST":
+        return FakeResponse(200, {**payload, "id_empresa": 100})
+    return FakeResponse(200, payload)
+
+
+def reject_bad(method, path, payload, attempt):
+    if "bad" in payload.values():
+        return FakeResponse(422, {"detail": "inválido"})
+    return accept(method, path, payload, attempt)
+
+
+@pytest.fixture
+def store():
+    store = DatasetStore()
+    store.put(user_key(HEADERS), PATH, frame_from_records(ROWS, SCHEMAS[PATH]))
+    return store
+
+
+def cached(store, headers=HEADERS):
+    frame = store.get(user_key(headers), PATH)
+    return {row["id_empresa"]: (row["nome_empresa"], row["diretor_empresa"]) for row in frame.to_dict("records")}
+
+
+def settle(queue, owner, timeout=5):
+    deadline = time.monotonic() + timeout
+    while any(write.status != "failed" for write in queue.for_user(owner)):
+        assert time.monotonic() < deadline, "fila não esvaziou"
+        time.sleep(0.01)
+
+
+def test_insert_appears_at_once_and_gets_the_real_id(store):
+    client = FakeClient(accept)
+    client.gate.clear()
+    queue = WriteQueue(store)
+    queue.submit(client, HEADERS, "POST", PATH, {"nome_empresa": "Nova", "diretor_empresa": "X"}, "nova")
+    assert cached(store)[-1] == ("Nova", "X")
+    client.gate.set()
+    settle(queue, user_key(HEADERS))
+    assert cached(store)[100] == ("Nova", "X")
+    assert -1 not in cached(store)
+
+
+def test_rejected_writes_are_rolled_back(store):
+    queue = WriteQueue(store)
+    client = FakeClient(reject_bad)
+    queue.submit(client, HEADERS, "POST", PATH, {"nome_empresa": "bad", "diretor_empresa": "X"}, "a")
+    queue.submit(client, HEADERS, "PUT", f"{PATH}2", {"nome_empresa": "bad"}, "b")
+    settle(queue, user_key(HEADERS))
+    assert cached(store) == {row["id_empresa"]: (row["nome_empresa"], row["diretor_empresa"]) for row in ROWS}
+    assert [write.status for write in queue.for_user(user_key(HEADERS))] == ["failed", "failed"]
+
+
+@pytest.mark.parametrize("second, expected", [
+    ("B", ("B", "D1")),
+    ("bad", ("E1", "D1")),
+])
+def test_rollback_keeps_later_pending_writes_to_the_same_record(store, second, expected):
+    client = FakeClient(reject_bad)
+    client.gate.clear()
+    queue = WriteQueue(store)
+    queue.submit(client, HEADERS, "PUT", f"{PATH}1", {"nome_empresa": "bad", "diretor_empresa": "DA"}, "a")
+    queue.submit(client, HEADERS, "PUT", f"{PATH}1", {"nome_empresa": second}, "b")
+    assert cached(store)[1] == (second, "DA")
+    client.gate.set()
+    settle(queue, user_key(HEADERS))
+    assert cached(store)[1] == expected
+
+
+def test_confirmed_update_survives_a_reload_of_the_dataset(store):
+    client = FakeClient(accept)
+    client.gate.clear()
+    queue = WriteQueue(store)
+    queue.submit(client, HEADERS, "PUT", f"{PATH}3", {"nome_empresa": "Renomeada"}, "a")
+    # O dataset foi recarregado da API antes de ela gravar a alteração.
+    store.put(user_key(HEADERS), PATH, frame_from_records(ROWS, SCHEMAS[PATH]))
+    client.gate.set()
+    settle(queue, user_key(HEADERS))
+    assert cached(store)[3] == ("Renomeada", "D3")
+
+
+def test_retries_keep_the_idempotency_key_and_honor_retry_after(store):
+    def flaky(method, path, payload, attempt):
+        if attempt == 1:
+            return FakeResponse(429, {"detail": "calma"}, {"Retry-After": "0.3"})
+        if attempt == 2:
+            return FakeResponse(503, {"detail": "fora"})
+        return accept(method, path, payload, attempt)
+
+    client = FakeClient(flaky)
+    queue = WriteQueue(store, backoff=0.01)
+    queue.submit(client, HEADERS, "PUT", f"{PATH}1", {"nome_empresa": "X"}, "a")
+    settle(queue, user_key(HEADERS))
+    assert len(client.calls) == 3
+    assert len({call[2][IDEMPOTENCY_HEADER] for call in client.calls}) == 1
+    assert client.calls[1][4] - client.calls[0][4] >= 0.3
+    assert not queue.for_user(user_key(HEADERS))
+
+
+def test_waiting_retry_does_not_hold_a_worker(store):
+    other = {"Authorization": "Bearer outro"}
+    store.put(user_key(other), PATH, frame_from_records(ROWS, SCHEMAS[PATH]))
+
+    def slow_first(method, path, payload, attempt):
+        if payload["nome_empresa"] == "lento" and attempt == 1:
+            return FakeResponse(503, {"detail": "fora"}, {"Retry-After": "0.5"})
+        return accept(method, path, payload, attempt)
+
+    client = FakeClient(slow_first)
+    queue = WriteQueue(store, max_workers=1, backoff=0.01)
+    queue.submit(client, HEADERS, "PUT", f"{PATH}1", {"nome_empresa": "lento"}, "a")
+    time.sleep(0.05)
+    queue.submit(client, other, "PUT", f"{PATH}2", {"nome_empresa": "rapido"}, "b")
+    settle(queue, user_key(other), timeout=0.4)
+    settle(queue, user_key(HEADERS))
+    assert [call[3]["nome_empresa"] for call in client.calls] == ["lento", "rapido", "lento"]
+
+
+def test_each_attempt_uses_the_current_token(store):
+    client = FakeClient(accept)
+    client.current_authorization = lambda authorization: "Bearer t2" if authorization == "Bearer t1" else None
+    queue = WriteQueue(store)
+    queue.submit(client, HEADERS, "PUT", f"{PATH}1", {"nome_empresa": "X"}, "a")
+    settle(queue, user_key(HEADERS))
+    assert client.calls[0][2]["Authorization"] == "Bearer t2"
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert retry_after(FakeResponse(429, headers={"Retry-After": "2"})) == 2.0
+    assert retry_after(FakeResponse(429)) is None
+    assert retry_after(FakeResponse(429, headers={"Retry-After": "amanhã"})) is None
+    assert retry_after(FakeResponse(429, headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
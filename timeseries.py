@@ -0,0 +1,184 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from charts import line_chart
+from data_fetcher import fetch_all
+from metrics import timed, timed_call
+from ranking import VersionedCache, versioned_key
+
+
+FATURAMENTO = "/api/faturamento/"
+VENDAS = "/api/produtos_vendidos/"
+
+FREQUENCIES = {"Dia": "D", "Mês": "M", "Trimestre": "Q", "Ano": "Y"}
+METRICS = {"Faturamento (R$)": "faturamento", "Unidades vendidas": "unidades"}
+TOTAL_LABEL = "Todas as empresas"
+# A API devolve o faturamento sem data (id, empresa, valores mensal e anual). A série temporal só
+# é montada se a API expuser a data de cada faturamento, no campo indicado aqui (ex.: "data_faturamento").
+DATE_FIELD = os.getenv("REVENUE_DATE_FIELD", "")
+
+# Pontos por gráfico depois do LTTB (divididos entre as séries) e empresas comparáveis de uma vez.
+MAX_POINTS = int(os.getenv("TIMESERIES_MAX_POINTS", "600"))
+MAX_SERIES = int(os.getenv("TIMESERIES_MAX_SERIES", "8"))
+
+
+def truncate(dates, freq):
+    # Início do período de cada data, direto em datetime64 (sem objetos Period).
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if freq == "D":
+        return dates
+    if freq == "Y":
+        return dates.astype("datetime64[Y]").astype("datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    if freq == "Q":
+        months = months - months.astype("int64") % 3
+    return months.astype("datetime64[D]")
+
+
+class RevenueRollups:
+    # Faturamento e unidades vendidas por (período, empresa) em cada granularidade, calculados uma
+    # vez por versão dos dados brutos; filtros de período/empresa consultam só esses agregados.
+    def __init__(self, faturamento, vendas, date_field=DATE_FIELD):
+        fat = faturamento[["id_faturamento", "id_empresa", "faturamento_mensal"]].assign(
+            data=pd.to_datetime(faturamento[date_field], errors="coerce"))
+        fat = fat.dropna(subset=["id_empresa", "data"])
+        day = truncate(fat["data"], "D")
+        revenue = pd.DataFrame({"periodo": day, "id_empresa": fat["id_empresa"].to_numpy("int64"),
+                                "faturamento": fat["faturamento_mensal"].to_numpy("float64", na_value=0.0)})
+
+        # Vendas não têm data própria: herdam a data e a empresa do faturamento.
+        keys = pd.DataFrame({"id_faturamento": fat["id_faturamento"].to_numpy("int64"), "periodo": day,
+                             "id_empresa": revenue["id_empresa"]}).drop_duplicates("id_faturamento")
+        units = vendas[["id_faturamento", "produtos_vendidos"]].dropna(subset=["id_faturamento"])
+        units = units.astype({"id_faturamento": "int64"}).merge(keys, on="id_faturamento", how="inner")
+        units = pd.DataFrame({"periodo": units["periodo"], "id_empresa": units["id_empresa"],
+                              "unidades": units["produtos_vendidos"].to_numpy("float64", na_value=0.0)})
+
+        daily = pd.concat([
+            revenue.groupby(["periodo", "id_empresa"], sort=False)["faturamento"].sum(),
+            units.groupby(["periodo", "id_empresa"], sort=False)["unidades"].sum(),
+        ], axis=1).fillna(0.0)
+        self.levels = {"D": self._sorted(daily.reset_index())}
+        # Granularidades maiores saem do diário, não das linhas brutas.
+        for freq in ("M", "Q", "Y"):
+            coarse = self.levels["D"].assign(periodo=truncate(self.levels["D"]["periodo"], freq))
+            self.levels[freq] = self._sorted(coarse.groupby(["periodo", "id_empresa"], sort=False, as_index=False)[["faturamento", "unidades"]].sum())
+
+    @staticmethod
+    def _sorted(frame):
+        frame = frame.sort_values(["periodo", "id_empresa"], kind="stable", ignore_index=True)
+        frame["periodo"] = frame["periodo"].to_numpy("datetime64[D]")
+        return frame
+
+    @property
+    def empty(self):
+        return self.levels["D"].empty
+
+    def bounds(self):
+        periods = self.levels["D"]["periodo"]
+        return periods.iloc[0].date(), periods.iloc[-1].date()
+
+    def query(self, freq, start, end, metric, companies=None):
+        # Devolve (periodo, serie, valor); sem empresas selecionadas, uma série com o total.
+        frame = self.levels[freq]
+        periods = frame["periodo"].to_numpy()
+        lo = np.searchsorted(periods, truncate([start], freq)[0], "left")
+        hi = np.searchsorted(periods, np.datetime64(end, "D"), "right")
+        window = frame.iloc[lo:hi]
+        if companies:
+            window = window[window["id_empresa"].isin(list(companies))]
+            return pd.DataFrame({"periodo": window["periodo"].to_numpy(),
+                                 "serie": window["id_empresa"].map(companies).to_numpy(),
+                                 "valor": window[metric].to_numpy()})
+        total = window.groupby("periodo", sort=True)[metric].sum()
+        return pd.DataFrame({"periodo": total.index.to_numpy(), "serie": TOTAL_LABEL, "valor": total.to_numpy()})
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: índices dos pontos que preservam a forma da série.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    edges = (np.arange(threshold - 1) * ((n - 2) / (threshold - 2))).astype(int) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(data, max_points=MAX_POINTS):
+    series = data["serie"].unique()
+    threshold = max(3, max_points // max(1, len(series)))
+    parts = []
+    for name in series:
+        part = data[data["serie"] == name]
+        x = part["periodo"].to_numpy().astype("datetime64[D]").astype("int64")
+        parts.append(part.iloc[lttb(x, part["valor"].to_numpy(), threshold)])
+    return pd.concat(parts, ignore_index=True) if parts else data
+
+
+@st.cache_resource
+def get_rollup_cache():
+    return VersionedCache(max_entries=8)
+
+
+def get_rollups(faturamento, vendas):
+    key = versioned_key(f"revenue_rollups:{DATE_FIELD}", [faturamento, vendas])
+    return get_rollup_cache().get_or_compute(key, lambda: timed_call("aggregation", "revenue_rollups", lambda: RevenueRollups(faturamento, vendas)))
+
+
+def revenue_timeseries(client, headers, empresas):
+    if not DATE_FIELD:
+        st.info("A API não informa a data dos faturamentos, então não há série temporal. "
+                "Se ela passar a devolver esse campo, indique o nome em REVENUE_DATE_FIELD.")
+        return
+    raw = fetch_all(client, [FATURAMENTO, VENDAS], headers)
+    failed = [result for result in raw.values() if not result.ok]
+    if failed:
+        st.warning(f"Não foi possível carregar o histórico de faturamento. ({'; '.join(f'{r.path}: {r.error}' for r in failed)})")
+        return
+    if DATE_FIELD not in raw[FATURAMENTO].data.columns:
+        st.warning(f"A resposta de {FATURAMENTO} não tem o campo de data '{DATE_FIELD}' (REVENUE_DATE_FIELD).")
+        return
+    rollups = get_rollups(raw[FATURAMENTO].data, raw[VENDAS].data)
+    if rollups.empty:
+        st.warning("Nenhum faturamento com data disponível.")
+        return
+
+    first, last = rollups.bounds()
+    col_freq, col_metric, col_range = st.columns([1, 1, 2])
+    with col_freq:
+        freq_label = st.selectbox("Granularidade", list(FREQUENCIES), index=1, key="ts_freq")
+    with col_metric:
+        metric_label = st.selectbox("Métrica", list(METRICS), key="ts_metric")
+    with col_range:
+        selected_range = st.date_input("Período", value=(first, last), min_value=first, max_value=last, key="ts_range")
+    # Enquanto o usuário escolhe o intervalo, o date_input devolve só a data inicial.
+    start, end = (tuple(selected_range) + (last,))[:2] if isinstance(selected_range, (tuple, list)) else (selected_range, last)
+
+    names = empresas.dropna(subset=["id_empresa"]).drop_duplicates("id_empresa")
+    names = dict(zip(names["nome_empresa"].astype(str), names["id_empresa"].astype("int64")))
+    chosen = st.multiselect("Empresas", list(names), max_selections=MAX_SERIES, key="ts_companies",
+                            placeholder=f"{TOTAL_LABEL} (selecione até {MAX_SERIES} para comparar)")
+    companies = {names[name]: name for name in chosen}
+
+    data = rollups.query(FREQUENCIES[freq_label], start, end, METRICS[metric_label], companies)
+    if data.empty:
+        st.info("Nenhum faturamento no período selecionado.")
+        return
+    with timed("downsample", "revenue_timeseries"):
+        shown = downsample(data)
+    st.altair_chart(line_chart(shown, "periodo", "valor", "serie", "Período", metric_label, f"{metric_label} por {freq_label.lower()}"), use_container_width=True)
+    if len(shown) < len(data):
+        st.caption(f"{len(shown):,} de {len(data):,} pontos exibidos (LTTB).".replace(",", "."))
@@ -0,0 +1,366 @@
+import itertools
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional
+import pandas as pd
+import requests
+import streamlit as st
+from aggregations import apply_local_write
+from api_client import match_prefix
+from bulk_import import error_text
+from dataset_store import WRITE_INVALIDATES, get_dataset_store, user_key
+from entities import ENTITIES
+from ingest import SCHEMAS, apply_schema, frame_from_records
+from resilience import ApiUnavailable
+
+
+# Tentativas por escrita (conexão, timeout, 408/429/5xx) com espera exponencial a partir de BACKOFF s,
+# ou a pedida pela API no Retry-After, se for maior.
+MAX_ATTEMPTS = int(os.getenv("WRITE_MAX_ATTEMPTS", "5"))
+BACKOFF = float(os.getenv("WRITE_RETRY_BACKOFF", "1"))
+MAX_BACKOFF = 30.0
+RETRY_STATUS = {408, 429}
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+ENTITY_BY_PATH = {entity.path: entity for entity in ENTITIES.values()}
+
+
+@dataclass
+class PendingWrite:
+    id: str
+    owner: str
+    method: str
+    path: str
+    payload: dict
+    label: str
+    client: Any
+    headers: dict
+    # Mesma chave em todas as tentativas: a API pode descartar um POST repetido após um timeout.
+    idempotency_key: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "pending"
+    attempts: int = 0
+    error: Optional[str] = None
+    # Inserções aparecem nas tabelas com um id provisório negativo até a API devolver o real.
+    temp_id: Optional[int] = None
+    # Valores anteriores dos campos alterados (PUT), para desfazer se a API recusar.
+    previous: Optional[dict] = None
+    created_at: float = field(default_factory=time.time)
+    # Ordem de envio dentro da fila do usuário.
+    seq: int = 0
+
+    @property
+    def entity(self):
+        return match_prefix(ENTITY_BY_PATH, self.path)
+
+    @property
+    def record_id(self):
+        tail = self.path.rstrip("/").rsplit("/", 1)[-1]
+        return int(tail) if tail.isdigit() else None
+
+
+def retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def matches(frame, id_field, record_id):
+    return (frame[id_field] == record_id).fillna(False).to_numpy(dtype=bool)
+
+
+def patch_rows(frame, id_field, record_id, values, schema):
+    # Cópia rasa com as colunas alteradas; as demais continuam compartilhadas com o frame em cache.
+    mask = matches(frame, id_field, record_id)
+    if not mask.any():
+        return None
+    frame = frame.copy(deep=False)
+    frame.attrs = {}
+    for column, value in values.items():
+        if column in frame.columns:
+            column_values = frame[column].astype(object)
+            column_values[mask] = value
+            frame[column] = column_values
+    return apply_schema(frame, schema)
+
+
+class WriteQueue:
+    # Escritas dos formulários do Gerenciar: aplicadas na hora ao dataset em cache e enviadas em
+    # segundo plano. As de um mesmo usuário saem na ordem em que foram feitas (um update logo
+    # depois do insert não passa na frente dele); usuários diferentes não esperam uns pelos outros.
+    def __init__(self, store, max_workers=4, max_attempts=MAX_ATTEMPTS, backoff=BACKOFF):
+        self.store = store
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.writes = {}
+        self.queues = defaultdict(deque)
+        self.draining = set()
+        self.temp_ids = itertools.count(-1, -1)
+        self.sequence = itertools.count()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="write-queue")
+        self.lock = threading.RLock()
+
+    def owner_for(self, headers):
+        return self.store.canonical(user_key(headers))
+
+    def submit(self, client, headers, method, path, payload, label):
+        write = PendingWrite(uuid.uuid4().hex, self.owner_for(headers), method, path, dict(payload), label, client, dict(headers))
+        with self.lock:
+            write.seq = next(self.sequence)
+            self.writes[write.id] = write
+        self._enqueue(write)
+        return write
+
+    def _enqueue(self, write):
+        self._apply(write)
+        with self.lock:
+            self.queues[write.owner].append(write)
+            if write.owner in self.draining:
+                return
+            self.draining.add(write.owner)
+        self.executor.submit(self._drain, write.owner)
+
+    def _drain(self, owner):
+        while True:
+            with self.lock:
+                if not self.queues[owner]:
+                    self.draining.discard(owner)
+                    del self.queues[owner]
+                    return
+                write = self.queues[owner][0]
+            delay = self._send(write)
+            if delay is not None:
+                # A escrita continua na frente da fila (as seguintes esperam por ela), mas a espera
+                # não ocupa uma thread do pool: um timer retoma a fila depois.
+                timer = threading.Timer(delay, self.executor.submit, args=(self._drain, owner))
+                timer.daemon = True
+                timer.start()
+                return
+            with self.lock:
+                self.queues[owner].popleft()
+
+    def _headers(self, write):
+        # Authorization vigente da sessão, lido a cada tentativa: o token pode ter sido renovado
+        # desde que a escrita entrou na fila.
+        authorization = write.headers.get("Authorization")
+        current = getattr(write.client, "current_authorization", None)
+        authorization = (current(authorization) if current is not None and authorization else None) or authorization
+        if authorization:
+            write.headers = {**write.headers, "Authorization": authorization}
+        return {**write.headers, IDEMPOTENCY_HEADER: write.idempotency_key}
+
+    def _send(self, write):
+        # Uma tentativa. Devolve a espera (s) antes da próxima, ou None se a escrita terminou.
+        write.status = "sending"
+        write.attempts += 1
+        error, retry, wait = None, False, None
+        try:
+            response = write.client.request(write.method, write.path, headers=self._headers(write), json=write.payload)
+        except ApiUnavailable as exc:
+            response, retry, error = None, True, str(exc)
+        except requests.exceptions.RequestException as exc:
+            response, retry, error = None, True, f"Erro de conexão com a API: {exc.__class__.__name__}"
+        if response is not None:
+            if response.status_code == 200:
+                self._sent(write, response)
+                return None
+            error, retry = error_text(response), response.status_code >= 500 or response.status_code in RETRY_STATUS
+            wait = retry_after(response)
+        write.error = error
+        if not retry or write.attempts >= self.max_attempts:
+            self._failed(write)
+            return None
+        write.status = "pending"
+        return max(min(MAX_BACKOFF, self.backoff * 2 ** (write.attempts - 1)), wait or 0.0)
+
+    # --- Dataset em cache ---------------------------------------------------------
+
+    def _update(self, write, change):
+        # change(frame) -> frame novo ou None (nada a fazer). Sem frame em cache, não há o que mostrar.
+        path = write.entity.path
+        with self.lock:
+            current = self.store.get(write.owner, path)
+            if current is None:
+                return False
+            updated = change(current)
+            if updated is not None:
+                self.store.put(write.owner, path, updated)
+            return True
+
+    def _apply(self, write):
+        entity = write.entity
+        schema = SCHEMAS.get(entity.path, {})
+        if write.method == "POST":
+            write.temp_id = next(self.temp_ids)
+            row = frame_from_records([{**write.payload, entity.id_field: write.temp_id}], schema)
+
+            def append(frame):
+                merged = pd.concat([frame, row], ignore_index=True)
+                merged.attrs = {}
+                return apply_schema(merged, schema)
+
+            self._update(write, append)
+            return
+
+        def change(frame):
+            rows = frame[matches(frame, entity.id_field, write.record_id)]
+            if rows.empty:
+                return None
+            write.previous = {column: rows[column].iloc[0] for column in write.payload if column in frame.columns}
+            return patch_rows(frame, entity.id_field, write.record_id, write.payload, schema)
+
+        self._update(write, change)
+
+    def _sent(self, write, response):
+        entity = write.entity
+        schema = SCHEMAS.get(entity.path, {})
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        body = body if isinstance(body, dict) else {}
+        record_id = body.get(entity.id_field)
+        apply_local_write(write.headers, write.path, write.payload, response)
+        with self.lock:
+            write.status = "done"
+            del self.writes[write.id]
+            # A linha já está no cache: só os agregados do servidor precisam ser recarregados.
+            self.store.invalidate([path for path in match_prefix(WRITE_INVALIDATES, entity.path, []) if path != entity.path])
+            if write.method == "POST":
+                values = {column: value for column, value in body.items() if column in schema}
+                applied = record_id is not None and self._update(write, lambda frame: patch_rows(frame, entity.id_field, write.temp_id, values, schema))
+            else:
+                # Reaplica os valores confirmados (o dataset pode ter sido recarregado antes de a API
+                # gravá-los), menos os campos que escritas seguintes ainda vão mudar.
+                values = dict(write.payload)
+                for other in self._later(write):
+                    for column in other.payload:
+                        values.pop(column, None)
+                found = []
+
+                def confirm(frame):
+                    if not matches(frame, entity.id_field, write.record_id).any():
+                        return None
+                    found.append(True)
+                    return patch_rows(frame, entity.id_field, write.record_id, values, schema) if values else None
+
+                self._update(write, confirm)
+                applied = bool(found)
+            pending = any(other.owner == write.owner and other.entity is entity and other.status != "failed" for other in self.writes.values())
+            if not applied and not pending:
+                # Linha fora do cache (ou sem o id criado): dataset e páginas são recarregados da API.
+                self.store.invalidate([entity.path])
+
+    def _failed(self, write):
+        entity = write.entity
+        schema = SCHEMAS.get(entity.path, {})
+
+        def drop_temp(frame):
+            mask = matches(frame, entity.id_field, write.temp_id)
+            return frame[~mask].reset_index(drop=True) if mask.any() else None
+
+        with self.lock:
+            write.status = "failed"
+            if write.method == "POST":
+                self._update(write, drop_temp)
+            elif write.previous is not None:
+                # Campos que uma escrita seguinte do mesmo registro também altera mantêm o valor dela;
+                # o anterior desta passa a ser o "anterior" daquela, caso ela também seja recusada.
+                restore = dict(write.previous)
+                for other in self._later(write):
+                    for column in other.payload:
+                        if column not in restore:
+                            continue
+                        if other.previous is not None and column in other.previous:
+                            other.previous[column] = restore[column]
+                        del restore[column]
+                if restore:
+                    self._update(write, lambda frame: patch_rows(frame, entity.id_field, write.record_id, restore, schema))
+
+    def _later(self, write):
+        # PUTs ainda não resolvidos do mesmo usuário e registro, enfileirados depois desta escrita.
+        return sorted(
+            (other for other in self.writes.values()
+             if other.seq > write.seq and other.method == "PUT" and other.status != "failed" and other.owner == write.owner
+             and other.entity is write.entity and other.record_id == write.record_id),
+            key=lambda other: other.seq,
+        )
+
+    # --- Barra lateral ------------------------------------------------------------------
+
+    def for_user(self, owner):
+        with self.lock:
+            return sorted((write for write in self.writes.values() if write.owner == owner), key=lambda write: write.created_at)
+
+    def retry(self, write_id):
+        # Reenvio manual de uma escrita recusada: é uma nova tentativa, com nova chave de idempotência.
+        with self.lock:
+            write = self.writes.get(write_id)
+            if write is None or write.status != "failed":
+                return
+            write.status, write.error, write.attempts, write.previous = "pending", None, 0, None
+            write.idempotency_key = uuid.uuid4().hex
+            write.seq = next(self.sequence)
+        self._enqueue(write)
+
+    def discard(self, write_id):
+        with self.lock:
+            write = self.writes.get(write_id)
+            if write is not None and write.status == "failed":
+                del self.writes[write_id]
+
+
+@st.cache_resource
+def get_write_queue():
+    return WriteQueue(get_dataset_store(), max_workers=int(os.getenv("WRITE_QUEUE_WORKERS", "4")))
+
+
+def queue_write(client, headers, method, path, payload, label):
+    get_write_queue().submit(client, headers, method, path, payload, label)
+    st.success(f"{label}! Enviando à API em segundo plano; falhas aparecem na barra lateral.")
+
+
+def write_queue_sidebar(headers):
+    queue = get_write_queue()
+    owner = queue.owner_for(headers)
+    writes = queue.for_user(owner)
+    if not writes:
+        return
+    with st.sidebar:
+        _queue_status(queue, owner, 1 if any(write.status != "failed" for write in writes) else None)
+
+
+def _queue_status(queue, owner, run_every):
+    # Enquanto houver envios pendentes, só este bloco é reexecutado (a cada segundo); quando a
+    # fila esvazia, a página inteira é refeita para trocar os ids provisórios pelos reais.
+    @st.fragment(run_every=run_every)
+    def render():
+        writes = queue.for_user(owner)
+        pending = [write for write in writes if write.status != "failed"]
+        if pending:
+            retrying = sum(1 for write in pending if write.error)
+            st.info(f"⏳ {len(pending)} alteração(ões) sendo enviada(s)" + (f"; {retrying} com nova tentativa." if retrying else "."))
+        elif run_every:
+            st.rerun()
+        for write in writes:
+            if write.status != "failed":
+                continue
+            st.error(f"{write.label}: não salvo ({write.error}).")
+            col_retry, col_discard = st.columns(2)
+            col_retry.button("Reenviar", key=f"write_retry_{write.id}", on_click=queue.retry, args=(write.id,))
+            col_discard.button("Descartar", key=f"write_discard_{write.id}", on_click=queue.discard, args=(write.id,))
+
+    render()